@@ -0,0 +1,69 @@
+"""
+Агрегация звонков по пользователям для счетов: как было бы построчно (цикл и словари)
+против UsageAggregator (np.bincount по номеру пользователя). Строки синтетические и идут
+пачками, как из курсора в BillingService, база не нужна.
+
+    EmailPassword=... python -m benchmarks.bench_billing --rows 2000000 --users 50000
+"""
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from src.service.BillingService import UsageAggregator, _columns
+
+
+def _chunks(rows: int, users: int, chunk_rows: int, seed: int) -> list[list[tuple]]:
+    rand = random.Random(seed)
+    data = [(rand.randrange(users), rand.uniform(1, 1800), round(rand.uniform(0, 20), 2)) for _ in range(rows)]
+    return [data[i:i + chunk_rows] for i in range(0, rows, chunk_rows)]
+
+
+def _per_row(chunks: list[list[tuple]]) -> tuple[dict, dict]:
+    minutes: dict[int, float] = {}
+    amount: dict[int, float] = {}
+    for chunk in chunks:
+        for code, duration, price in chunk:
+            minutes[code] = minutes.get(code, 0.0) + math.ceil(duration / 60)
+            amount[code] = amount.get(code, 0.0) + price
+    return minutes, amount
+
+
+def _vectorized(chunks: list[list[tuple]], users: int) -> UsageAggregator:
+    usage = UsageAggregator(users)
+    for chunk in chunks:
+        usage.add_calls(*_columns(chunk))
+    return usage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    chunks = _chunks(args.rows, args.users, args.chunk_rows, args.seed)
+
+    started = time.perf_counter()
+    minutes, amount = _per_row(chunks)
+    per_row_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    usage = _vectorized(chunks, args.users)
+    vectorized_s = time.perf_counter() - started
+
+    codes = np.fromiter(minutes, dtype=np.intp, count=len(minutes))
+    assert np.array_equal(usage.active_users(), np.sort(codes))
+    assert np.allclose(usage.minutes[codes], np.fromiter(minutes.values(), dtype=np.float64, count=len(codes)))
+    assert np.allclose(usage.amount[codes], np.fromiter(amount.values(), dtype=np.float64, count=len(codes)))
+
+    for label, elapsed in (("per row", per_row_s), ("bincount", vectorized_s)):
+        print(f"{label:>9}: {elapsed:6.2f} s, {args.rows / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Цена сборки зависимостей на запрос: как было (репозиторий и сервис создаются заново
+в каждом get_*_service) против контейнера с объектами на весь процесс.
+Меряет время и память, выделенную на один вызов.
+
+    EmailPassword=... python -m benchmarks.bench_container --iterations 200000
+"""
+import argparse
+import time
+import tracemalloc
+
+from src.config import configuration
+from src.container import container
+from src.repository import LoginRepo, RegistrationRepo, RecoveryRepo
+from src.service.LoginService import LoginService
+from src.service.RegistrationService import RegistrationService
+from src.service.RecoveryService import RecoveryService
+from src.service.IdempotencyService import IdempotencyService
+from src.utils import IdempotencyStore
+
+# Так выглядели get_*_service до контейнера: backend читался из окружения на каждый вызов
+PER_REQUEST = {
+    "login": lambda: configuration.db.repository_backend == "asyncpg" or LoginService(repository=LoginRepo()),
+    "registration": lambda: configuration.db.repository_backend == "asyncpg" or RegistrationService(repo=RegistrationRepo()),
+    "recovery": lambda: configuration.db.repository_backend == "asyncpg" or RecoveryService(repo=RecoveryRepo()),
+    "idempotency": lambda: configuration.idempotency.store == "database" or IdempotencyService(cache=IdempotencyStore),
+}
+
+CONTAINER = {
+    "login": lambda: container.resolve("login_service"),
+    "registration": lambda: container.resolve("registration_service"),
+    "recovery": lambda: container.resolve("recovery_service"),
+    "idempotency": lambda: container.resolve("idempotency_service"),
+}
+
+
+def _time_per_call(factory, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        factory()
+    return (time.perf_counter() - started) / iterations
+
+
+def _bytes_per_call(factory, iterations: int) -> float:
+    # Объекты держим живыми, иначе освобожденная память переиспользуется и рост не виден
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = [factory() for _ in range(iterations)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Список под ссылки выделяется только ради измерения
+    return (after - before) / len(kept) - 8
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    container.build_all()
+
+    for name in PER_REQUEST:
+        for label, factory in (("per request", PER_REQUEST[name]), ("container", CONTAINER[name])):
+            per_call = _time_per_call(factory, args.iterations)
+            allocated = _bytes_per_call(factory, min(args.iterations, 50_000))
+            print(f"{name:>12} {label:>11}: {per_call * 1e6:6.2f} us, {max(allocated, 0.0):7.1f} B per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Пропускная способность валидации email до и после кэша нормализации.
+
+    EmailPassword=... python -m benchmarks.bench_email_validation --requests 200000
+"""
+import argparse
+import random
+import time
+
+from email_validator import validate_email, EmailNotValidError
+
+from src.models.responses.EmailNormaliztion import normalize_email, email_cache_info
+
+
+def _uncached(email: str) -> str:
+    return validate_email(
+        email.strip(),
+        check_deliverability=False,
+        allow_smtputf8=False,
+    ).normalized
+
+
+def _workload(requests: int, distinct: int, malformed_share: float) -> list[str]:
+    rnd = random.Random(42)
+    known = [f"user{i}@Example.COM" for i in range(distinct)]
+    malformed = ["no-at-sign.example.com", "user@nodot", "two words@example.com", "@example.com", "user@"]
+
+    return [
+        rnd.choice(malformed) if rnd.random() < malformed_share else rnd.choice(known)
+        for _ in range(requests)
+    ]
+
+
+def _run(name: str, validator, emails: list[str]) -> None:
+    started = time.perf_counter()
+    for email in emails:
+        try:
+            validator(email)
+        except EmailNotValidError:
+            pass
+    elapsed = time.perf_counter() - started
+
+    print(f"{name:>8}: {len(emails) / elapsed:12.0f} validations/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--distinct", type=int, default=10_000)
+    parser.add_argument("--malformed-share", type=float, default=0.05)
+    args = parser.parse_args()
+
+    emails = _workload(args.requests, args.distinct, args.malformed_share)
+
+    _run("before", _uncached, emails)
+    _run("after", normalize_email, emails)
+    print("cache:", email_cache_info())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Время холодного импорта приложения по данным `python -X importtime`.
+Падает с ненулевым кодом, если суммарное время импорта main выходит за бюджет
+или если при импорте подтянулись модули, которые должны грузиться лениво,
+поэтому скрипт можно ставить шагом в CI:
+
+    EmailPassword=... python -m benchmarks.bench_import_time --budget-ms 1200
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Эти модули должны импортироваться только при первом использовании.
+# email_validator сюда не входит: его заранее импортирует fastapi.openapi.models
+DEFERRED_MODULES = (
+    "fastapi_mail",
+    "passlib",
+    "dotenv",
+    "asyncpg",
+)
+
+
+def _import_times(target: str) -> dict[str, tuple[int, int]]:
+    env = os.environ | {"PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("EmailPassword", "benchmark")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target", default="main")
+    parser.add_argument("--budget-ms", type=float, default=1200)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [_import_times(args.target) for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times[args.target][1])
+    total_ms = best[args.target][1] / 1000
+
+    print(f"import {args.target}: {total_ms:.1f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    for name, (self_us, cumulative_us) in sorted(best.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+    eager = [name for name in DEFERRED_MODULES if name in best]
+    if eager:
+        print("imported eagerly:", ", ".join(eager))
+
+    return 1 if eager or total_ms > args.budget_ms else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+CPU на сериализацию ответа: стандартный путь FastAPI (валидация по response_model +
+JSONResponse) против FastJSONResponse, который сразу сериализует модель через orjson.
+
+    EmailPassword=... python -m benchmarks.bench_json_response --rps 2000
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from starlette.responses import JSONResponse
+
+from src.app import FastJSONResponse
+from src.models import LoginResponse
+
+
+def _sample() -> LoginResponse:
+    token = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9." + "a" * 180 + ".signature"
+    return LoginResponse.model_construct(access_token=token, refresh_token=token)
+
+
+async def _standard(field, model: LoginResponse) -> bytes:
+    content = await serialize_response(field=field, response_content=model)
+    return JSONResponse(content).body
+
+
+async def _fast(field, model: LoginResponse) -> bytes:
+    return FastJSONResponse(model).body
+
+
+async def _measure(name: str, render, iterations: int, rps: int) -> None:
+    field = create_model_field(name="Response_login", type_=LoginResponse, mode="serialization")
+    model = _sample()
+
+    started = time.process_time()
+    for _ in range(iterations):
+        await render(field, model)
+    per_request = (time.process_time() - started) / iterations
+
+    print(f"{name:>9}: {per_request * 1e6:7.2f} us/response, "
+          f"{per_request * rps * 1e3:7.2f} ms CPU per second at {rps} rps")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--rps", type=int, default=2000)
+    args = parser.parse_args()
+
+    await _measure("standard", _standard, args.iterations, args.rps)
+    await _measure("orjson", _fast, args.iterations, args.rps)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
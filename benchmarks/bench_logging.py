@@ -0,0 +1,108 @@
+"""
+Сколько стоит одна запись лога тому, кто логирует (event loop): как было (basicConfig,
+синхронный StreamHandler, f-строка) против очереди с форматированием в отдельном потоке.
+Медленный приемник (--sink-latency-ms) изображает stdout, который не успевают читать.
+
+    EmailPassword=... python -m benchmarks.bench_logging --records 20000 --sink-latency-ms 0.2
+"""
+import argparse
+import logging
+import queue
+import time
+from logging.handlers import QueueListener
+
+from src.logger import DeferredQueueHandler, JSONFormatter, RateLimitFilter, RequestContextFilter, request_id_var
+
+
+class SlowSink:
+    """
+    Поток вывода, каждая запись в который занимает latency_s
+    """
+
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+        self.lines = 0
+
+    def write(self, data: str) -> None:
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        self.lines += data.count("\n")
+
+    def flush(self) -> None:
+        pass
+
+
+def _sync_logger(sink: SlowSink) -> tuple[logging.Logger, None]:
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    return _logger("bench.sync", handler), None
+
+
+def _queue_logger(sink: SlowSink, rate_limit: int | None = None) -> tuple[logging.Logger, QueueListener]:
+    output = logging.StreamHandler(sink)
+    output.setFormatter(JSONFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=1_000_000)
+    handler = DeferredQueueHandler(log_queue)
+    if rate_limit is not None:
+        handler.addFilter(RateLimitFilter({"bench.queue": rate_limit}))
+    handler.addFilter(RequestContextFilter())
+
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    return _logger("bench.queue", handler), listener
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def _measure(label: str, logger: logging.Logger, listener: QueueListener | None, sink: SlowSink,
+             records: int, eager: bool) -> None:
+    recipient, sender = "user@example.com", "noreply@example.com"
+
+    started = time.perf_counter()
+    for _ in range(records):
+        if eager:
+            logger.info(f"Пользователю {recipient} отправлено сообщение через {sender}")
+        else:
+            logger.info("Пользователю %s отправлено сообщение через %s", recipient, sender)
+    caller = time.perf_counter() - started
+
+    if listener is not None:
+        listener.stop()
+    total = time.perf_counter() - started
+
+    print(f"{label:>28}: {caller / records * 1e6:8.2f} us на запись у вызывающего, "
+          f"всего {total:6.2f} с, выведено {sink.lines}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--sink-latency-ms", type=float, default=0.2)
+    parser.add_argument("--rate-limit", type=int, default=50)
+    args = parser.parse_args()
+
+    request_id_var.set("bench")
+
+    for latency_ms in (0.0, args.sink_latency_ms):
+        print(f"приемник: {latency_ms} ms на запись")
+
+        sink = SlowSink(latency_ms / 1000)
+        _measure("sync, f-строка", *_sync_logger(sink), sink, args.records, eager=True)
+
+        sink = SlowSink(latency_ms / 1000)
+        _measure("очередь, JSON", *_queue_logger(sink), sink, args.records, eager=False)
+
+        sink = SlowSink(latency_ms / 1000)
+        _measure(f"очередь, JSON, {args.rate_limit}/с", *_queue_logger(sink, args.rate_limit), sink,
+                 args.records, eager=False)
+
+
+if __name__ == "__main__":
+    main()
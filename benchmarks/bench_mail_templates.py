@@ -0,0 +1,60 @@
+"""
+CPU на сборку письма: предкомпилированные шаблоны (MailTemplates) против jinja2,
+который разбирает шаблон на каждое письмо, и против jinja2 с кэшем скомпилированного шаблона.
+
+    EmailPassword=... python -m benchmarks.bench_mail_templates --iterations 50000
+"""
+import argparse
+import time
+
+from jinja2 import Environment
+
+from src.config import configuration
+from src.utils import MailTemplates
+
+URL = "https://asclavia.net/v1/registration/confirm-email?token=" + "a" * 180 + "&x=<1>"
+
+
+def _read(name: str) -> tuple[str, str]:
+    templates_dir = configuration.mail_templates.templates_dir
+    return (
+        (templates_dir / f"{name}.html").read_text(encoding="utf-8"),
+        (templates_dir / f"{name}.txt").read_text(encoding="utf-8"),
+    )
+
+
+def _measure(name: str, render, iterations: int) -> None:
+    started = time.process_time()
+    for _ in range(iterations):
+        render()
+    per_mail = (time.process_time() - started) / iterations
+    print(f"{name:>16}: {per_mail * 1e6:8.2f} us/mail")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    html_source, text_source = _read("confirm_email")
+    env = Environment(autoescape=True)
+    text_env = Environment(autoescape=False)
+    html_cached, text_cached = env.from_string(html_source), text_env.from_string(text_source)
+
+    compile_started = time.perf_counter()
+    MailTemplates.compile_all()
+    print(f"compile_all: {(time.perf_counter() - compile_started) * 1e3:.2f} ms (один раз на процесс)")
+
+    _measure("jinja2 per mail",
+             lambda: (env.from_string(html_source).render(url=URL), text_env.from_string(text_source).render(url=URL)),
+             max(1, args.iterations // 20))
+    _measure("jinja2 cached",
+             lambda: (html_cached.render(url=URL), text_cached.render(url=URL)),
+             args.iterations)
+    _measure("precompiled",
+             lambda: MailTemplates.render("confirm_email", url=URL),
+             args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Пропускная способность MailService на локальной SMTP заглушке: писем в секунду, задержка
+отправки (p50/p99) и сколько повторов и отказов предохранителя было по дороге.
+
+Нужен aiosmtpd (pip install aiosmtpd):
+    python -m benchmarks.bench_mail_throughput --messages 2000 --concurrency 200 \\
+        --latency-ms 20 --failure-rate 0.05 --senders 2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+
+from benchmarks.smtp_sink import SinkHandler, SMTPSink
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _metric_total(counter, **labels: str) -> float:
+    return sum(
+        value for key, value in counter.samples()
+        if all(item in key for item in labels.items())
+    )
+
+
+async def _run(messages: int, concurrency: int) -> tuple[list[float], int, float]:
+    from src.service.MailService import MailService
+
+    service = MailService()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    delivered = 0
+
+    async def one(i: int) -> None:
+        nonlocal delivered
+        async with semaphore:
+            started = time.perf_counter()
+            # Мимо окна дедупликации: меряем саму отправку
+            if await service._send_reset_mail(email=f"bench-{i}@example.com", user_id=str(i)):
+                delivered += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    return latencies, delivered, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--senders", type=int, default=2, help="сколько аккаунтов SMTP_SENDERS смотрят в заглушку")
+    parser.add_argument("--rate", type=float, default=1000.0, help="лимит писем в секунду на аккаунт")
+    parser.add_argument("--burst", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=2525)
+    args = parser.parse_args()
+
+    # Построчный лог каждого письма и каждого SMTP диалога сам по себе съедает заметную часть CPU
+    logging.getLogger("mail.log").setLevel(logging.WARNING)
+    logging.getLogger("mail_logger").setLevel(logging.CRITICAL)
+
+    handler = SinkHandler(
+        latency_s=args.latency_ms / 1000,
+        jitter_s=args.jitter_ms / 1000,
+        failure_rate=args.failure_rate,
+        seed=1
+    )
+
+    with SMTPSink(handler, port=args.port) as sink:
+        # Аккаунты читаются из окружения при первой отправке, поэтому выставляем до нее
+        os.environ["SMTP_SENDERS"] = json.dumps([
+            sink.sender_config(f"bench-{i}@example.com", args.rate, args.burst)
+            for i in range(args.senders)
+        ])
+
+        from src.service.MailSenders import sender_sends, senders_rejected
+
+        latencies, delivered, elapsed = asyncio.run(_run(args.messages, args.concurrency))
+
+    print(f"писем: {args.messages}, доставлено: {delivered}, за {elapsed:.2f} с -> {delivered / elapsed:.1f} msg/s")
+    print(f"задержка: p50 {statistics.median(latencies) * 1e3:.1f} ms, "
+          f"p99 {_percentile(latencies, 0.99) * 1e3:.1f} ms, max {max(latencies) * 1e3:.1f} ms")
+    print(f"заглушка: принято {handler.stats.accepted}, отклонено {handler.stats.failed}")
+    print(f"неудачных попыток (повторы и переключения аккаунтов): {_metric_total(sender_sends, outcome='error'):.0f}, "
+          f"отказов предохранителя: {_metric_total(senders_rejected):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Запросы по пользователю за период на cdr-подобной таблице в трех вариантах:
+одна таблица без индексов (как было), одна таблица с индексом по user_id (после индексов на внешние ключи)
+и помесячные секции с составным (user_id, start_time) и BRIN индексами.
+Таблицы создаются в отдельной схеме bench_partitions и удаляются в конце.
+
+Нужна живая база из docker-compose:
+    EmailPassword=... python -m benchmarks.bench_partitions --rows 2000000 --users 2000 --months 24
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import date, datetime, timezone
+
+from src.database import get_raw_connection
+from src.database.partitions import add_months
+
+SCHEMA = "bench_partitions"
+COLUMNS = "id uuid NOT NULL, user_id int NOT NULL, start_time timestamptz NOT NULL, duration int NOT NULL"
+
+QUERY = (
+    "SELECT count(*), sum(duration) FROM {table} "
+    "WHERE user_id = $1 AND start_time >= $2 AND start_time < $3"
+)
+
+
+def _timestamp(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+async def _prepare(conn, rows: int, users: int, first_month: date, months: int) -> None:
+    last_month = add_months(first_month, months)
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+
+    await conn.execute(f"CREATE TABLE {SCHEMA}.heap ({COLUMNS}, PRIMARY KEY (id))")
+    await conn.execute(
+        f"INSERT INTO {SCHEMA}.heap "
+        f"SELECT gen_random_uuid(), (random() * $1)::int, "
+        f"$2::timestamptz + random() * ($3::timestamptz - $2::timestamptz), (random() * 600)::int "
+        f"FROM generate_series(1, $4) ORDER BY 3",
+        users, _timestamp(first_month), _timestamp(last_month), rows
+    )
+
+    await conn.execute(f"CREATE TABLE {SCHEMA}.heap_indexed (LIKE {SCHEMA}.heap INCLUDING ALL)")
+    await conn.execute(f"INSERT INTO {SCHEMA}.heap_indexed SELECT * FROM {SCHEMA}.heap")
+    await conn.execute(f"CREATE INDEX ON {SCHEMA}.heap_indexed (user_id)")
+
+    await conn.execute(
+        f"CREATE TABLE {SCHEMA}.partitioned ({COLUMNS}, PRIMARY KEY (id, start_time)) "
+        f"PARTITION BY RANGE (start_time)"
+    )
+    for i in range(months):
+        month = add_months(first_month, i)
+        await conn.execute(
+            f"CREATE TABLE {SCHEMA}.partitioned_{i} PARTITION OF {SCHEMA}.partitioned "
+            f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{add_months(month, 1)} 00:00:00+00')"
+        )
+    await conn.execute(f"INSERT INTO {SCHEMA}.partitioned SELECT * FROM {SCHEMA}.heap")
+    await conn.execute(f"CREATE INDEX ON {SCHEMA}.partitioned (user_id, start_time)")
+    await conn.execute(f"CREATE INDEX ON {SCHEMA}.partitioned USING brin (start_time)")
+
+    for table in ("heap", "heap_indexed", "partitioned"):
+        await conn.execute(f"VACUUM ANALYZE {SCHEMA}.{table}")
+
+
+async def _measure(conn, table: str, queries: list[tuple], explain: bool) -> None:
+    statement = await conn.prepare(QUERY.format(table=f"{SCHEMA}.{table}"))
+
+    # Прогрев кэша страниц и плана
+    for args in queries[:10]:
+        await statement.fetchrow(*args)
+
+    latencies = []
+    for args in queries:
+        started = time.perf_counter()
+        await statement.fetchrow(*args)
+        latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    print(f"{table:>12}: p50 {statistics.median(latencies) * 1e3:8.2f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1e3:8.2f} ms")
+
+    if explain:
+        plan = await conn.fetch("EXPLAIN (ANALYZE, BUFFERS) " + QUERY.format(table=f"{SCHEMA}.{table}"), *queries[0])
+        print("\n".join(row[0] for row in plan))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--explain", action="store_true", help="показать план первого запроса")
+    parser.add_argument("--keep", action="store_true", help="не удалять схему bench_partitions")
+    args = parser.parse_args()
+
+    first_month = date(2023, 1, 1)
+    rng = random.Random(1)
+    # Типичный запрос: один пользователь за один месяц
+    queries = []
+    for _ in range(args.queries):
+        month = add_months(first_month, rng.randrange(args.months))
+        queries.append((rng.randrange(args.users), _timestamp(month), _timestamp(add_months(month, 1))))
+
+    async with get_raw_connection() as (conn, _):
+        started = time.perf_counter()
+        await _prepare(conn, args.rows, args.users, first_month, args.months)
+        print(f"данные: {args.rows} строк, {args.users} пользователей, {args.months} месяцев, "
+              f"подготовка {time.perf_counter() - started:.1f} с")
+        try:
+            for table in ("heap", "heap_indexed", "partitioned"):
+                await _measure(conn, table, queries, args.explain)
+        finally:
+            if not args.keep:
+                await conn.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
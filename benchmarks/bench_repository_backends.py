@@ -0,0 +1,53 @@
+"""
+Сравнение ORM репозиториев и asyncpg пути с подготовленными выражениями.
+
+Нужна живая база из docker-compose:
+    EmailPassword=... python -m benchmarks.bench_repository_backends --iterations 2000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from src.repository import RegistrationRepo, FastRegistrationRepo
+
+
+async def _measure(name: str, repo, emails: list[str], iterations: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            email = emails[i % len(emails)]
+            await repo.find_user_by_email(email)
+            await repo.is_user_exists(email)
+
+    # Прогрев: пул соединений и подготовленные выражения
+    await asyncio.gather(*(one(i) for i in range(concurrency)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{name:>8}: {iterations / elapsed:10.1f} op/s, {elapsed / iterations * 1e6:8.1f} us/op")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    orm_repo = RegistrationRepo()
+    fast_repo = FastRegistrationRepo()
+
+    emails = [f"bench-{uuid.uuid4().hex}@example.com" for _ in range(args.users)]
+    for email in emails:
+        await fast_repo.add_user(email=email, phone_num="70000000000", password_hash="x")
+
+    await _measure("orm", orm_repo, emails, args.iterations, args.concurrency)
+    await _measure("asyncpg", fast_repo, emails, args.iterations, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""
+Проверка профиля загрузки "list": список задач пользователя со всеми связями канала
+(чат, входящая и исходящая линии, CRM) должен уходить в базу одним запросом.
+Падает с AssertionError и списком запросов, если профиль или связи Task начали давать N+1.
+
+Нужна живая база из docker-compose с задачами хотя бы у одного пользователя:
+    EmailPassword=... python -m benchmarks.check_task_queries
+    EmailPassword=... python -m benchmarks.check_task_queries --user-id <uuid>
+"""
+import argparse
+import asyncio
+import uuid
+
+from src.container import container
+from src.database import get_raw_connection
+from src.database.loading import assert_max_queries
+
+
+async def _busiest_user() -> uuid.UUID | None:
+    async with get_raw_connection() as (conn, _):
+        return await conn.fetchval(
+            "SELECT user_id FROM asclavia_schema.tasks GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=uuid.UUID, default=None,
+                        help="по умолчанию пользователь с наибольшим числом задач")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    user_id = args.user_id or await _busiest_user()
+    if user_id is None:
+        raise SystemExit("В tasks нет ни одной задачи, проверять нечего")
+
+    repo = container.resolve("task_repo")
+    # Прогрев: соединение пула и настройка мапперов не должны попасть в счет
+    await repo.list_tasks(user_id, profile="list", limit=1)
+
+    with assert_max_queries(1) as counter:
+        tasks = await repo.list_tasks(user_id, profile="list", limit=args.limit)
+        # Связи профиля уже загружены, обращение к ним не ходит в базу (иначе raise_on_sql)
+        channels = sum(
+            1 for task in tasks
+            if task.chat or task.telephone_income or task.telephone_outcome or task.crm
+        )
+
+    print(f"Задач: {len(tasks)}, с каналом: {channels}, запросов: {counter.count}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+Локальный SMTP сервер-заглушка для нагрузочных тестов почты: письма принимаются и выбрасываются.
+Умеет добавлять задержку ответа и отвечать временной ошибкой на часть писем.
+
+Нужен aiosmtpd (pip install aiosmtpd). Отдельным процессом:
+    python -m benchmarks.smtp_sink --port 2525 --latency-ms 50 --failure-rate 0.1
+
+Приложение направляется на заглушку через SMTP_SENDERS:
+    SMTP_SENDERS='[{"user": "bench@example.com", "password": "-", "host": "127.0.0.1", "port": 2525,
+                    "use_credentials": false, "validate_certs": false, "rate_per_s": 1000, "burst": 1000}]'
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class SinkStats:
+    accepted: int = 0
+    failed: int = 0
+
+
+class SinkHandler:
+    """
+    Обработчик aiosmtpd: ждет latency_s (плюс случайный разброс до jitter_s) и с вероятностью
+    failure_rate отвечает 451, иначе принимает письмо
+    """
+
+    def __init__(self,
+                 latency_s: float = 0.0,
+                 jitter_s: float = 0.0,
+                 failure_rate: float = 0.0,
+                 seed: int | None = None
+                 ) -> None:
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.failure_rate = failure_rate
+        self.stats = SinkStats()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope) -> str:
+        delay = self.latency_s + self._random.random() * self.jitter_s
+        if delay:
+            await asyncio.sleep(delay)
+
+        with self._lock:
+            if self._random.random() < self.failure_rate:
+                self.stats.failed += 1
+                return "451 4.3.0 Injected failure, try again later"
+            self.stats.accepted += 1
+        return "250 2.0.0 OK"
+
+
+class SMTPSink:
+    """
+    Сервер в отдельном потоке со своим event loop, чтобы задержки заглушки
+    не отнимали время у клиента, который меряем
+    """
+
+    def __init__(self, handler: SinkHandler, host: str = "127.0.0.1", port: int = 2525) -> None:
+        from aiosmtpd.controller import Controller
+
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self._controller = Controller(handler, hostname=host, port=port)
+
+    def __enter__(self) -> "SMTPSink":
+        self._controller.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._controller.stop()
+
+    def sender_config(self, user: str, rate_per_s: float, burst: int) -> dict:
+        """
+        Запись для SMTP_SENDERS, указывающая на эту заглушку
+        """
+        return {
+            "user": user,
+            "password": "-",
+            "host": self.host,
+            "port": self.port,
+            "use_credentials": False,
+            "validate_certs": False,
+            "rate_per_s": rate_per_s,
+            "burst": burst,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    handler = SinkHandler(
+        latency_s=args.latency_ms / 1000,
+        jitter_s=args.jitter_ms / 1000,
+        failure_rate=args.failure_rate
+    )
+    with SMTPSink(handler, host=args.host, port=args.port):
+        print(f"SMTP заглушка слушает {args.host}:{args.port}, Ctrl+C для остановки")
+        try:
+            while True:
+                time.sleep(5)
+                print(f"принято {handler.stats.accepted}, отклонено {handler.stats.failed}")
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,15 @@
 from typing import Any
 
 from src import App
+from src.app import lifespan
 from src.config import configuration
 from src.api.v1 import router_v1
+from src.api.health import health_router
 from dataclasses import asdict
 
 
 def main() -> Any:
-    app: Any = App(host='localhost',
-                   port=8000,
+    app: Any = App(lifespan=lifespan,
                    **asdict(configuration.app)
-                   ).included_cors().included_routers(routers=[router_v1])
-    return app
\ No newline at end of file
+                   ).included_cors().included_request_context().included_routers(routers=[router_v1, health_router])
+    return app
@@ -0,0 +1,5 @@
+-- Один email == один пользователь, на этом держится дедупликация при импорте
+-- Перед применением убедитесь, что дублей нет:
+--   SELECT email, count(*) FROM asclavia_schema.users GROUP BY email HAVING count(*) > 1;
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_users_email
+    ON asclavia_schema.users (email);
@@ -0,0 +1,53 @@
+-- Индексы на все внешние ключи: без них удаление пользователя (ON DELETE CASCADE
+-- и задание src.cli.delete_accounts) проходит каждую дочернюю таблицу целиком.
+-- CONCURRENTLY не блокирует запись в таблицу, пока индекс строится.
+-- Если построение прервалось, останется невалидный индекс: удалите его через
+-- DROP INDEX CONCURRENTLY и запустите файл снова.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_balance_user_id
+    ON asclavia_schema.balance (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_bills_user_id
+    ON asclavia_schema.bills (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_cdr_user_id
+    ON asclavia_schema.cdr (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_chat_user_id
+    ON asclavia_schema.chat (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_crm_user_id
+    ON asclavia_schema.crm (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_pjsip_endpoints_user_id
+    ON asclavia_schema.pjsip_endpoints (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_scenarios_user_id
+    ON asclavia_schema.scenarios (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_telephone_income_user_id
+    ON asclavia_schema.telephone_income (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_telephone_outcome_user_id
+    ON asclavia_schema.telephone_outcome (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_calls_description_id
+    ON asclavia_schema.calls (description_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_calls_income_call
+    ON asclavia_schema.calls (income_call);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_calls_outcome_call
+    ON asclavia_schema.calls (outcome_call);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_dialogs_chat_id
+    ON asclavia_schema.dialogs (chat_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_dialogs_description_id
+    ON asclavia_schema.dialogs (description_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_tasks_chat_id
+    ON asclavia_schema.tasks (chat_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_tasks_crm_id
+    ON asclavia_schema.tasks (crm_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_tasks_telephone_income_id
+    ON asclavia_schema.tasks (telephone_income_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_tasks_telephone_outcome_id
+    ON asclavia_schema.tasks (telephone_outcome_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_tasks_user_id
+    ON asclavia_schema.tasks (user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_templates_chat_id
+    ON asclavia_schema.templates (chat_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_templates_crm_id
+    ON asclavia_schema.templates (crm_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_templates_telephone_income_id
+    ON asclavia_schema.templates (telephone_income_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_templates_telephone_outcome_id
+    ON asclavia_schema.templates (telephone_outcome_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_templates_user_id
+    ON asclavia_schema.templates (user_id);
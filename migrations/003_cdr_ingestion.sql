@@ -0,0 +1,11 @@
+-- Один звонок АТС (uniqueid) == одна строка cdr, на этом держится дедупликация при загрузке CDR.
+-- Перед применением убедитесь, что дублей нет:
+--   SELECT uniqueid, count(*) FROM asclavia_schema.cdr GROUP BY uniqueid HAVING count(*) > 1;
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_cdr_uniqueid
+    ON asclavia_schema.cdr (uniqueid);
+
+-- Поиск владельца звонка по caller_id: внутренний номер, затем телефон пользователя
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_pjsip_endpoints_extension
+    ON asclavia_schema.pjsip_endpoints (extension);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_users_phone_number
+    ON asclavia_schema.users (phone_number);
@@ -0,0 +1,90 @@
+-- Перевод calls, cdr и dialogs на помесячные секции (PARTITION BY RANGE по времени).
+-- Таблица пересоздается и данные копируются, поэтому запускайте в окно обслуживания,
+-- когда в эти таблицы никто не пишет, и сделайте резервную копию. Весь файл - одна транзакция.
+-- После миграции секции поддерживает src.cli.partitions (и старт приложения на months_ahead вперед).
+BEGIN;
+
+ALTER TABLE asclavia_schema.calls RENAME TO calls_unpartitioned;
+ALTER TABLE asclavia_schema.cdr RENAME TO cdr_unpartitioned;
+ALTER TABLE asclavia_schema.dialogs RENAME TO dialogs_unpartitioned;
+
+CREATE TABLE asclavia_schema.calls (LIKE asclavia_schema.calls_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY RANGE (call_time);
+CREATE TABLE asclavia_schema.cdr (LIKE asclavia_schema.cdr_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY RANGE (start_time);
+CREATE TABLE asclavia_schema.dialogs (LIKE asclavia_schema.dialogs_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY RANGE (created_at);
+
+-- Секции на каждый месяц, где есть данные, и на 3 месяца вперед, плюс default
+DO $$
+DECLARE
+    spec record;
+    first_month date;
+    last_month date;
+    part_month date;
+BEGIN
+    FOR spec IN SELECT * FROM (VALUES
+        ('calls', 'call_time'),
+        ('cdr', 'start_time'),
+        ('dialogs', 'created_at')
+    ) AS t (tbl, col) LOOP
+        EXECUTE format('CREATE TABLE asclavia_schema.%I PARTITION OF asclavia_schema.%I DEFAULT',
+                       spec.tbl || '_default', spec.tbl);
+
+        EXECUTE format('SELECT date_trunc(''month'', min(%I) AT TIME ZONE ''UTC'')::date FROM asclavia_schema.%I',
+                       spec.col, spec.tbl || '_unpartitioned') INTO first_month;
+        last_month := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+        part_month := coalesce(first_month, date_trunc('month', now() AT TIME ZONE 'UTC')::date);
+
+        WHILE part_month <= last_month LOOP
+            EXECUTE format(
+                'CREATE TABLE asclavia_schema.%I PARTITION OF asclavia_schema.%I FOR VALUES FROM (%L) TO (%L)',
+                spec.tbl || to_char(part_month, '"_y"YYYY"m"MM'), spec.tbl,
+                part_month::text || ' 00:00:00+00', (part_month + interval '1 month')::date::text || ' 00:00:00+00'
+            );
+            part_month := (part_month + interval '1 month')::date;
+        END LOOP;
+    END LOOP;
+END
+$$;
+
+INSERT INTO asclavia_schema.calls SELECT * FROM asclavia_schema.calls_unpartitioned;
+INSERT INTO asclavia_schema.cdr SELECT * FROM asclavia_schema.cdr_unpartitioned;
+INSERT INTO asclavia_schema.dialogs SELECT * FROM asclavia_schema.dialogs_unpartitioned;
+
+-- Старые таблицы удаляются до создания ограничений: у новых индексов те же имена
+DROP TABLE asclavia_schema.calls_unpartitioned;
+DROP TABLE asclavia_schema.cdr_unpartitioned;
+DROP TABLE asclavia_schema.dialogs_unpartitioned;
+
+-- Ключ секционирования обязан входить в первичный ключ и уникальные ограничения
+ALTER TABLE asclavia_schema.calls ADD PRIMARY KEY (id, call_time);
+ALTER TABLE asclavia_schema.calls
+    ADD FOREIGN KEY (description_id) REFERENCES asclavia_schema.call_description (id) ON DELETE CASCADE,
+    ADD FOREIGN KEY (income_call) REFERENCES asclavia_schema.telephone_income (id) ON DELETE CASCADE,
+    ADD FOREIGN KEY (outcome_call) REFERENCES asclavia_schema.telephone_outcome (id) ON DELETE CASCADE;
+CREATE INDEX ix_asclavia_schema_calls_description_id ON asclavia_schema.calls (description_id);
+CREATE INDEX ix_asclavia_schema_calls_income_call_call_time ON asclavia_schema.calls (income_call, call_time);
+CREATE INDEX ix_asclavia_schema_calls_outcome_call_call_time ON asclavia_schema.calls (outcome_call, call_time);
+CREATE INDEX ix_asclavia_schema_calls_call_time_brin ON asclavia_schema.calls USING brin (call_time);
+
+ALTER TABLE asclavia_schema.cdr ADD PRIMARY KEY (id, start_time);
+ALTER TABLE asclavia_schema.cdr
+    ADD CONSTRAINT uq_asclavia_schema_cdr_uniqueid_start_time UNIQUE (uniqueid, start_time),
+    ADD FOREIGN KEY (user_id) REFERENCES asclavia_schema.users (id);
+CREATE INDEX ix_asclavia_schema_cdr_user_id_start_time ON asclavia_schema.cdr (user_id, start_time);
+CREATE INDEX ix_asclavia_schema_cdr_start_time_brin ON asclavia_schema.cdr USING brin (start_time);
+
+ALTER TABLE asclavia_schema.dialogs ADD PRIMARY KEY (id, created_at);
+ALTER TABLE asclavia_schema.dialogs
+    ADD FOREIGN KEY (description_id) REFERENCES asclavia_schema.dialog_description (id) ON DELETE CASCADE,
+    ADD FOREIGN KEY (chat_id) REFERENCES asclavia_schema.chat (id) ON DELETE CASCADE;
+CREATE INDEX ix_asclavia_schema_dialogs_description_id ON asclavia_schema.dialogs (description_id);
+CREATE INDEX ix_asclavia_schema_dialogs_chat_id_created_at ON asclavia_schema.dialogs (chat_id, created_at);
+CREATE INDEX ix_asclavia_schema_dialogs_created_at_brin ON asclavia_schema.dialogs USING brin (created_at);
+
+ANALYZE asclavia_schema.calls;
+ANALYZE asclavia_schema.cdr;
+ANALYZE asclavia_schema.dialogs;
+
+COMMIT;
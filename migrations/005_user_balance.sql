@@ -0,0 +1,19 @@
+-- Текущий баланс пользователя, чтобы не суммировать весь журнал balance на каждый запрос.
+-- Заполняется из журнала под блокировкой записи в balance: иначе изменение, сделанное во время
+-- заполнения, попадет в журнал, но не в сумму. Дальше его ведет BalanceRepo в той же транзакции,
+-- что и запись в журнал. Проверка: python -m src.cli.reconcile_balance
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS asclavia_schema.user_balance (
+    user_id UUID PRIMARY KEY REFERENCES asclavia_schema.users (id) ON DELETE CASCADE,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+LOCK TABLE asclavia_schema.balance IN SHARE MODE;
+
+INSERT INTO asclavia_schema.user_balance (user_id, value, updated_at)
+SELECT user_id, sum(value), now() FROM asclavia_schema.balance GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at;
+
+COMMIT;
@@ -0,0 +1,24 @@
+-- Индексы под keyset пагинацию /v1/history: (владелец, время, id) отдают страницу
+-- после курсора одним проходом по индексу. Старые индексы - их префиксы, поэтому удаляются.
+
+-- tasks не секционирована, индекс строится без блокировки записи
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asclavia_schema_tasks_user_id_created_at_id
+    ON asclavia_schema.tasks (user_id, created_at, id);
+DROP INDEX CONCURRENTLY IF EXISTS asclavia_schema.ix_asclavia_schema_tasks_user_id;
+
+-- На секционированных таблицах CONCURRENTLY недоступен: индекс строится по всем секциям
+-- и на это время блокирует запись в таблицу. Запускайте в окно обслуживания
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS ix_asclavia_schema_calls_income_call_call_time_id
+    ON asclavia_schema.calls (income_call, call_time, id);
+CREATE INDEX IF NOT EXISTS ix_asclavia_schema_calls_outcome_call_call_time_id
+    ON asclavia_schema.calls (outcome_call, call_time, id);
+CREATE INDEX IF NOT EXISTS ix_asclavia_schema_dialogs_chat_id_created_at_id
+    ON asclavia_schema.dialogs (chat_id, created_at, id);
+
+DROP INDEX IF EXISTS asclavia_schema.ix_asclavia_schema_calls_income_call_call_time;
+DROP INDEX IF EXISTS asclavia_schema.ix_asclavia_schema_calls_outcome_call_call_time;
+DROP INDEX IF EXISTS asclavia_schema.ix_asclavia_schema_dialogs_chat_id_created_at;
+
+COMMIT;
@@ -0,0 +1,12 @@
+-- Метка захвата ключа идемпотентности: незаконченный ключ, занятый дольше wait_timeout_s назад,
+-- забирает следующий запрос, а не ждет истечения expires_at (воркер мог умереть между claim и complete).
+-- Тела ответов теперь хранятся зашифрованными, старые записи с открытыми токенами удаляем:
+-- повтор по их ключам просто выполнится заново.
+BEGIN;
+
+ALTER TABLE asclavia_schema.idempotency_keys
+    ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now();
+
+DELETE FROM asclavia_schema.idempotency_keys;
+
+COMMIT;
@@ -0,0 +1,36 @@
+import secrets
+import jwt
+from fastapi import Header, HTTPException, status
+from src.config import configuration
+from src.utils import JWTManager
+
+
+async def require_admin(x_admin_token: str = Header(default="")) -> None:
+    """
+    Пускает только запросы с заголовком X-Admin-Token, совпадающим с ADMIN_TOKEN
+    """
+    expected = configuration.admin.token
+
+    if not expected or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin token is invalid"
+        )
+
+
+async def require_user(authorization: str = Header(default="")) -> str:
+    """
+    Пускает запросы с заголовком Authorization: Bearer <access токен>, возвращает user_id из токена
+    """
+    scheme, _, token = authorization.partition(" ")
+
+    try:
+        if scheme.lower() != "bearer" or not token:
+            raise jwt.InvalidTokenError("No bearer token")
+        return JWTManager.decode_access(token)["user_id"]
+    except (jwt.InvalidTokenError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Access token is invalid",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
@@ -0,0 +1 @@
+from .health import health_router
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Request
+from starlette.responses import PlainTextResponse
+from starlette import status
+from src.app import FastJSONResponse
+from src.utils import Metrics
+
+
+health_router = APIRouter(
+    tags=["health"]
+)
+
+
+@health_router.get(
+    "/healthz",
+    summary="Проверка, что процесс жив"
+)
+async def healthz():
+    return FastJSONResponse({"status": "ok"})
+
+
+@health_router.get(
+    "/readyz",
+    summary="Готовность принимать трафик: отдает 200 только после прогрева",
+    responses={503: {"detail": "Warm-up is not finished"}}
+)
+async def readyz(request: Request):
+    readiness = getattr(request.app.state, "readiness", None)
+
+    if readiness is None or not readiness.ready:
+        return FastJSONResponse(
+            {"status": "warming_up", "checks": readiness.checks if readiness else {}},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    return FastJSONResponse({"status": "ready", "checks": readiness.checks})
+
+
+@health_router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Метрики процесса в формате Prometheus"
+)
+async def metrics():
+    return PlainTextResponse(Metrics.render(), media_type="text/plain; version=0.0.4")
@@ -7,4 +7,8 @@ router_v1 = APIRouter(prefix="/v1")
 router_v1.include_router(login_router)
 router_v1.include_router(registration_router)
 router_v1.include_router(recovery_router)
+router_v1.include_router(admin_router)
+router_v1.include_router(recordings_router)
+router_v1.include_router(balance_router)
+router_v1.include_router(history_router)
 
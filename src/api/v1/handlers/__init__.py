@@ -1,3 +1,7 @@
 from .login import login_router
 from .registration import registration_router
-from .recovery import *
\ No newline at end of file
+from .recovery import *
+from .admin import admin_router
+from .recordings import recordings_router
+from .balance import balance_router
+from .history import history_router
@@ -0,0 +1 @@
+from .admin import admin_router
@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, Query, Request
+from starlette.responses import StreamingResponse
+from src.api.dependencies import require_admin
+from src.app import FastJSONResponse
+from src.config import configuration
+from src.models import UserExportFilter, CDRImportReport
+from src.service import get_export_service, get_cdr_ingestion_service, EXPORT_MEDIA_TYPES
+from src.service.CDRIngestionService import iter_lines, parse_rows
+
+
+admin_router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)]
+)
+
+
+@admin_router.get(
+    "/users/export",
+    response_class=StreamingResponse,
+    summary="Потоковая выгрузка пользователей в NDJSON или CSV",
+    responses={403: {"detail": "Admin token is invalid"}}
+)
+async def export_users(
+        format: Literal["ndjson", "csv"] = "ndjson",
+        is_active: bool | None = None,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+        chunk_size: int = Query(default=5000, ge=1, le=50000),
+        service=Depends(get_export_service)
+):
+    """
+    Отдает пользователей частями по мере чтения из базы серверным курсором.
+    created_from включительно, created_to не включительно.
+    Требует заголовок X-Admin-Token.
+    """
+    return StreamingResponse(
+        service.export_users(
+            UserExportFilter(
+                is_active=is_active,
+                created_from=created_from,
+                created_to=created_to
+            ),
+            fmt=format,
+            chunk_size=chunk_size
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
+    )
+
+
+@admin_router.post(
+    "/cdr/import",
+    response_model=CDRImportReport,
+    summary="Загрузка CDR с АТС из CSV или JSONL в теле запроса",
+    responses={403: {"detail": "Admin token is invalid"}}
+)
+async def import_cdr(
+        request: Request,
+        format: Literal["csv", "jsonl"] = "csv",
+        batch_size: int = Query(
+            default=configuration.cdr_ingestion.batch_size, ge=1, le=configuration.cdr_ingestion.max_batch_size
+        ),
+        service=Depends(get_cdr_ingestion_service)
+) -> FastJSONResponse:
+    """
+    Тело читается потоком и грузится пачками по batch_size строк по мере поступления,
+    файл целиком в памяти не держится. CSV с заголовком: uniqueid, caller_id, start_time,
+    end_time, disposition, duration, необязательный recording_path.
+    Повторно присланные звонки (тот же uniqueid) пропускаются.
+    Требует заголовок X-Admin-Token.
+    """
+    return FastJSONResponse(
+        await service.ingest(
+            parse_rows(iter_lines(request.stream()), format),
+            batch_size=batch_size
+        )
+    )
@@ -0,0 +1 @@
+from .balance import balance_router
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+from src.api.dependencies import require_user
+from src.models import BalanceResponse
+from src.service import get_balance_service
+
+
+balance_router = APIRouter(
+    prefix="/balance",
+    tags=["balance"]
+)
+
+
+@balance_router.get(
+    "",
+    response_model=BalanceResponse,
+    summary="Текущий баланс пользователя",
+    responses={
+        401: {"detail": "Access token is invalid"}
+    }
+)
+async def get_balance(user_id: str = Depends(require_user),
+                      service=Depends(get_balance_service)
+                      ) -> BalanceResponse:
+    """
+    Баланс берется из user_balance, а не суммой всей истории balance.
+    Требует заголовок Authorization: Bearer <access токен>.
+    """
+    return await service.get_balance_response(user_id)
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, Query
+from src.api.dependencies import require_user
+from src.config import configuration
+from src.models import DialogPage, CallPage, TaskPage
+from src.service import get_history_service
+
+
+history_router = APIRouter(
+    prefix="/history",
+    tags=["history"]
+)
+
+_RESPONSES = {
+    400: {"detail": "Cursor is invalid"},
+    401: {"detail": "Access token is invalid"}
+}
+
+
+def _limit() -> int:
+    params = configuration.history
+    return Query(default=params.default_limit, ge=1, le=params.max_limit)
+
+
+@history_router.get(
+    "/dialogs",
+    response_model=DialogPage,
+    summary="Диалоги пользователя от новых к старым",
+    responses=_RESPONSES
+)
+async def list_dialogs(cursor: str | None = None,
+                       limit: int = _limit(),
+                       user_id: str = Depends(require_user),
+                       service=Depends(get_history_service)
+                       ) -> DialogPage:
+    """
+    Первая страница - без cursor, следующие - с next_cursor из предыдущего ответа.
+    Требует заголовок Authorization: Bearer <access токен>.
+    """
+    return await service.list_dialogs(user_id, cursor, limit)
+
+
+@history_router.get(
+    "/calls",
+    response_model=CallPage,
+    summary="Звонки пользователя от новых к старым",
+    responses=_RESPONSES
+)
+async def list_calls(cursor: str | None = None,
+                     limit: int = _limit(),
+                     user_id: str = Depends(require_user),
+                     service=Depends(get_history_service)
+                     ) -> CallPage:
+    """
+    Входящие и исходящие звонки по времени звонка.
+    Требует заголовок Authorization: Bearer <access токен>.
+    """
+    return await service.list_calls(user_id, cursor, limit)
+
+
+@history_router.get(
+    "/tasks",
+    response_model=TaskPage,
+    summary="Задачи пользователя от новых к старым",
+    responses=_RESPONSES
+)
+async def list_tasks(cursor: str | None = None,
+                     limit: int = _limit(),
+                     user_id: str = Depends(require_user),
+                     service=Depends(get_history_service)
+                     ) -> TaskPage:
+    """
+    Требует заголовок Authorization: Bearer <access токен>.
+    """
+    return await service.list_tasks(user_id, cursor, limit)
@@ -5,6 +5,7 @@ from src.models import (LoginResponse,
                         LoginData,
                         DataForLogin)
 from src.service import get_login_service
+from src.app import FastJSONResponse
 
 login_router = APIRouter(
     prefix="/login",
@@ -23,16 +24,18 @@ login_router = APIRouter(
 )
 async def login_user(data_for_login: DataForLogin,
                      service = Depends(get_login_service)
-                     ) -> LoginResponse:
+                     ) -> FastJSONResponse:
     """
     Логинит пользователя, если введен некорректный email (имеется ввиду строчка, которая не может быть email-ом)
     возвращает 422.
     Если человек ввел неправильный пароль возвращается код ошибки 403.
     А если такого email нет в базе, то 404.
     """
-    return await service.login_user(
-        LoginData(
-            email=data_for_login.email,
-            password=data_for_login.password
+    return FastJSONResponse(
+        await service.login_user(
+            LoginData(
+                email=data_for_login.email,
+                password=data_for_login.password
+            )
         )
     )
\ No newline at end of file
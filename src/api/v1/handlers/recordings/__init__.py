@@ -0,0 +1 @@
+from .recordings import recordings_router
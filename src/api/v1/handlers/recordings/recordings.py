@@ -0,0 +1,35 @@
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header
+from starlette.responses import StreamingResponse
+from src.api.dependencies import require_user
+from src.service import get_recording_service
+
+
+recordings_router = APIRouter(
+    prefix="/recordings",
+    tags=["recordings"]
+)
+
+
+@recordings_router.get(
+    "/{cdr_id}",
+    response_class=StreamingResponse,
+    summary="Запись разговора, целиком или диапазоном байт",
+    responses={
+        206: {"detail": "Requested byte range"},
+        401: {"detail": "Access token is invalid"},
+        404: {"detail": "No such call"},
+        416: {"detail": "Range is not satisfiable"}
+    }
+)
+async def get_recording(cdr_id: UUID,
+                        range: str | None = Header(default=None),
+                        user_id: str = Depends(require_user),
+                        service=Depends(get_recording_service)
+                        ):
+    """
+    Отдает запись звонка текущего пользователя. Поддерживает заголовок Range (bytes=start-end),
+    так что плеер может перематывать запись, не скачивая ее целиком.
+    Требует заголовок Authorization: Bearer <access токен>.
+    """
+    return await service.stream_recording(cdr_id, user_id, range)
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
 from starlette import status
-from starlette.responses import RedirectResponse
+from starlette.responses import RedirectResponse, Response
 from src.models import (
     EmailData,
     DataForSendingEmail,
@@ -9,7 +9,7 @@ from src.models import (
     ResetExpired,
     BadTokenResponse
     )
-from src.service import get_recovery_service
+from src.service import get_recovery_service, get_idempotency_service
 
 
 recovery_router = APIRouter(
@@ -57,16 +57,28 @@ async def set_new_password(
 )
 async def send_email_for_recov(
         email_data: EmailData,
-        service=Depends(get_recovery_service)
-):
+        service=Depends(get_recovery_service),
+        idempotency=Depends(get_idempotency_service),
+        idempotency_key: str | None = Header(default=None, alias="Idempotency-Key")
+) -> Response:
     """
     Данная ручка используется для запроса отправки на указанный email ссылки на страницу,
     на которой можно будет восстановить пароль
     Возвращает 404 если такого пользователя нет.
     Возвращает 422 если введенный email некорректен
+    С заголовком Idempotency-Key повтор запроса не отправляет второе письмо
     """
-    return await service.send_email_for_recov(
-        DataForSendingEmail(
-            email=email_data.email
+    async def send() -> Response:
+        await service.send_email_for_recov(
+            DataForSendingEmail(
+                email=email_data.email
+            )
         )
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    return await idempotency.execute(
+        key=idempotency_key,
+        scope="recovery",
+        payload=email_data,
+        call=send
     )
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
 from src.models import (RegistrationResponse,
                         SuchUserExists,
                         UserData,
                         RegistrationData,
                         convert_token_to_ConfirmationData,
-                        BadTokenResp
+                        BadTokenResp,
+                        BatchRegistrationData,
+                        BatchRegistrationResponse
                         )
-from src.service import get_registration_service
+from src.api.dependencies import require_admin
+from src.service import get_registration_service, get_idempotency_service
+from src.app import FastJSONResponse
 from starlette import status
-from starlette.responses import RedirectResponse
+from starlette.responses import RedirectResponse, Response
 
 
 registration_router = APIRouter(
@@ -26,23 +30,59 @@ registration_router = APIRouter(
 )
 async def registrate_user(
         user_data: UserData,
-        service = Depends(get_registration_service)
-) -> RegistrationResponse:
+        service = Depends(get_registration_service),
+        idempotency = Depends(get_idempotency_service),
+        idempotency_key: str | None = Header(default=None, alias="Idempotency-Key")
+) -> Response:
     """
     Валидирует номер телефона и email на предмет их формата, если что то не
     так возвращается кож ошибки 422.
-    Также может вернуть код ошибки 409 если пользователь уже есть в базе
+    Также может вернуть код ошибки 409 если пользователь уже есть в базе.
+    С заголовком Idempotency-Key повтор запроса получает ответ первого (с заголовком Idempotent-Replayed)
     """
-
-    return await service.registrate_user(
-        RegistrationData(
-            email=user_data.email,
-            phone=int(user_data.phone),
-            password=user_data.password
+    async def registrate() -> FastJSONResponse:
+        return FastJSONResponse(
+            await service.registrate_user(
+                RegistrationData(
+                    email=user_data.email,
+                    phone=int(user_data.phone),
+                    password=user_data.password
+                )
+            )
         )
+
+    return await idempotency.execute(
+        key=idempotency_key,
+        scope="registration",
+        payload=user_data,
+        call=registrate
     )
 
 
+@registration_router.post(
+    path="/batch",
+    response_model=BatchRegistrationResponse,
+    dependencies=[Depends(require_admin)],
+    summary="Регистрирует пакет пользователей (для партнеров)",
+    responses={
+        503: {"detail": "Too many batches are being registered, retry later"}
+    }
+)
+async def registrate_users(
+        batch: BatchRegistrationData,
+        service = Depends(get_registration_service)
+) -> FastJSONResponse:
+    """
+    Каждый элемент валидируется так же, как в одиночной регистрации, ошибка в любом дает 422.
+    В ответе статус по каждому элементу: created, exists (уже был в базе) или
+    duplicate (email повторяется в запросе). Письма подтверждения отправляются в фоне.
+    Размер пакета ограничен batch_registration.max_users: столько паролей успевает захэшироваться
+    за max_hash_wait_s. 503, если пакет не успеет из-за уже принятых пакетов.
+    Нужен заголовок X-Admin-Token
+    """
+    return FastJSONResponse(await service.registrate_users(batch))
+
+
 @registration_router.get(
     "/confirm-email",
     status_code=status.HTTP_204_NO_CONTENT,
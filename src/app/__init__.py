@@ -1 +1,4 @@
-from .app import App
\ No newline at end of file
+from .app import App
+from .responses import FastJSONResponse
+from .middleware import RequestContextMiddleware
+from .lifespan import lifespan, Readiness
@@ -2,10 +2,13 @@ from typing import Any
 
 from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
+from .responses import FastJSONResponse
+from .middleware import RequestContextMiddleware
 
 
 class App(FastAPI):
     def __init__(self, **kwargs: Any) -> None:
+        kwargs.setdefault("default_response_class", FastJSONResponse)
         super().__init__(**kwargs)
 
     def included_routers(self, routers: list[APIRouter]) -> Any:
@@ -14,6 +17,11 @@ class App(FastAPI):
 
         return self
 
+    def included_request_context(self) -> Any:
+        self.add_middleware(RequestContextMiddleware)
+
+        return self
+
     def included_cors(
             self,
             allow_origins: list[str] | None = None,
@@ -0,0 +1,143 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator
+
+from src.config import configuration
+from src.logger import app_logger
+
+
+class Readiness:
+    """
+    Состояние прогрева приложения: результат каждой проверки и общий флаг готовности
+    """
+
+    def __init__(self, require_smtp: bool = False) -> None:
+        self._require_smtp = require_smtp
+        self.checks: dict[str, str] = {
+            "database": "pending",
+            "password_hasher": "pending",
+            "smtp": "pending",
+            "mail_templates": "pending",
+        }
+
+    def mark(self, check: str, state: str) -> None:
+        self.checks[check] = state
+
+    @property
+    def ready(self) -> bool:
+        required = ["database", "password_hasher", "mail_templates"] + (["smtp"] if self._require_smtp else [])
+        return all(self.checks[check] == "ok" for check in required)
+
+
+async def _warm_up_database(readiness: Readiness) -> None:
+    from src.database import ensure_tables, warm_up_pool
+
+    while True:
+        try:
+            await ensure_tables()
+            await warm_up_pool(min(configuration.warm_up.db_connections, configuration.db.pool_size))
+            readiness.mark("database", "ok")
+            return
+        except Exception as exc:
+            readiness.mark("database", "unavailable")
+            app_logger.warning("Прогрев базы не удался, повторим позже: %r", exc)
+            await asyncio.sleep(configuration.warm_up.db_retry_delay_s)
+
+
+async def _warm_up_password_hasher(readiness: Readiness) -> None:
+    from src.utils import PasswordManager
+
+    # Первый хэш грузит backend bcrypt в passlib, это заметно долго
+    hashed = await PasswordManager.hash_password_async("warm-up")
+    await PasswordManager.verify_password_async("warm-up", hashed)
+    readiness.mark("password_hasher", "ok")
+
+
+async def _compile_mail_templates(readiness: Readiness) -> None:
+    from src.utils import MailTemplates
+
+    try:
+        await asyncio.to_thread(MailTemplates.compile_all)
+        readiness.mark("mail_templates", "ok")
+    except OSError as exc:
+        readiness.mark("mail_templates", "unavailable")
+        app_logger.error("Шаблоны писем не загрузились: %r", exc)
+
+
+async def _check_smtp(readiness: Readiness) -> None:
+    from src.service.MailSenders import get_sender_pool
+
+    async def reachable(host: str, port: int) -> bool:
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port),
+                timeout=configuration.warm_up.smtp_timeout_s
+            )
+            writer.close()
+            await writer.wait_closed()
+            return True
+        except Exception as exc:
+            app_logger.warning("SMTP сервер %s:%s недоступен: %r", host, port, exc)
+            return False
+
+    try:
+        senders = get_sender_pool().senders
+    except Exception as exc:
+        readiness.mark("smtp", "unavailable")
+        app_logger.warning("Аккаунты SMTP не настроены: %r", exc)
+        return
+
+    results = await asyncio.gather(*(reachable(sender.params.host, sender.params.port) for sender in senders))
+    # Письма уходят через любой живой аккаунт, поэтому хватает одного
+    readiness.mark("smtp", "ok" if any(results) else "unavailable")
+
+
+async def warm_up(readiness: Readiness) -> None:
+    await asyncio.gather(
+        _warm_up_database(readiness),
+        _warm_up_password_hasher(readiness),
+        _compile_mail_templates(readiness),
+        _check_smtp(readiness),
+    )
+    app_logger.info("Прогрев завершен: %s", readiness.checks)
+
+
+@asynccontextmanager
+async def lifespan(app: Any) -> AsyncGenerator[None, None]:
+    """
+    Прогрев идет в фоне: сервер сразу принимает соединения и отвечает на /healthz,
+    а /readyz начинает отдавать 200 только когда прогрев закончится
+    """
+    from src.container import container
+    from src.logger import setup_logging
+
+    setup_logging()
+
+    for name, exc in container.build_all().items():
+        app_logger.warning("Зависимость %s не собрана при старте, соберется при первом обращении: %r", name, exc)
+
+    readiness = Readiness(require_smtp=configuration.warm_up.require_smtp)
+    app.state.readiness = readiness
+    warm_up_task = asyncio.create_task(warm_up(readiness))
+
+    try:
+        yield
+    finally:
+        warm_up_task.cancel()
+        await asyncio.gather(warm_up_task, return_exceptions=True)
+
+        from src.database import get_engine
+        from src.utils import PasswordManager, BatchHasher
+        from src.service.MailQueue import get_mail_queue
+
+        # Сюда попадаем уже после того, как uvicorn дождался запросов в работе,
+        # остается дослать письма из очереди
+        await get_mail_queue().drain(configuration.mail_queue.drain_timeout_s)
+        await asyncio.to_thread(PasswordManager.shutdown)
+        await asyncio.to_thread(BatchHasher.shutdown)
+        await get_engine().dispose()
+
+        from src.logger import stop_logging
+
+        # Последним: дописываем в stdout все, что залогировали при остановке
+        await asyncio.to_thread(stop_logging)
@@ -0,0 +1,49 @@
+import re
+import uuid
+from typing import Any
+
+from src.logger import request_id_var, trace_id_var
+
+# W3C traceparent: версия-trace_id-span_id-флаги
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$")
+_MAX_REQUEST_ID_LENGTH = 128
+
+
+class RequestContextMiddleware:
+    """
+    Выставляет request_id (из X-Request-ID или новый) и trace_id (из traceparent) на время запроса,
+    их подхватывают все записи лога. request_id возвращается клиенту в X-Request-ID.
+    Чистый ASGI, без BaseHTTPMiddleware: тело ответа не буферизуется и лишней задачи на запрос нет
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        trace_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id" and 0 < len(value) <= _MAX_REQUEST_ID_LENGTH:
+                request_id = value.decode("latin-1")
+            elif name == b"traceparent":
+                match = _TRACEPARENT.match(value.decode("latin-1"))
+                trace_id = match.group(1) if match else None
+
+        request_id = request_id or uuid.uuid4().hex
+        request_token = request_id_var.set(request_id)
+        trace_token = trace_id_var.set(trace_id)
+
+        async def send_with_request_id(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(request_token)
+            trace_id_var.reset(trace_token)
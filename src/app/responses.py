@@ -0,0 +1,20 @@
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON ответ через orjson.
+    Если отдать в него pydantic модель, то FastAPI не будет повторно валидировать ее
+    по response_model: модель сразу превращается в dict и сериализуется.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            # orjson сам умеет UUID и datetime, поэтому достаточно python режима
+            content = content.model_dump()
+
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
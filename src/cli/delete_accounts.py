@@ -0,0 +1,60 @@
+"""
+Удаление аккаунтов вместе со всеми данными пользователей (чаты, диалоги, звонки, задачи, счета...).
+
+    python -m src.cli.delete_accounts 1b4e28ba-2fa1-11d2-883f-0016d3cca427 ...
+    python -m src.cli.delete_accounts --file user_ids.txt
+
+Данные удаляются короткими транзакциями по AccountDeletionParams.batch_size строк, прогресс
+пишется в лог. Прерванный запуск можно повторить с теми же id.
+Перед первым запуском примените migrations/002_foreign_key_indexes.sql.
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from uuid import UUID
+
+from src.logger import app_logger, setup_logging
+
+
+def _read_ids(path: Path) -> list[UUID]:
+    with open(path, encoding="utf-8") as file:
+        return [UUID(line.strip()) for line in file if line.strip()]
+
+
+async def delete_accounts(user_ids: list[UUID]) -> int:
+    from src.service import get_account_deletion_service
+
+    service = get_account_deletion_service()
+    started = time.perf_counter()
+    total_rows = 0
+
+    for done, user_id in enumerate(user_ids, start=1):
+        report = await service.delete_account(user_id)
+        total_rows += report.rows
+        app_logger.info(
+            "Аккаунт %s %s: %d строк за %.2f с. Готово %d из %d, %.0f строк/с",
+            user_id, "удален" if report.user_deleted else "не найден, удалены остатки данных",
+            report.rows, report.elapsed_s, done, len(user_ids), total_rows / (time.perf_counter() - started)
+        )
+
+    return total_rows
+
+
+def main() -> None:
+    setup_logging()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("user_ids", nargs="*", type=UUID)
+    parser.add_argument("--file", type=Path, default=None, help="файл с id пользователей, по одному на строку")
+    args = parser.parse_args()
+
+    user_ids = args.user_ids + (_read_ids(args.file) if args.file else [])
+    if not user_ids:
+        parser.error("нужен хотя бы один id пользователя")
+
+    total_rows = asyncio.run(delete_accounts(user_ids))
+    app_logger.info("Удаление завершено: %d аккаунтов, %d строк", len(user_ids), total_rows)
+
+
+if __name__ == "__main__":
+    main()
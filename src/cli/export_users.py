@@ -0,0 +1,58 @@
+"""
+Выгрузка пользователей для аналитики и бэкфиллов с постоянным потреблением памяти.
+
+    python -m src.cli.export_users --format csv --is-active true --created-from 2025-01-01 -o users.csv
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from src.logger import app_logger, setup_logging
+
+
+def _parse_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "t", "yes")
+
+
+async def export(fmt: str, filters, chunk_size: int, output) -> int:
+    from src.service import get_export_service
+
+    written = 0
+    async for chunk in get_export_service().export_users(filters, fmt=fmt, chunk_size=chunk_size):
+        output.write(chunk)
+        written += len(chunk)
+    output.flush()
+    return written
+
+
+def main() -> None:
+    setup_logging()
+    from src.models import UserExportFilter
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--is-active", type=_parse_bool, default=None)
+    parser.add_argument("--created-from", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--created-to", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("-o", "--output", default="-", help="файл или - для stdout")
+    args = parser.parse_args()
+
+    filters = UserExportFilter(
+        is_active=args.is_active,
+        created_from=args.created_from,
+        created_to=args.created_to
+    )
+
+    if args.output == "-":
+        written = asyncio.run(export(args.format, filters, args.chunk_size, sys.stdout.buffer))
+    else:
+        with open(args.output, "wb") as output:
+            written = asyncio.run(export(args.format, filters, args.chunk_size, output))
+
+    app_logger.info("Выгружено %d байт", written)
+
+
+if __name__ == "__main__":
+    main()
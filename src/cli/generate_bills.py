@@ -0,0 +1,58 @@
+"""
+Расчет счетов за период по звонкам и диалогам.
+
+    python -m src.cli.generate_bills --month 2025-01
+    python -m src.cli.generate_bills --from 2025-01-01 --to 2025-01-16
+
+Период [from, to), по умолчанию прошлый месяц. Счета периода пересчитываются целиком:
+повторный запуск заменяет их, а не добавляет новые.
+"""
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from src.logger import app_logger, setup_logging
+
+
+def _previous_month() -> tuple[date, date]:
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    previous = (current - timedelta(days=1)).replace(day=1)
+    return previous, current
+
+
+def _month(value: str) -> tuple[date, date]:
+    start = datetime.strptime(value, "%Y-%m").date()
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, end
+
+
+async def generate(start: date, end: date):
+    from src.service.BillingService import get_billing_service
+
+    return await get_billing_service().generate_bills(start, end)
+
+
+def main() -> None:
+    setup_logging()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--month", type=_month, default=None, help="YYYY-MM")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, default=None)
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    if args.start or args.end:
+        if not (args.start and args.end):
+            parser.error("--from и --to задаются вместе")
+        start, end = args.start, args.end
+    else:
+        start, end = args.month or _previous_month()
+
+    report = asyncio.run(generate(start, end))
+    app_logger.info(
+        "Счета за %s..%s: %d счетов, звонков %d, диалогов %d за %.1f с (%.0f строк/с)",
+        start, end, report.bills, report.calls, report.dialogs, report.elapsed_s, report.rows_per_s
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Загрузка CDR с АТС из файла.
+
+    python -m src.cli.import_cdr cdr.csv --batch-size 5000
+
+Вход: CSV с заголовком или JSONL. Поля: uniqueid, caller_id (или src, clid), start_time (или start),
+end_time (или end), disposition, duration (или billsec), необязательный recording_path.
+Владелец звонка ищется по caller_id среди внутренних номеров (pjsip_endpoints.extension),
+затем среди телефонов пользователей. Строки грузятся через COPY, уже загруженные звонки
+(тот же uniqueid) пропускаются, так что файл можно загрузить повторно.
+"""
+import argparse
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator
+
+from src.config import configuration
+from src.logger import app_logger, setup_logging
+
+
+async def _read_lines(path: Path) -> AsyncIterator[str]:
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            yield line
+
+
+async def import_cdr(path: Path, fmt: str, batch_size: int):
+    from src.service import get_cdr_ingestion_service
+    from src.service.CDRIngestionService import parse_rows
+
+    return await get_cdr_ingestion_service().ingest(parse_rows(_read_lines(path), fmt), batch_size=batch_size)
+
+
+def main() -> None:
+    setup_logging()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=Path)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                        help="по умолчанию определяется по расширению файла")
+    parser.add_argument("--batch-size", type=int, default=configuration.cdr_ingestion.batch_size)
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.input.suffix in (".jsonl", ".ndjson") else "csv")
+    report = asyncio.run(import_cdr(args.input, fmt, args.batch_size))
+    app_logger.info("Загрузка CDR завершена: %s", report)
+
+
+if __name__ == "__main__":
+    main()
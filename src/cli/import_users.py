@@ -0,0 +1,226 @@
+"""
+Массовый импорт пользователей из старой системы.
+
+    python -m src.cli.import_users users.csv --batch-size 5000 --hash-workers 8
+
+Вход: CSV с заголовком или JSONL. Поля: email, phone (или phone_number),
+password (открытый, будет захэширован) или password_hash (bcrypt/argon2, переносится как есть),
+необязательные username, is_active, created_at (ISO 8601).
+
+Пароли хэшируются в пуле процессов, строки грузятся через COPY пачками, дубли по email
+пропускаются. После каждой закоммиченной пачки пишется чекпоинт, повторный запуск
+с тем же файлом продолжает с места остановки.
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+from src.config import configuration
+from src.logger import app_logger, setup_logging
+
+PRE_HASHED_PREFIXES = ("$2a$", "$2b$", "$2y$", "$argon2")
+
+# Длины колонок users: строка длиннее уронила бы COPY всей пачки
+COLUMN_LIMITS = {"username": 255, "email": 255, "password_hash": 255, "phone_number": 20}
+
+_hasher = None
+
+
+def _init_hasher(rounds: int) -> None:
+    global _hasher
+    from src.utils.PasswordManager import PasswordHasher
+
+    _hasher = PasswordHasher(rounds=rounds)
+
+
+def _hash_passwords(passwords: list[str]) -> list[str]:
+    return [_hasher.hash_password(password) for password in passwords]
+
+
+@dataclass
+class Checkpoint:
+    input: str
+    rows_done: int = 0
+    inserted: int = 0
+    skipped: int = 0
+
+    @classmethod
+    def load(cls, path: Path, input_file: Path) -> "Checkpoint":
+        if path.exists():
+            data = json.loads(path.read_text())
+            if data["input"] == str(input_file.resolve()):
+                return cls(**data)
+            app_logger.warning("Чекпоинт %s относится к другому файлу, начинаем с начала", path)
+        return cls(input=str(input_file.resolve()))
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(asdict(self)))
+        os.replace(tmp, path)
+
+
+def read_rows(path: Path, fmt: str) -> Iterator[dict]:
+    with open(path, newline="", encoding="utf-8") as file:
+        if fmt == "csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Строка все равно идет в пачку, чтобы ее отбросили и посчитали вместе с остальными
+                        yield line
+
+
+def _parse_bool(value, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "t", "yes")
+
+
+def _checked(column: str, value):
+    if not isinstance(value, str):
+        raise TypeError(f"{column}: ожидалась строка, получено {type(value).__name__}")
+    if len(value) > COLUMN_LIMITS.get(column, len(value)):
+        raise ValueError(f"{column}: длиннее {COLUMN_LIMITS[column]} символов")
+    return value
+
+
+def _parse_created_at(value) -> datetime:
+    if not value:
+        return datetime.now(timezone.utc)
+    created_at = datetime.fromisoformat(value)
+    return created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)
+
+
+async def _prepare_batch(rows: list[dict],
+                         pool: ProcessPoolExecutor,
+                         hash_workers: int) -> tuple[list[tuple], int]:
+    """
+    Превращает строки входа в записи для COPY. Возвращает записи и число отброшенных строк
+    """
+    from src.models.responses.EmailNormaliztion import normalize_email
+
+    prepared = []
+    plaintext_positions = []
+    plaintexts = []
+    rejected = 0
+
+    for row in rows:
+        try:
+            if not isinstance(row, dict):
+                raise TypeError(f"строка не объект: {row!r:.80}")
+            email = _checked("email", normalize_email(_checked("email", row["email"])))
+            password_hash = _checked("password_hash", row.get("password_hash") or "")
+            plaintext = None if password_hash.startswith(PRE_HASHED_PREFIXES) else _checked("password", row["password"])
+            record = [
+                uuid.uuid4(),
+                _checked("username", row.get("username") or email),
+                email,
+                password_hash,
+                _checked("phone_number", str(row.get("phone") or row.get("phone_number") or "").lstrip("+")),
+                _parse_bool(row.get("is_active"), default=True),
+                _parse_created_at(row.get("created_at")),
+            ]
+        except (KeyError, ValueError, TypeError) as exc:
+            rejected += 1
+            app_logger.warning("Строка пропущена: %r", exc)
+            continue
+
+        if plaintext is not None:
+            plaintexts.append(plaintext)
+            plaintext_positions.append(len(prepared))
+        prepared.append(record)
+
+    if plaintexts:
+        loop = asyncio.get_running_loop()
+        chunk = -(-len(plaintexts) // hash_workers)
+        hashed_chunks = await asyncio.gather(*(
+            loop.run_in_executor(pool, _hash_passwords, plaintexts[i:i + chunk])
+            for i in range(0, len(plaintexts), chunk)
+        ))
+        for position, password_hash in zip(plaintext_positions, itertools.chain.from_iterable(hashed_chunks)):
+            prepared[position][3] = password_hash
+
+    return [tuple(record) for record in prepared], rejected
+
+
+async def import_users(input_file: Path,
+                       fmt: str,
+                       batch_size: int,
+                       hash_workers: int,
+                       checkpoint_file: Path) -> Checkpoint:
+    from src.repository import UserImportRepo
+
+    repo = UserImportRepo()
+    checkpoint = Checkpoint.load(checkpoint_file, input_file)
+    if checkpoint.rows_done:
+        app_logger.info("Продолжаем с чекпоинта: %s", checkpoint)
+
+    rows = itertools.islice(read_rows(input_file, fmt), checkpoint.rows_done, None)
+    started = time.perf_counter()
+    rows_this_run = 0
+
+    with ProcessPoolExecutor(max_workers=hash_workers,
+                             initializer=_init_hasher,
+                             initargs=(configuration.password_hash_param.rounds,)) as pool:
+        while batch := list(itertools.islice(rows, batch_size)):
+            records, rejected = await _prepare_batch(batch, pool, hash_workers)
+            inserted = await repo.load_users(records) if records else 0
+
+            checkpoint.rows_done += len(batch)
+            checkpoint.inserted += inserted
+            checkpoint.skipped += len(batch) - inserted
+            checkpoint.save(checkpoint_file)
+
+            rows_this_run += len(batch)
+            elapsed = time.perf_counter() - started
+            app_logger.info(
+                "Обработано %d строк (вставлено %d, пропущено %d, из них невалидных в пачке %d), %.0f строк/с",
+                checkpoint.rows_done, checkpoint.inserted, checkpoint.skipped, rejected,
+                rows_this_run / elapsed
+            )
+
+    return checkpoint
+
+
+def main() -> None:
+    setup_logging()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=Path)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                        help="по умолчанию определяется по расширению файла")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--hash-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--checkpoint", type=Path, default=None,
+                        help="по умолчанию <input>.checkpoint.json")
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.input.suffix in (".jsonl", ".ndjson") else "csv")
+    checkpoint_file = args.checkpoint or args.input.with_name(args.input.name + ".checkpoint.json")
+
+    result = asyncio.run(import_users(
+        input_file=args.input,
+        fmt=fmt,
+        batch_size=args.batch_size,
+        hash_workers=args.hash_workers,
+        checkpoint_file=checkpoint_file
+    ))
+    app_logger.info("Импорт завершен: %s", result)
+
+
+if __name__ == "__main__":
+    main()
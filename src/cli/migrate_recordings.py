@@ -0,0 +1,56 @@
+"""
+Перенос записей разговоров из колонки cdr.record в файловое хранилище.
+
+    RECORDING_STORE=file RECORDING_STORE_DIR=/var/lib/asclavia/recordings \\
+        python -m src.cli.migrate_recordings --batch-size 100
+
+Каждая пачка: файлы пишутся на диск (одинаковые записи - один файл), затем в одной транзакции
+recording_path становится sha256:<hex>, а record очищается. Прерванный перенос можно запустить снова.
+Место в таблице освобождается после VACUUM (или VACUUM FULL, чтобы вернуть его системе).
+"""
+import argparse
+import asyncio
+import time
+
+from src.config import configuration
+from src.logger import app_logger, setup_logging
+
+
+async def migrate(batch_size: int, limit: int | None) -> tuple[int, int]:
+    from src.service import get_recording_service
+
+    service = get_recording_service()
+    started = time.perf_counter()
+    moved_total = 0
+    bytes_total = 0
+
+    while limit is None or moved_total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved_total)
+        moved, moved_bytes = await service.move_records_to_store(size)
+        if not moved:
+            break
+
+        moved_total += moved
+        bytes_total += moved_bytes
+        elapsed = time.perf_counter() - started
+        app_logger.info(
+            "Перенесено %d записей, %.1f МБ, %.1f МБ/с",
+            moved_total, bytes_total / 2 ** 20, bytes_total / 2 ** 20 / elapsed
+        )
+
+    return moved_total, bytes_total
+
+
+def main() -> None:
+    setup_logging()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=configuration.recordings.migration_batch_size)
+    parser.add_argument("--limit", type=int, default=None, help="перенести не больше стольких записей")
+    args = parser.parse_args()
+
+    moved, moved_bytes = asyncio.run(migrate(args.batch_size, args.limit))
+    app_logger.info("Перенос завершен: %d записей, %.1f МБ", moved, moved_bytes / 2 ** 20)
+
+
+if __name__ == "__main__":
+    main()
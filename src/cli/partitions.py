@@ -0,0 +1,111 @@
+"""
+Обслуживание помесячных секций calls, cdr и dialogs. Запускать по расписанию, например раз в сутки:
+
+    python -m src.cli.partitions ensure --months-ahead 3
+    python -m src.cli.partitions ensure --from 2023-01       # догнать секции за прошлые месяцы
+    python -m src.cli.partitions detach                      # по PartitionParams.retention_months
+    python -m src.cli.partitions detach --table cdr --older-than 24 --drop
+    python -m src.cli.partitions list
+
+ensure создает недостающие секции и переносит в них строки из <таблица>_default.
+detach отключает секции старше срока хранения, с --drop еще и удаляет их. На время отключения
+таблица и ее default секция блокируются целиком (ACCESS EXCLUSIVE), но ненадолго: блокировку ждем
+не дольше PartitionParams.detach_lock_timeout_ms, не дождались - секция остается до следующего запуска.
+"""
+import argparse
+import asyncio
+from datetime import date, datetime, timezone
+
+from src.config import configuration
+from src.database.partitions import (LOCK_NOT_AVAILABLE, PARTITIONED_TABLES, add_months, detach_partition,
+                                     ensure_partitions, list_partitions, month_start)
+from src.logger import app_logger, setup_logging
+
+
+def _parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def _current_month() -> date:
+    return month_start(datetime.now(timezone.utc).date())
+
+
+async def ensure(first_month: date, months_ahead: int) -> None:
+    from src.database import get_raw_connection
+
+    async with get_raw_connection() as (conn, _):
+        created = await ensure_partitions(conn, first_month, add_months(_current_month(), months_ahead))
+
+    for name, moved in created:
+        app_logger.info("Создана секция %s, перенесено из default строк: %d", name, moved)
+    app_logger.info("Секций создано: %d", len(created))
+
+
+async def detach(retention: dict[str, int], drop: bool) -> None:
+    from src.database import get_raw_connection
+
+    async with get_raw_connection() as (conn, _):
+        for table, months in retention.items():
+            oldest_kept = add_months(_current_month(), -months)
+            for partition in await list_partitions(conn, table):
+                if partition.month is None or partition.month >= oldest_kept:
+                    continue
+                try:
+                    await detach_partition(
+                        conn, partition, drop=drop, lock_timeout_ms=configuration.partitions.detach_lock_timeout_ms
+                    )
+                except Exception as exc:
+                    if getattr(exc, "sqlstate", None) != LOCK_NOT_AVAILABLE:
+                        raise
+                    app_logger.warning("Секция %s не отключена: таблица занята, повторим при следующем запуске",
+                                       partition.name)
+                    continue
+                app_logger.info("Секция %s %s", partition.name, "удалена" if drop else "отключена")
+
+
+async def show() -> None:
+    from src.database import get_raw_connection
+
+    async with get_raw_connection() as (conn, _):
+        for table in PARTITIONED_TABLES:
+            for partition in await list_partitions(conn, table):
+                rows = await conn.fetchval(
+                    f'SELECT count(*) FROM asclavia_schema."{partition.name}"'
+                )
+                print(f"{table:>8} {partition.name:<24} {rows:>12} строк")
+
+
+def main() -> None:
+    setup_logging()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ensure_parser = commands.add_parser("ensure")
+    ensure_parser.add_argument("--months-ahead", type=int, default=configuration.partitions.months_ahead)
+    ensure_parser.add_argument("--from", dest="first_month", type=_parse_month, default=None,
+                               help="YYYY-MM, по умолчанию текущий месяц")
+
+    detach_parser = commands.add_parser("detach")
+    detach_parser.add_argument("--table", choices=list(PARTITIONED_TABLES), default=None)
+    detach_parser.add_argument("--older-than", type=int, default=None, help="срок хранения в месяцах")
+    detach_parser.add_argument("--drop", action="store_true")
+
+    commands.add_parser("list")
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        asyncio.run(ensure(args.first_month or _current_month(), args.months_ahead))
+    elif args.command == "detach":
+        retention = dict(configuration.partitions.retention_months)
+        if args.older_than is not None:
+            tables = [args.table] if args.table else list(PARTITIONED_TABLES)
+            retention = {table: args.older_than for table in tables}
+        elif args.table:
+            retention = {args.table: retention[args.table]} if args.table in retention else {}
+        asyncio.run(detach(retention, args.drop))
+    else:
+        asyncio.run(show())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Сверка текущих балансов (user_balance) с журналом изменений (balance).
+
+    python -m src.cli.reconcile_balance
+    python -m src.cli.reconcile_balance --repair
+
+Каждое расхождение пишется в лог. С --repair баланс пересчитывается из журнала.
+Код выхода 1, если расхождения были.
+"""
+import argparse
+import asyncio
+import sys
+
+from src.logger import app_logger, setup_logging
+
+
+async def reconcile(repair: bool) -> tuple[int, int]:
+    from src.service.BalanceService import get_balance_service
+
+    return await get_balance_service().reconcile(repair=repair)
+
+
+def main() -> None:
+    setup_logging()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repair", action="store_true", help="пересчитать расходящиеся балансы из журнала")
+    args = parser.parse_args()
+
+    mismatches, repaired = asyncio.run(reconcile(args.repair))
+    app_logger.info("Сверка балансов: расхождений %d, исправлено %d", mismatches, repaired)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,26 @@
 from dataclasses import dataclass, field
-from sqlalchemy.engine import URL
-from dotenv import load_dotenv
+from functools import cache
 from pathlib import Path
+import json
 import os
 
-load_dotenv(dotenv_path=
-            Path().cwd() / ".env"
-            )
+
+@cache
+def load_env() -> None:
+    """
+    Подгружает .env один раз, при первом обращении к параметру из окружения,
+    а не при импорте пакета
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=
+                Path().cwd() / ".env"
+                )
+
+
+def get_env(name: str, default: str | None = None) -> str | None:
+    load_env()
+    return os.environ.get(name, default)
 
 
 @dataclass(frozen=True)
@@ -23,12 +37,83 @@ class ConfirmEmailParams:
     base_url: str = "http://127.0.0.1:8000" # Тут нужно указать путь к бэкэнду
 
 
+@dataclass(frozen=True)
+class SMTPSender:
+    """
+    Один почтовый аккаунт или релей. Лимит отправки - token bucket: rate_per_s писем
+    в секунду в среднем и не больше burst подряд на весь сервис. Каждый из WEB_WORKERS
+    процессов получает свою долю лимита (см. SMTPParams.rate_shares)
+    """
+    name: str
+    host: str
+    port: int
+    user: str
+    password: str
+    rate_per_s: float = 5.0
+    burst: int = 10
+    use_credentials: bool = True
+    validate_certs: bool = True
+
+    @property
+    def ssl_tls(self) -> bool:
+        return self.port == 465
+
+    @property
+    def starttls(self) -> bool:
+        return self.port == 587
+
+
 @dataclass(frozen=True)
 class SMTPParams:
     host = "smtp.timeweb.ru"
     port = 465
     user = "no-reply@asclavia.net"
-    password = os.environ["EmailPassword"]
+    breaker_failure_threshold: int = 5 # Ошибок подряд, после которых аккаунт отключается
+    breaker_reset_timeout_s: float = 30.0 # Через сколько отключенный аккаунт получает пробное письмо
+    breaker_half_open_probes: int = 1
+    retry_attempts: int = 5 # Повторы, когда не отправил ни один аккаунт
+    retry_base_delay_s: float = 0.25 # Пауза перед повтором растет вдвое с каждой попыткой, со случайным разбросом
+    retry_max_delay_s: float = 4.0
+
+    @property
+    def password(self) -> str:
+        load_env()
+        return os.environ["EmailPassword"]
+
+    @property
+    def senders(self) -> list[SMTPSender]:
+        """
+        Аккаунты для отправки из SMTP_SENDERS (JSON список объектов с полями SMTPSender),
+        без нее - единственный аккаунт из host/port/user и EmailPassword
+        """
+        raw = get_env("SMTP_SENDERS")
+        if not raw:
+            return [SMTPSender(name=self.user, host=self.host, port=self.port, user=self.user, password=self.password)]
+
+        senders = [
+            SMTPSender(**{"name": sender["user"]} | sender)
+            for sender in json.loads(raw)
+        ]
+        if not senders:
+            raise ValueError("SMTP_SENDERS пуст: нужен хотя бы один аккаунт")
+        for sender in senders:
+            if sender.rate_per_s <= 0 or sender.burst < 1:
+                raise ValueError(f"Аккаунт {sender.name}: нужны rate_per_s > 0 и burst >= 1")
+        return senders
+
+    @property
+    def rate_shares(self) -> int:
+        """
+        На сколько процессов делится лимит каждого аккаунта. Счетчики токенов у каждого процесса
+        свои, поэтому без деления аккаунт отправлял бы в WEB_WORKERS раз быстрее лимита.
+        Раннер выставляет WEB_WORKERS в фактическое число воркеров, без него процесс один
+        """
+        return int(get_env("WEB_WORKERS", "1")) or os.cpu_count() or 1
+
+
+@dataclass(frozen=True)
+class EmailValidationParams:
+    cache_size: int = 65536 # Сколько нормализованных адресов держим в LRU кэше
 
 
 @dataclass(frozen=True)
@@ -38,6 +123,11 @@ class PasswordHashParam:
     """
     rounds: int = 12
 
+    @property
+    def workers(self) -> int:
+        """Потоков для bcrypt на процесс, раннер выставляет это значение каждому воркеру"""
+        return int(get_env("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
 
 @dataclass(frozen=True)
 class JwtTokenParams:
@@ -62,9 +152,24 @@ class DatabaseConfig:
     driver: str = 'asyncpg'
     database_system: str = 'postgresql'
 
+    @property
+    def pool_size(self) -> int:
+        return int(get_env("DB_POOL_SIZE", "5"))
+
+    @property
+    def max_overflow(self) -> int:
+        return int(get_env("DB_MAX_OVERFLOW", "10"))
+
+    @property
+    def repository_backend(self) -> str:
+        """orm - запросы через SQLAlchemy, asyncpg - именованные подготовленные выражения"""
+        return get_env("REPOSITORY_BACKEND", "orm")
+
     def build_connection_str(self) -> str:
         """This function build a connection string."""
 
+        from sqlalchemy.engine import URL
+
         return URL.create(
             drivername=f'{self.database_system}+{self.driver}',
             username=self.user,
@@ -75,6 +180,229 @@ class DatabaseConfig:
         ).render_as_string(hide_password=False)
 
 
+@dataclass(frozen=True)
+class WarmUpParams:
+    """
+    Прогрев при старте приложения, пока он не закончится /readyz отдает 503
+    """
+    db_connections: int = 5 # Сколько соединений пула открыть заранее
+    db_retry_delay_s: float = 2.0 # Пауза между попытками достучаться до базы
+    smtp_timeout_s: float = 3.0
+    require_smtp: bool = False # Если True, то без SMTP приложение не считается готовым
+
+
+@dataclass(frozen=True)
+class ServerParams:
+    """
+    Параметры боевого запуска через src.runner
+    """
+    loop: str = "uvloop"
+    http: str = "httptools"
+    graceful_shutdown_s: int = 30 # Сколько ждем завершения запросов в работе после SIGTERM
+    db_reserved_connections: int = 10 # Соединения Postgres, которые не отдаем воркерам (миграции, psql)
+
+    @property
+    def host(self) -> str:
+        return get_env("HOST", "0.0.0.0")
+
+    @property
+    def port(self) -> int:
+        return int(get_env("PORT", "8000"))
+
+    @property
+    def workers(self) -> int:
+        """0 - по числу ядер"""
+        return int(get_env("WEB_WORKERS", "0")) or os.cpu_count() or 1
+
+    @property
+    def db_max_connections(self) -> int:
+        """Должно совпадать с max_connections в Postgres"""
+        return int(get_env("DB_MAX_CONNECTIONS", "100"))
+
+
+@dataclass(frozen=True)
+class MailQueueParams:
+    """
+    Фоновая очередь писем, через нее уходят письма пакетной регистрации
+    """
+    workers: int = 4 # Сколько писем отправляется параллельно
+    maxsize: int = 10000 # При переполнении постановка в очередь ждет
+    drain_timeout_s: float = 20.0 # Сколько при остановке ждем отправки оставшихся писем
+
+
+@dataclass(frozen=True)
+class MailDedupeParams:
+    """
+    Окна, в которые повторное письмо того же назначения тому же получателю не отправляется.
+    Окно должно быть короче жизни ссылки в письме, иначе повтор не получит рабочую ссылку
+    """
+    windows_s: dict[str, float] = field(default_factory=lambda: {
+        "confirm": 60.0,
+        "reset": 60.0,
+    })
+    max_recipients: int = 100000 # Сколько получателей помним, самые старые вытесняются
+
+
+@dataclass(frozen=True)
+class MailTemplateParams:
+    """
+    HTML шаблоны писем, для каждого рядом лежит текстовая альтернатива <name>.txt
+    """
+    templates_dir: Path = Path(__file__).parent / "templates" / "mail"
+    subjects: dict[str, str] = field(default_factory=lambda: {
+        "confirm_email": "Подтверждение почты",
+        "reset_password": "Сброс пароля",
+    })
+
+
+@dataclass(frozen=True)
+class BatchRegistrationParams:
+    users_limit: int = 1000 # Потолок пользователей в одном запросе, если бюджет хэширования позволяет больше
+    max_hash_wait_s: float = 30.0 # Пакет, который вместе с очередью хэшируется дольше, отклоняется
+    hash_cost_s: float = 0.25 # Начальная оценка времени на один bcrypt хэш, дальше уточняется по факту
+
+    @property
+    def hash_processes(self) -> int:
+        """Процессов на воркер для хэширования пакетов, отдельно от потоков логина. Выставляет раннер"""
+        return int(get_env("BATCH_HASH_PROCESSES", "2"))
+
+    @property
+    def max_users(self) -> int:
+        """Максимум пользователей в запросе: столько, сколько успеет захэшироваться за max_hash_wait_s"""
+        budget = int(self.max_hash_wait_s * self.hash_processes / self.hash_cost_s)
+        return max(1, min(self.users_limit, budget))
+
+
+@dataclass(frozen=True)
+class IdempotencyParams:
+    """
+    Повтор запросов с заголовком Idempotency-Key: ответ на первый запрос запоминается
+    и отдается повторам без повторной работы
+    """
+    ttl_s: int = 60 * 60 # Сколько помним ответ на ключ
+    max_keys: int = 100000 # Ключей в кэше процесса, самые старые вытесняются
+    max_key_length: int = 255
+    # Сколько повтор ждет первый запрос с тем же ключом, потом 409. Незаконченный ключ старше этого
+    # считается брошенным (воркер умер) и достается следующему запросу
+    wait_timeout_s: float = 30.0
+    poll_interval_s: float = 0.2 # Как часто повтор проверяет таблицу, пока первый запрос в другом воркере
+
+    @property
+    def store(self) -> str:
+        """memory - только кэш процесса, database - еще и таблица idempotency_keys, общая для всех воркеров"""
+        return get_env("IDEMPOTENCY_STORE", "memory")
+
+
+@dataclass(frozen=True)
+class AdminParams:
+    """
+    Доступ к служебным ручкам /v1/admin, без ADMIN_TOKEN в окружении они закрыты
+    """
+
+    @property
+    def token(self) -> str | None:
+        return get_env("ADMIN_TOKEN")
+
+
+@dataclass(frozen=True)
+class AccountDeletionParams:
+    """
+    Удаление аккаунта идет короткими транзакциями по batch_size строк, чтобы не держать
+    блокировки на дочерних таблицах и не раздувать WAL одной огромной транзакцией
+    """
+    batch_size: int = 1000
+    pause_s: float = 0.05 # Пауза между пачками, дает место остальной нагрузке и репликам
+    lock_timeout_ms: int = 2000 # Пачка не ждет чужую блокировку дольше, а откладывается
+    lock_retries: int = 5
+
+
+@dataclass(frozen=True)
+class RecordingParams:
+    """
+    Записи разговоров (cdr.record). С RECORDING_STORE=file новые и перенесенные записи лежат
+    на диске в RECORDING_STORE_DIR, а в cdr.recording_path остается sha256:<hex>
+    """
+    media_type: str = "audio/wav"
+    chunk_size: int = 256 * 1024 # Размер куска при отдаче записи
+    migration_batch_size: int = 100 # Сколько записей переносит из таблицы на диск одна транзакция
+
+    @property
+    def store(self) -> str:
+        """database - запись в колонке cdr.record, file - в файловом хранилище"""
+        return get_env("RECORDING_STORE", "database")
+
+    @property
+    def root(self) -> Path:
+        return Path(get_env("RECORDING_STORE_DIR", "/var/lib/asclavia/recordings"))
+
+
+@dataclass(frozen=True)
+class CDRIngestionParams:
+    """
+    Загрузка CDR с АТС пачками через COPY
+    """
+    batch_size: int = 5000
+    max_batch_size: int = 50000 # Потолок batch_size в запросе к /v1/admin/cdr/import
+    caller_cache_size: int = 100000 # Сколько caller_id -> user_id помним, самые старые вытесняются
+    caller_cache_ttl_s: float = 300.0 # Через сколько перепроверяем владельца номера в базе
+
+
+@dataclass(frozen=True)
+class HistoryParams:
+    """
+    Списки диалогов, звонков и задач пользователя (/v1/history)
+    """
+    default_limit: int = 50
+    max_limit: int = 200
+
+
+@dataclass(frozen=True)
+class BalanceParams:
+    """
+    Текущие балансы пользователей (src/service/BalanceService.py)
+    """
+    cache_size: int = 100000 # Сколько балансов помнит процесс, самые старые вытесняются
+    cache_ttl_s: float = 5.0 # Насколько баланс может отстать от изменений в других процессах
+
+
+@dataclass(frozen=True)
+class BillingParams:
+    """
+    Расчет счетов за период (src/service/BillingService.py)
+    """
+    chunk_rows: int = 100000 # Сколько строк звонков и диалогов читается из курсора за раз
+    rate: float = 1.0 # Коэффициент тарифа: пишется в bills.rates, total = amount * rate
+
+
+@dataclass(frozen=True)
+class PartitionParams:
+    """
+    Помесячные секции calls, cdr и dialogs (src/database/partitions.py)
+    """
+    months_ahead: int = 3 # На сколько месяцев вперед секции создаются заранее, при старте и заданием
+    # Через сколько месяцев секция отключается от таблицы, по имени таблицы. Таблицы нет - храним все
+    retention_months: dict[str, int] = field(default_factory=dict)
+    # Сколько DETACH ждет блокировку таблицы, прежде чем сдаться до следующего запуска
+    detach_lock_timeout_ms: int = 2000
+
+
+@dataclass(frozen=True)
+class LogParams:
+    """
+    Логи пишутся в очередь, а в stdout их выводит отдельный поток, поэтому event loop не ждет записи
+    """
+    level: str = "INFO"
+    format: str = "json" # json - одна JSON строка на запись, text - для чтения глазами
+    queue_size: int = 10000 # При переполнении запись отбрасывается и считается
+    # Доля записей ниже WARNING, которая попадает в лог, по имени логгера, например {"mail_logger": 0.1}
+    sampling: dict[str, float] = field(default_factory=dict)
+    # Не больше стольких записей в секунду с одним шаблоном сообщения, по имени логгера
+    rate_limit_per_s: dict[str, int] = field(default_factory=lambda: {
+        "mail_logger": 50,
+        "app_logger": 50,
+    })
+
+
 @dataclass(frozen=True)
 class AppConfig:
     """App configuration."""
@@ -94,6 +422,23 @@ class Configuration:
     smtp_params: SMTPParams = field(default_factory=SMTPParams)
     confirm_email_params: ConfirmEmailParams = field(default_factory=ConfirmEmailParams)
     confirm_reset_params: PasswordResetParam = field(default_factory=PasswordResetParam)
+    email_validation: EmailValidationParams = field(default_factory=EmailValidationParams)
+    warm_up: WarmUpParams = field(default_factory=WarmUpParams)
+    server: ServerParams = field(default_factory=ServerParams)
+    admin: AdminParams = field(default_factory=AdminParams)
+    mail_queue: MailQueueParams = field(default_factory=MailQueueParams)
+    batch_registration: BatchRegistrationParams = field(default_factory=BatchRegistrationParams)
+    idempotency: IdempotencyParams = field(default_factory=IdempotencyParams)
+    mail_dedupe: MailDedupeParams = field(default_factory=MailDedupeParams)
+    mail_templates: MailTemplateParams = field(default_factory=MailTemplateParams)
+    logging: LogParams = field(default_factory=LogParams)
+    account_deletion: AccountDeletionParams = field(default_factory=AccountDeletionParams)
+    recordings: RecordingParams = field(default_factory=RecordingParams)
+    cdr_ingestion: CDRIngestionParams = field(default_factory=CDRIngestionParams)
+    partitions: PartitionParams = field(default_factory=PartitionParams)
+    billing: BillingParams = field(default_factory=BillingParams)
+    balance: BalanceParams = field(default_factory=BalanceParams)
+    history: HistoryParams = field(default_factory=HistoryParams)
 
 
 configuration = Configuration()
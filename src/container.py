@@ -0,0 +1,267 @@
+"""
+Контейнер зависимостей: репозитории, сервисы и клиенты собираются один раз на процесс
+и дальше переиспользуются всеми запросами.
+
+Каждый провайдер объявляет, от каких других провайдеров зависит. Внутри container.scope(...)
+можно подменить любой провайдер (единица работы с одной сессией на запрос, фейки в тестах):
+все, что от подмененного зависит, в этом контексте собирается заново, остальное берется готовым.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from src.config import configuration
+
+
+@dataclass(frozen=True, slots=True)
+class Provider:
+    factory: Callable[..., Any]
+    deps: tuple[str, ...] = ()
+
+
+@dataclass(slots=True)
+class _Scope:
+    overrides: dict[str, Any]
+    instances: dict[str, Any] = field(default_factory=dict)
+
+
+_current_scope: ContextVar[_Scope | None] = ContextVar("container_scope", default=None)
+
+
+class Container:
+    def __init__(self) -> None:
+        self._providers: dict[str, Provider] = {}
+        self._instances: dict[str, Any] = {}
+
+    def register(self, name: str, factory: Callable[..., Any], deps: tuple[str, ...] = ()) -> None:
+        """
+        :factory получает зависимости именованными аргументами, имена аргументов совпадают с deps
+        """
+        self._providers[name] = Provider(factory=factory, deps=deps)
+        self._instances.pop(name, None)
+
+    def resolve(self, name: str) -> Any:
+        scope = _current_scope.get()
+        if scope is not None and self._affected(name, scope.overrides):
+            return self._resolve_scoped(name, scope)
+
+        if name not in self._instances:
+            provider = self._providers[name]
+            self._instances[name] = provider.factory(**{dep: self.resolve(dep) for dep in provider.deps})
+        return self._instances[name]
+
+    def _affected(self, name: str, overrides: dict[str, Any]) -> bool:
+        return name in overrides or any(self._affected(dep, overrides) for dep in self._providers[name].deps)
+
+    def _resolve_scoped(self, name: str, scope: _Scope) -> Any:
+        if name in scope.overrides:
+            return scope.overrides[name]
+
+        if name not in scope.instances:
+            provider = self._providers[name]
+            scope.instances[name] = provider.factory(**{dep: self.resolve(dep) for dep in provider.deps})
+        return scope.instances[name]
+
+    def build_all(self) -> dict[str, Exception]:
+        """
+        Собирает все провайдеры сразу, при старте приложения, а не на первом запросе.
+        Ошибка одного провайдера не мешает остальным, возвращает ошибки по именам:
+        такой провайдер соберется при первом обращении
+        """
+        failed = {}
+        for name in self._providers:
+            try:
+                self.resolve(name)
+            except Exception as exc:
+                failed[name] = exc
+        return failed
+
+    def reset(self) -> None:
+        self._instances.clear()
+
+    @contextmanager
+    def scope(self, **overrides: Any) -> Iterator[None]:
+        """
+        Подмены на время контекста (запроса, теста). Вложенные scope дополняют внешние
+        """
+        outer = _current_scope.get()
+        merged = (outer.overrides if outer is not None else {}) | overrides
+
+        token = _current_scope.set(_Scope(overrides=merged))
+        try:
+            yield
+        finally:
+            _current_scope.reset(token)
+
+
+def _repository_backend() -> str:
+    return configuration.db.repository_backend
+
+
+def _register_defaults(container: Container) -> None:
+    # Импорты внутри фабрик: контейнер импортируется сервисами, а тяжелые модули
+    # (asyncpg диалект, fastapi_mail) должны грузиться при сборке, а не при импорте
+    def session_getter():
+        from src.database import get_session
+        return get_session
+
+    def connection_getter():
+        from src.database import get_raw_connection
+        return get_raw_connection
+
+    def login_repo(session_getter, connection_getter):
+        from src.repository import LoginRepo, FastLoginRepo
+        if _repository_backend() == "asyncpg":
+            return FastLoginRepo(connection_getter)
+        return LoginRepo(session_getter)
+
+    def registration_repo(session_getter, connection_getter):
+        from src.repository import RegistrationRepo, FastRegistrationRepo
+        if _repository_backend() == "asyncpg":
+            return FastRegistrationRepo(connection_getter)
+        return RegistrationRepo(session_getter)
+
+    def recovery_repo(session_getter, connection_getter):
+        from src.repository import RecoveryRepo, FastRecoveryRepo
+        if _repository_backend() == "asyncpg":
+            return FastRecoveryRepo(connection_getter)
+        return RecoveryRepo(session_getter)
+
+    def export_repo(session_getter):
+        from src.repository import UserExportRepo
+        return UserExportRepo(session_getter)
+
+    def account_deletion_repo(connection_getter):
+        from src.repository import AccountDeletionRepo
+        return AccountDeletionRepo(connection_getter, lock_timeout_ms=configuration.account_deletion.lock_timeout_ms)
+
+    def recording_repo(session_getter):
+        from src.repository import RecordingRepo
+        return RecordingRepo(session_getter)
+
+    def recording_store():
+        from src.utils.RecordingStore import ContentAddressedStore
+        params = configuration.recordings
+        if params.store == "file":
+            return ContentAddressedStore(params.root, chunk_size=params.chunk_size)
+        return None
+
+    def cdr_import_repo(connection_getter):
+        from src.repository import CDRImportRepo
+        return CDRImportRepo(connection_getter)
+
+    def balance_repo(connection_getter):
+        from src.repository import BalanceRepo
+        return BalanceRepo(connection_getter)
+
+    def task_repo(session_getter):
+        from src.repository import TaskRepo
+        return TaskRepo(session_getter)
+
+    def template_repo(session_getter):
+        from src.repository import TemplateRepo
+        return TemplateRepo(session_getter)
+
+    def history_repo(connection_getter):
+        from src.repository import HistoryRepo
+        return HistoryRepo(connection_getter)
+
+    def billing_repo(connection_getter):
+        from src.repository import BillingRepo
+        return BillingRepo(connection_getter)
+
+    def idempotency_repo(session_getter):
+        from src.repository import IdempotencyRepo
+        if configuration.idempotency.store == "database":
+            return IdempotencyRepo(session_getter)
+        return None
+
+    def sender_pool():
+        from src.service.MailSenders import get_sender_pool
+        return get_sender_pool()
+
+    def login_service(login_repo):
+        from src.service.LoginService import LoginService
+        return LoginService(repository=login_repo)
+
+    # Сервисы с почтой берут sender_pool из контейнера при каждой отправке, а не при сборке:
+    # без настроенной почты остальная их работа не ломается, а подмена в scope доходит до отправки
+    def registration_service(registration_repo):
+        from src.service.RegistrationService import RegistrationService
+        return RegistrationService(repo=registration_repo)
+
+    def recovery_service(recovery_repo):
+        from src.service.RecoveryService import RecoveryService
+        return RecoveryService(repo=recovery_repo)
+
+    def mail_service():
+        from src.service.MailService import MailService
+        return MailService()
+
+    def export_service(export_repo):
+        from src.service.ExportService import ExportService
+        return ExportService(repo=export_repo)
+
+    def account_deletion_service(account_deletion_repo):
+        from src.service.AccountDeletionService import AccountDeletionService
+        return AccountDeletionService(repo=account_deletion_repo)
+
+    def recording_service(recording_repo, recording_store):
+        from src.service.RecordingService import RecordingService
+        return RecordingService(repo=recording_repo, store=recording_store)
+
+    def cdr_ingestion_service(cdr_import_repo):
+        from src.service.CDRIngestionService import CDRIngestionService
+        return CDRIngestionService(repo=cdr_import_repo)
+
+    def balance_service(balance_repo):
+        from src.service.BalanceService import BalanceService
+        return BalanceService(repo=balance_repo)
+
+    def history_service(history_repo):
+        from src.service.HistoryService import HistoryService
+        return HistoryService(repo=history_repo)
+
+    def billing_service(billing_repo):
+        from src.service.BillingService import BillingService
+        return BillingService(repo=billing_repo)
+
+    def idempotency_service(idempotency_repo):
+        from src.service.IdempotencyService import IdempotencyService
+        from src.utils import IdempotencyStore
+        return IdempotencyService(cache=IdempotencyStore, repo=idempotency_repo)
+
+    container.register("session_getter", session_getter)
+    container.register("connection_getter", connection_getter)
+    container.register("login_repo", login_repo, deps=("session_getter", "connection_getter"))
+    container.register("registration_repo", registration_repo, deps=("session_getter", "connection_getter"))
+    container.register("recovery_repo", recovery_repo, deps=("session_getter", "connection_getter"))
+    container.register("export_repo", export_repo, deps=("session_getter",))
+    container.register("account_deletion_repo", account_deletion_repo, deps=("connection_getter",))
+    container.register("recording_repo", recording_repo, deps=("session_getter",))
+    container.register("recording_store", recording_store)
+    container.register("cdr_import_repo", cdr_import_repo, deps=("connection_getter",))
+    container.register("balance_repo", balance_repo, deps=("connection_getter",))
+    container.register("task_repo", task_repo, deps=("session_getter",))
+    container.register("template_repo", template_repo, deps=("session_getter",))
+    container.register("history_repo", history_repo, deps=("connection_getter",))
+    container.register("billing_repo", billing_repo, deps=("connection_getter",))
+    container.register("idempotency_repo", idempotency_repo, deps=("session_getter",))
+    container.register("sender_pool", sender_pool)
+    container.register("login_service", login_service, deps=("login_repo",))
+    container.register("registration_service", registration_service, deps=("registration_repo",))
+    container.register("recovery_service", recovery_service, deps=("recovery_repo",))
+    container.register("mail_service", mail_service)
+    container.register("export_service", export_service, deps=("export_repo",))
+    container.register("account_deletion_service", account_deletion_service, deps=("account_deletion_repo",))
+    container.register("recording_service", recording_service, deps=("recording_repo", "recording_store"))
+    container.register("cdr_ingestion_service", cdr_ingestion_service, deps=("cdr_import_repo",))
+    container.register("balance_service", balance_service, deps=("balance_repo",))
+    container.register("history_service", history_service, deps=("history_repo",))
+    container.register("billing_service", billing_service, deps=("billing_repo",))
+    container.register("idempotency_service", idempotency_service, deps=("idempotency_repo",))
+
+
+container = Container()
+_register_defaults(container)
@@ -1,2 +1,2 @@
-from .connection import get_session
-from .schemas import *
\ No newline at end of file
+from .connection import get_session, get_raw_connection, get_engine, ensure_tables, warm_up_pool
+from .schemas import *
@@ -0,0 +1,26 @@
+from typing import Any, Iterable
+
+
+async def copy_into_staging(conn: Any,
+                            source_table: str,
+                            staging_table: str,
+                            columns: list[str],
+                            records: Iterable[tuple]) -> None:
+    """
+    Грузит записи через COPY во временную таблицу с той же структурой, что и source_table.
+    Вызывать внутри транзакции: строки временной таблицы удаляются при коммите,
+    а из нее уже делается INSERT ... SELECT с нужной обработкой конфликтов.
+    """
+    schema, table = source_table.split(".")
+    await conn.execute(
+        f'CREATE TEMP TABLE IF NOT EXISTS "{staging_table}" '
+        f'(LIKE "{schema}"."{table}" INCLUDING DEFAULTS) ON COMMIT DELETE ROWS'
+    )
+    await conn.copy_records_to_table(staging_table, records=records, columns=columns)
+
+
+def affected_rows(status: str) -> int:
+    """
+    Число строк из статуса команды asyncpg, например 'INSERT 0 42' -> 42
+    """
+    return int(status.rsplit(" ", 1)[-1])
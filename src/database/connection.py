@@ -1,32 +1,94 @@
-from sqlalchemy.ext.asyncio import create_async_engine as _create_async_engine
+import asyncio
+from datetime import datetime, timezone
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from src.config import configuration
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager, AsyncExitStack
+from functools import cache
+from typing import Any, AsyncGenerator
 from .schemas import Base
+from .partitions import PARTITIONS_LOCK_KEY, ensure_partitions, month_start, add_months
 
 
-async_engine: AsyncEngine = _create_async_engine(
-    url=configuration.db.build_connection_str(),
-    pool_pre_ping=True
-)
-AsyncSessionLocal = async_sessionmaker(
-    bind=async_engine,
-    expire_on_commit=False,
-    class_=AsyncSession
-)
+@cache
+def get_engine() -> AsyncEngine:
+    """
+    Движок создается при первом обращении: импорт диалекта asyncpg и сборка пула
+    не должны происходить на этапе импорта приложения
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    return create_async_engine(
+        url=configuration.db.build_connection_str(),
+        pool_pre_ping=True,
+        pool_size=configuration.db.pool_size,
+        max_overflow=configuration.db.max_overflow
+    )
+
+
+@cache
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=get_engine(),
+        expire_on_commit=False,
+        class_=AsyncSession
+    )
+
+
+_tables_ready = False
 
 
 async def create_tables():
-    async with async_engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 
+async def ensure_tables() -> None:
+    """
+    create_all ходит в каталог базы за каждой таблицей, поэтому делаем это один раз на процесс
+    """
+    global _tables_ready
+
+    if not _tables_ready:
+        await create_tables()
+        await ensure_current_partitions()
+        _tables_ready = True
+
+
+async def ensure_current_partitions() -> list[tuple[str, int]]:
+    """
+    Секции calls, cdr и dialogs на текущий месяц и months_ahead вперед.
+    Воркеры стартуют одновременно, секции создает тот, кто первым взял advisory lock,
+    остальные пропускают шаг: задание src.cli.partitions все равно догонит пропущенное
+    """
+    current = month_start(datetime.now(timezone.utc).date())
+
+    async with get_raw_connection() as (conn, _):
+        if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", PARTITIONS_LOCK_KEY):
+            return []
+        try:
+            return await ensure_partitions(conn, current, add_months(current, configuration.partitions.months_ahead))
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", PARTITIONS_LOCK_KEY)
+
+
+async def warm_up_pool(connections: int) -> None:
+    """
+    Открывает сразу несколько соединений и возвращает их в пул,
+    чтобы первые запросы после старта не платили за установку соединения
+    """
+    async with AsyncExitStack() as stack:
+        opened = await asyncio.gather(*(
+            stack.enter_async_context(get_engine().connect()) for _ in range(connections)
+        ))
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in opened))
+
+
 @asynccontextmanager
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    await create_tables()
+    await ensure_tables()
 
-    async with AsyncSessionLocal() as session:
+    async with get_sessionmaker()() as session:
         try:
             yield session
             await session.commit()
@@ -39,3 +101,16 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         finally:
             # В любом случае закрываю соединение
             await session.close()
+
+
+@asynccontextmanager
+async def get_raw_connection() -> AsyncGenerator[tuple[Any, dict], None]:
+    """
+    Отдает asyncpg соединение из общего пула движка вместе со словарем info,
+    который живет столько же, сколько само соединение (туда удобно класть
+    подготовленные выражения).
+    Транзакцию через SQLAlchemy не открываем, поэтому каждый запрос выполняется в autocommit.
+    """
+    async with get_engine().connect() as conn:
+        pool_conn = await conn.get_raw_connection()
+        yield pool_conn.driver_connection, pool_conn.info
@@ -0,0 +1,108 @@
+"""
+Профили загрузки связей Task и Template. Связи объявлены с lazy="raise_on_sql", поэтому запрос
+сам говорит, что ему нужно: repo.list_tasks(user_id, profile="list").
+
+Связи "многие к одному" грузятся joinedload: LEFT JOIN в том же запросе, без лишних запросов.
+Коллекции (задачи и шаблоны пользователя) - selectinload: один запрос с IN на всю страницу.
+
+Опции собираются при первом обращении, а не при импорте: их создание настраивает мапперы SQLAlchemy,
+а это заметная доля времени импорта приложения.
+"""
+from contextlib import contextmanager
+from functools import cache
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import joinedload, selectinload, raiseload
+
+from .schemas import Task, Template, User
+
+
+def _related(model) -> tuple:
+    return (
+        joinedload(model.chat),
+        joinedload(model.telephone_income),
+        joinedload(model.telephone_outcome),
+        joinedload(model.crm),
+    )
+
+
+@cache
+def _loading_profiles() -> dict[type, dict[str, tuple]]:
+    return {
+        Task: {
+            # Только колонки задачи, обращение к любой связи - ошибка
+            "bare": (raiseload("*"),),
+            # Список задач пользователя: канал задачи (чат, линия, CRM), пользователь и так известен
+            "list": _related(Task),
+            "full": (*_related(Task), joinedload(Task.user, innerjoin=True)),
+        },
+        Template: {
+            "bare": (raiseload("*"),),
+            "list": _related(Template),
+            "full": (*_related(Template), joinedload(Template.user, innerjoin=True)),
+        },
+        User: {
+            "with_tasks": (selectinload(User.tasks).options(*_related(Task)),),
+            "with_templates": (selectinload(User.templates).options(*_related(Template)),),
+        },
+    }
+
+
+def loading_profile(model: type, name: str) -> tuple:
+    """
+    Опции для select(model).options(*loading_profile(model, name))
+    """
+    try:
+        return _loading_profiles()[model][name]
+    except KeyError:
+        raise ValueError(f"Нет профиля загрузки {name!r} для {model.__name__}") from None
+
+
+@dataclass
+class QueryCounter:
+    statements: list[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(engine: AsyncEngine | None = None) -> Iterator[QueryCounter]:
+    """
+    Считает запросы, ушедшие в базу через engine внутри контекста.
+    Считаются все запросы движка, поэтому параллельные задачи в том же процессе тоже попадут в счет
+    """
+    if engine is None:
+        from .connection import get_engine
+        engine = get_engine()
+
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine: AsyncEngine | None = None) -> Iterator[QueryCounter]:
+    """
+    Для тестов списков: падает с AssertionError, если внутри контекста ушло больше limit запросов.
+
+        with assert_max_queries(2):
+            await repo.list_tasks(user_id, profile="list")
+    """
+    with count_queries(engine) as counter:
+        yield counter
+
+    if counter.count > limit:
+        statements = "\n".join(f"  {statement}" for statement in counter.statements)
+        raise AssertionError(f"Ожидалось не больше {limit} запросов, выполнено {counter.count}:\n{statements}")
@@ -0,0 +1,177 @@
+"""
+Помесячные секции таблиц-временных рядов: calls по call_time, cdr по start_time, dialogs по created_at.
+
+Секция месяца называется <таблица>_yYYYYmMM и хранит [1 число месяца, 1 число следующего) по UTC.
+Строки вне созданных секций попадают в <таблица>_default, чтобы вставка никогда не падала.
+Создание секции сначала переносит ее строки из default, поэтому секции можно догонять и задним числом.
+
+Создание секций из разных процессов (воркеры при старте, задание по расписанию) идет по очереди
+под advisory lock PARTITIONS_LOCK_KEY.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+SCHEMA = "asclavia_schema"
+
+# таблица -> колонка, по которой режется на секции
+PARTITIONED_TABLES: dict[str, str] = {
+    "calls": "call_time",
+    "cdr": "start_time",
+    "dialogs": "created_at",
+}
+
+_MONTH_SUFFIX = re.compile(r"_y(\d{4})m(\d{2})$")
+
+# SQLSTATE duplicate_table и unique_violation: второй одновременный CREATE TABLE с тем же именем
+# падает на pg_type_typname_nsp_index с 23505, а не с 42P07
+DUPLICATE_TABLE = "42P07"
+UNIQUE_VIOLATION = "23505"
+# SQLSTATE lock_not_available, сработал lock_timeout
+LOCK_NOT_AVAILABLE = "55P03"
+
+# Ключ advisory lock, под которым создаются секции
+PARTITIONS_LOCK_KEY = 0x70617274
+
+
+@dataclass(frozen=True, slots=True)
+class Partition:
+    table: str
+    name: str
+    month: date | None # None у default секции
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def _bounds(month: date) -> tuple[str, str]:
+    return f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"
+
+
+async def list_partitions(conn: Any, table: str) -> list[Partition]:
+    rows = await conn.fetch(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "JOIN pg_namespace ns ON ns.oid = parent.relnamespace "
+        "WHERE ns.nspname = $1 AND parent.relname = $2 ORDER BY child.relname",
+        SCHEMA, table
+    )
+    partitions = []
+    for row in rows:
+        match = _MONTH_SUFFIX.search(row["relname"])
+        month = date(int(match.group(1)), int(match.group(2)), 1) if match else None
+        partitions.append(Partition(table=table, name=row["relname"], month=month))
+    return partitions
+
+
+async def _lock_partitions(conn: Any) -> None:
+    # Держится до конца транзакции, другие процессы ждут здесь же
+    await conn.execute("SELECT pg_advisory_xact_lock($1)", PARTITIONS_LOCK_KEY)
+
+
+async def _exists(conn: Any, name: str) -> bool:
+    return await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", f'{SCHEMA}."{name}"')
+
+
+async def create_default_partition(conn: Any, table: str) -> None:
+    async with conn.transaction():
+        await _lock_partitions(conn)
+        await conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {SCHEMA}."{table}_default" PARTITION OF {SCHEMA}."{table}" DEFAULT'
+        )
+
+
+async def create_month_partition(conn: Any, table: str, month: date) -> int | None:
+    """
+    Создает секцию месяца, переносит в нее строки этого месяца из default и подключает через ATTACH.
+    Если пока шел перенос, в default успели вставить еще строки этого месяца, ATTACH упадет
+    и все откатится, тогда достаточно повторить. Возвращает число перенесенных строк
+    или None, если секцию уже создал другой процесс
+    """
+    column = PARTITIONED_TABLES[table]
+    name = partition_name(table, month)
+    start, end = _bounds(month)
+
+    async with conn.transaction():
+        await _lock_partitions(conn)
+        if await _exists(conn, name):
+            return None
+
+        await conn.execute(
+            f'CREATE TABLE {SCHEMA}."{name}" (LIKE {SCHEMA}."{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        status = await conn.execute(
+            f'WITH moved AS (DELETE FROM {SCHEMA}."{table}_default" '
+            f"WHERE {column} >= '{start}' AND {column} < '{end}' RETURNING *) "
+            f'INSERT INTO {SCHEMA}."{name}" SELECT * FROM moved'
+        )
+        # Проверка диапазона при ATTACH берет это ограничение и не сканирует секцию
+        await conn.execute(
+            f'ALTER TABLE {SCHEMA}."{name}" ADD CONSTRAINT "{name}_range" '
+            f"CHECK ({column} >= '{start}' AND {column} < '{end}')"
+        )
+        await conn.execute(
+            f'ALTER TABLE {SCHEMA}."{table}" ATTACH PARTITION {SCHEMA}."{name}" '
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+        await conn.execute(f'ALTER TABLE {SCHEMA}."{name}" DROP CONSTRAINT "{name}_range"')
+
+    return int(status.rsplit(" ", 1)[-1])
+
+
+async def ensure_partitions(conn: Any, first_month: date, last_month: date) -> list[tuple[str, int]]:
+    """
+    Создает default и все недостающие секции [first_month, last_month] во всех таблицах.
+    Возвращает созданные секции с числом перенесенных в них строк
+    """
+    created = []
+    for table in PARTITIONED_TABLES:
+        await create_default_partition(conn, table)
+        existing = {partition.month for partition in await list_partitions(conn, table)}
+
+        month = month_start(first_month)
+        while month <= last_month:
+            if month not in existing:
+                try:
+                    moved = await create_month_partition(conn, table, month)
+                except Exception as exc:
+                    # Секцию создал процесс, который не берет advisory lock, например старая версия
+                    if getattr(exc, "sqlstate", None) not in (DUPLICATE_TABLE, UNIQUE_VIOLATION):
+                        raise
+                    moved = None
+                if moved is not None:
+                    created.append((partition_name(table, month), moved))
+            month = add_months(month, 1)
+    return created
+
+
+async def detach_partition(conn: Any, partition: Partition, drop: bool = False, lock_timeout_ms: int = 2000) -> None:
+    """
+    Отключает секцию от таблицы, отключенная секция остается обычной таблицей, пока ее не удалят.
+
+    DETACH ... CONCURRENTLY здесь не подходит: Postgres не разрешает его, пока у таблицы есть
+    default секция, а она есть всегда. Обычный DETACH берет ACCESS EXCLUSIVE на таблицу, отключаемую
+    секцию и default секцию, то есть на это время встают и чтение, и запись всей таблицы.
+    Сама операция быстрая (только каталог), долгой может быть лишь очередь за блокировкой,
+    поэтому ждем ее не дольше lock_timeout_ms. Не дождались - asyncpg поднимет LockNotAvailableError
+    (SQLSTATE 55P03), транзакция откатится, и секцию можно отключить при следующем запуске
+    """
+    async with conn.transaction():
+        await conn.execute(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}")
+        await conn.execute(
+            f'ALTER TABLE {SCHEMA}."{partition.table}" DETACH PARTITION {SCHEMA}."{partition.name}"'
+        )
+        if drop:
+            await conn.execute(f'DROP TABLE {SCHEMA}."{partition.name}"')
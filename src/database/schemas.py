@@ -1,12 +1,13 @@
 import uuid
 import json
 from sqlalchemy import (Column, DateTime, ForeignKey,
-                        func, Integer, String,
+                        func, Integer, BigInteger, String,
                         Boolean, Float, ARRAY,
                         Text, LargeBinary, Enum,
-                        CheckConstraint, Date,  JSON)
+                        CheckConstraint, Date,  JSON, inspect,
+                        Index, UniqueConstraint)
 from sqlalchemy.dialects.postgresql import UUID, DATERANGE, TSRANGE, ENUM
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.orm import declarative_base, relationship, deferred, backref
 import datetime
 
 
@@ -65,13 +66,14 @@ class User(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     username = Column(String(255), nullable=False)
     password_hash = Column(String(255), nullable=False)
-    email = Column(String(255), nullable=False)
+    email = Column(String(255), nullable=False, unique=True, index=True)
     created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.datetime.now(datetime.timezone.utc))
     is_active = Column(Boolean, nullable=False, default=True)
-    phone_number = Column(String(20), nullable=False)
+    phone_number = Column(String(20), nullable=False, index=True)
 
     chats = relationship("Chat", back_populates="user")
     balances = relationship("Balance", back_populates="user")
+    current_balance = relationship("UserBalance", back_populates="user", uselist=False)
     cdrs = relationship("CDR", back_populates="user")
     crms = relationship("CRM", back_populates="user")
     pjsip_endpoints = relationship("PJSIPEndpoint", back_populates="user")
@@ -114,7 +116,7 @@ class Balance(Base):
     id = Column(UUID, primary_key=True, default=uuid.uuid4)
     value = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    user_id = Column(UUID(as_uuid=True), ForeignKey(f"{"asclavia_schema"}.users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey(f"{"asclavia_schema"}.users.id", ondelete="CASCADE"), nullable=False, index=True)
 
     user = relationship("User", back_populates="balances")
 
@@ -125,6 +127,48 @@ class Balance(Base):
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
 
 
+class UserBalance(Base):
+    """
+    The UserBalance class represents the current balance of a user: the sum of all of their balance records.
+
+    Attributes:
+        user_id (UUID): User identifier (primary key, foreign key to users). Cascading delete enabled.
+        value (BigInteger): Sum of the user's balance records. Required field.
+        updated_at (DateTime): Date and time of the last change. Set automatically.
+
+    Methods:
+        __repr__(): Returns a string representation of the UserBalance query in JSON format.
+        to_dict(): Returns a dictionary, sequentially balance data, where the keys are the names of the table columns.
+
+    Table:
+        Table name: user_balance
+        Schema: Defined by the settings in config.'asclavia_schema'
+
+    Notes:
+        The row is changed only in the same transaction that inserts a balance record (see BalanceRepo),
+        so it always equals the sum of the balance table for the user.
+
+    Relationships:
+        One-to-one relationship with the users table.
+        Use `back_populates="current_balance"` in User models for two-way relationship.
+    """
+    __tablename__ = "user_balance"
+    __table_args__ = {'schema': "asclavia_schema"}
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey(f"{"asclavia_schema"}.users.id", ondelete="CASCADE"),
+                     primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    user = relationship("User", back_populates="current_balance")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({json.dumps(self.to_dict(), indent=4, default=str)})"
+
+    def to_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+
+
 class Bill(Base):
     """
     The Bill class represents a bill record in the database.
@@ -162,7 +206,7 @@ class Bill(Base):
     period = Column(DATERANGE, nullable=False)
     created_at = Column(DateTime(timezone=True), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey(f"{"asclavia_schema"}.users.id", ondelete="CASCADE"),
-                     nullable=False)
+                     nullable=False, index=True)
     count_mins = Column(Integer, nullable=False)
     count_messages = Column(Integer, nullable=False)
     rates = Column(Float, nullable=False)
@@ -248,19 +292,26 @@ class Call(Base):
         outcome_call: References the id column in the telephone_outcome table. ON DELETE CASCADE behavior.  Nullable.
     """
     __tablename__ = "calls"
-    __table_args__ = {'schema': "asclavia_schema"}
+    # Помесячные секции по call_time (src/database/partitions.py), поэтому call_time входит в первичный ключ.
+    # Звонки ищут по линии и периоду: составные индексы вместо индексов на одни внешние ключи
+    __table_args__ = (
+        Index("ix_asclavia_schema_calls_income_call_call_time_id", "income_call", "call_time", "id"),
+        Index("ix_asclavia_schema_calls_outcome_call_call_time_id", "outcome_call", "call_time", "id"),
+        Index("ix_asclavia_schema_calls_call_time_brin", "call_time", postgresql_using="brin"),
+        {'schema': "asclavia_schema", 'postgresql_partition_by': "RANGE (call_time)"}
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4())
     telephone_number = Column(String(20), nullable=False)
     status = Column(String(255), nullable=False)
-    call_time = Column(DateTime(timezone=True), nullable=False)
+    call_time = Column(DateTime(timezone=True), nullable=False, primary_key=True)
     duration = Column(Float, nullable=False)
     price = Column(Float, nullable=False)
     result = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), nullable=False)
     description_id = Column(UUID(as_uuid=True),
                             ForeignKey(f"{"asclavia_schema"}.call_description.id", ondelete="CASCADE"),
-                            nullable=False)
+                            nullable=False, index=True)
     income_call = Column(UUID(as_uuid=True),
                          ForeignKey(f"{"asclavia_schema"}.telephone_income.id", ondelete="CASCADE"),
                          nullable=True)
@@ -304,18 +355,26 @@ class CDR(Base):
         Use `back_populates="user"` in Balance models for two-way relationship.
     """
     __tablename__ = 'cdr'
-    __table_args__ = {'schema': 'asclavia_schema'}
+    # Помесячные секции по start_time: уникальность uniqueid проверяется вместе с ним,
+    # у звонка АТС время начала не меняется, так что дубли по-прежнему отсекаются
+    __table_args__ = (
+        UniqueConstraint("uniqueid", "start_time", name="uq_asclavia_schema_cdr_uniqueid_start_time"),
+        Index("ix_asclavia_schema_cdr_user_id_start_time", "user_id", "start_time"),
+        Index("ix_asclavia_schema_cdr_start_time_brin", "start_time", postgresql_using="brin"),
+        {'schema': 'asclavia_schema', 'postgresql_partition_by': "RANGE (start_time)"}
+    )
 
     id = Column(UUID, primary_key=True, default=uuid.uuid4())
     uniqueid = Column(String(255), nullable=False)
     caller_id = Column(String(255), nullable=False)
-    start_time = Column(DateTime(timezone=True), nullable=False)
+    start_time = Column(DateTime(timezone=True), nullable=False, primary_key=True)
     end_time = Column(DateTime(timezone=True), nullable=False)
     disposition = Column(String(255), nullable=False)
     duration = Column(Integer, nullable=False)
     recording_path = Column(Text, nullable=False)
-    transcription_text = Column(Text)
-    record = Column(LargeBinary)
+    # Аудио и расшифровка грузятся только при явном обращении или undefer(), select(CDR) их не тянет
+    transcription_text = deferred(Column(Text))
+    record = deferred(Column(LargeBinary))
     user_id = Column(UUID, ForeignKey(f'{'asclavia_schema'}.users.id'), nullable=False)
 
     user = relationship("User", back_populates="cdrs")
@@ -324,7 +383,9 @@ class CDR(Base):
         return f"{self.__class__.__name__}({json.dumps(self.to_dict(), indent=4, default=str)})"
 
     def to_dict(self):
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        # Незагруженные отложенные колонки пропускаем, иначе repr пойдет за ними в базу
+        unloaded = inspect(self).unloaded
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns if c.key not in unloaded}
 
 
 class Chat(Base):
@@ -362,7 +423,7 @@ class Chat(Base):
     chat_url = Column(String(255), nullable=False)
     chat_type = Column(ChatType, nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey(f'{'asclavia_schema'}.users.id', ondelete="cascade"),
-                     nullable=False)
+                     nullable=False, index=True)
     chat_name = Column(String(255), nullable=False)
     token = Column(String(255), nullable=False)
 
@@ -418,7 +479,7 @@ class CRM(Base):
     send_token = Column(Boolean, nullable=False, default=False)
     action = Column(String(255), nullable=False)
     fields = Column(ARRAY(String))
-    user_id = Column(UUID(as_uuid=True), ForeignKey(f'{'asclavia_schema'}.users.id', ondelete='cascade'), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey(f'{'asclavia_schema'}.users.id', ondelete='cascade'), nullable=False, index=True)
 
     user = relationship("User", back_populates="crms")
 
@@ -496,11 +557,16 @@ class Dialog(Base):
         Use `back_populates="dialogs"` in Chat models for two-way relationship.
     """
     __tablename__ = "dialogs"
-    __table_args__ = {'schema': 'asclavia_schema'}
+    # Помесячные секции по created_at, поэтому created_at входит в первичный ключ
+    __table_args__ = (
+        Index("ix_asclavia_schema_dialogs_chat_id_created_at_id", "chat_id", "created_at", "id"),
+        Index("ix_asclavia_schema_dialogs_created_at_brin", "created_at", postgresql_using="brin"),
+        {'schema': 'asclavia_schema', 'postgresql_partition_by': "RANGE (created_at)"}
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4())
     name = Column(String(20), nullable=False)
-    created_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, primary_key=True)
     update_at = Column(DateTime(timezone=True), nullable=False)
     type = Column(ChatType, nullable=False)
     count_messages = Column(Integer, nullable=False)
@@ -508,7 +574,7 @@ class Dialog(Base):
     price = Column(Float, nullable=False)
     description_id = Column(UUID(as_uuid=True),
                             ForeignKey(f"{'asclavia_schema'}.dialog_description.id", ondelete="CASCADE"),
-                            nullable=False)
+                            nullable=False, index=True)
     chat_id = Column(UUID(as_uuid=True),
                      ForeignKey(f"{'asclavia_schema'}.chat.id", ondelete="CASCADE"),
                      nullable=False)
@@ -553,8 +619,8 @@ class PJSIPEndpoint(Base):
     __table_args__ = {'schema': 'asclavia_schema'}
 
     id = Column(Integer, primary_key=True, default=uuid.uuid4())
-    user_id = Column(UUID, ForeignKey(f'{'asclavia_schema'}.users.id'), nullable=False)
-    extension = Column(String(255), nullable=False)
+    user_id = Column(UUID, ForeignKey(f'{'asclavia_schema'}.users.id'), nullable=False, index=True)
+    extension = Column(String(255), nullable=False, index=True)
     auth_type = Column(String(255), nullable=False)
     password = Column(Text, nullable=False)
     transport = Column(String(255), nullable=False)
@@ -612,7 +678,7 @@ class Scenario(Base):
     client_portrait = Column(String(255), nullable=False)
     success_conditions = Column(String(255), nullable=False)
     about_company = Column(Text, nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey(f'{'asclavia_schema'}.users.id', ondelete='cascade'), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey(f'{'asclavia_schema'}.users.id', ondelete='cascade'), nullable=False, index=True)
 
     user = relationship("User", back_populates="scenarios")
 
@@ -670,24 +736,27 @@ class Task(Base):
     scenario_name = Column(String(255), nullable=False)
     task_type = Column(String(20), nullable=False)
     __table_args__ = (CheckConstraint(task_type.in_(['Чат', 'Входная телефония', 'Исходящая телефония', 'Рассылка'])),
+                      Index("ix_asclavia_schema_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
                       {'schema': 'asclavia_schema'})
-    chat_id = Column(UUID(as_uuid=True), ForeignKey(f"{'asclavia_schema'}.chat.id", ondelete="CASCADE"))
+    chat_id = Column(UUID(as_uuid=True), ForeignKey(f"{'asclavia_schema'}.chat.id", ondelete="CASCADE"), index=True)
     telephone_income_id = Column(UUID(as_uuid=True),
-                                 ForeignKey(f"{'asclavia_schema'}.telephone_income.id", ondelete="CASCADE"))
+                                 ForeignKey(f"{'asclavia_schema'}.telephone_income.id", ondelete="CASCADE"), index=True)
     telephone_outcome_id = Column(UUID(as_uuid=True),
-                                  ForeignKey(f"{'asclavia_schema'}.telephone_outcome.id", ondelete="CASCADE"))
-    crm_id = Column(UUID(as_uuid=True), ForeignKey(f"{'asclavia_schema'}.crm.id", ondelete="CASCADE"))
+                                  ForeignKey(f"{'asclavia_schema'}.telephone_outcome.id", ondelete="CASCADE"), index=True)
+    crm_id = Column(UUID(as_uuid=True), ForeignKey(f"{'asclavia_schema'}.crm.id", ondelete="CASCADE"), index=True)
     session_time = Column(TSRANGE, nullable=False)
     crm_integration = Column(Boolean, nullable=False, default=False)
     send_email = Column(Boolean, nullable=False, default=False)
     comment = Column(Text)
     user_id = Column(UUID(as_uuid=True), ForeignKey(f"{'asclavia_schema'}.users.id", ondelete="CASCADE"), nullable=False)
 
-    chat = relationship("Chat", backref="tasks")
-    telephone_income = relationship("TelephoneIncome", backref="tasks")
-    telephone_outcome = relationship("TelephoneOutcome", backref="tasks")
-    crm = relationship("CRM", backref="tasks")
-    user = relationship("User", backref="tasks")
+    # Связи не грузятся неявно: с async сессией ленивая загрузка падает, а в списке дает запрос на строку.
+    # Что загрузить, запрос выбирает профилем из src/database/loading.py
+    chat = relationship("Chat", backref=backref("tasks", lazy="raise_on_sql"), lazy="raise_on_sql")
+    telephone_income = relationship("TelephoneIncome", backref=backref("tasks", lazy="raise_on_sql"), lazy="raise_on_sql")
+    telephone_outcome = relationship("TelephoneOutcome", backref=backref("tasks", lazy="raise_on_sql"), lazy="raise_on_sql")
+    crm = relationship("CRM", backref=backref("tasks", lazy="raise_on_sql"), lazy="raise_on_sql")
+    user = relationship("User", backref=backref("tasks", lazy="raise_on_sql"), lazy="raise_on_sql")
 
     def __repr__(self):
         return f"{self.__class__.__name__}({json.dumps(self.to_dict(), indent=4, default=str)})"
@@ -741,7 +810,7 @@ class TelephoneIncome(Base):
     host = Column(String(255), nullable=False)
     port = Column(Integer, nullable=False, default=5060)
     additional_info = Column(JSON, nullable=False, default='{}')
-    user_id = Column(UUID(as_uuid=True), ForeignKey(f'{'asclavia_schema'}.users.id'), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey(f'{'asclavia_schema'}.users.id'), nullable=False, index=True)
 
     user = relationship("User", backref="telephone_income")
     calls = relationship("Call", back_populates="telephone_income")
@@ -798,7 +867,7 @@ class TelephoneOutcome(Base):
     host = Column(String(255), nullable=False)
     port = Column(Integer, nullable=False, default=5060)
     additional_info = Column(JSON, nullable=False, default='{}')
-    user_id = Column(UUID(as_uuid=True), ForeignKey(f'{'asclavia_schema'}.users.id'), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey(f'{'asclavia_schema'}.users.id'), nullable=False, index=True)
 
     user = relationship("User", backref="telephone_outcome")
     calls = relationship("Call", back_populates="telephone_outcome")
@@ -858,24 +927,68 @@ class Template(Base):
     task_type = Column(String(20), nullable=False)
     __table_args__ = (CheckConstraint(task_type.in_(['Чат', 'Входная телефония', 'Исходящая телефония', 'Рассылка'])),
                       {'schema': 'asclavia_schema'})
-    chat_id = Column(UUID(as_uuid=True), ForeignKey(f"{'asclavia_schema'}.chat.id", ondelete="CASCADE"))
+    chat_id = Column(UUID(as_uuid=True), ForeignKey(f"{'asclavia_schema'}.chat.id", ondelete="CASCADE"), index=True)
     telephone_income_id = Column(UUID(as_uuid=True),
-                                 ForeignKey(f"{'asclavia_schema'}.telephone_income.id", ondelete="CASCADE"))
+                                 ForeignKey(f"{'asclavia_schema'}.telephone_income.id", ondelete="CASCADE"), index=True)
     telephone_outcome_id = Column(UUID(as_uuid=True),
-                                  ForeignKey(f"{'asclavia_schema'}.telephone_outcome.id", ondelete="CASCADE"))
-    crm_id = Column(UUID(as_uuid=True), ForeignKey(f"{'asclavia_schema'}.crm.id", ondelete="CASCADE"))
+                                  ForeignKey(f"{'asclavia_schema'}.telephone_outcome.id", ondelete="CASCADE"), index=True)
+    crm_id = Column(UUID(as_uuid=True), ForeignKey(f"{'asclavia_schema'}.crm.id", ondelete="CASCADE"), index=True)
     session_time = Column(TSRANGE, nullable=False)
     crm_integration = Column(Boolean, nullable=False, default=False)
     send_email = Column(Boolean, nullable=False, default=False)
     comment = Column(Text)
     user_id = Column(UUID(as_uuid=True), ForeignKey(f"{'asclavia_schema'}.users.id", ondelete="CASCADE"),
-                     nullable=False)
+                     nullable=False, index=True)
+
+    # Связи не грузятся неявно: с async сессией ленивая загрузка падает, а в списке дает запрос на строку.
+    # Что загрузить, запрос выбирает профилем из src/database/loading.py
+    chat = relationship("Chat", backref=backref("templates", lazy="raise_on_sql"), lazy="raise_on_sql")
+    telephone_income = relationship("TelephoneIncome", backref=backref("templates", lazy="raise_on_sql"), lazy="raise_on_sql")
+    telephone_outcome = relationship("TelephoneOutcome", backref=backref("templates", lazy="raise_on_sql"), lazy="raise_on_sql")
+    crm = relationship("CRM", backref=backref("templates", lazy="raise_on_sql"), lazy="raise_on_sql")
+    user = relationship("User", backref=backref("templates", lazy="raise_on_sql"), lazy="raise_on_sql")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({json.dumps(self.to_dict(), indent=4, default=str)})"
+
+    def to_dict(self):
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
 
-    chat = relationship("Chat", backref="templates")
-    telephone_income = relationship("TelephoneIncome", backref="templates")
-    telephone_outcome = relationship("TelephoneOutcome", backref="templates")
-    crm = relationship("CRM", backref="templates")
-    user = relationship("User", backref="templates")
+
+class IdempotencyKey(Base):
+    """
+    The IdempotencyKey class stores the first response to a request sent with an Idempotency-Key header.
+
+    Attributes:
+        key (String): Endpoint scope and client key, e.g. "registration:<key>" (primary key).
+        fingerprint (String): Keyed digest of the request body, a retry must match it.
+        status_code (Integer): Status of the stored response. NULL while the first request is still in progress.
+        body (LargeBinary): Body of the stored response, encrypted (it may contain tokens).
+        media_type (String): Content type of the stored response.
+        created_at (DateTime): Date and time the key was first claimed. Set automatically.
+        claimed_at (DateTime): Date and time the current owner claimed the key. A pending key claimed
+            longer ago than the idempotency wait timeout is taken over by the next request.
+        expires_at (DateTime): After this moment the key can be reused.
+
+    Methods:
+        __repr__(): Returns a string representation of the IdempotencyKey query in JSON format.
+        to_dict(): Returns a dictionary, sequentially key data, where the keys are the names of the table columns.
+
+    Table:
+        Table name: idempotency_keys
+        Schema: Defined by the settings in config.'asclavia_schema'
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = {'schema': 'asclavia_schema'}
+
+    key = Column(String(300), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    body = Column(LargeBinary)
+    media_type = Column(String(100))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    claimed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
 
     def __repr__(self):
         return f"{self.__class__.__name__}({json.dumps(self.to_dict(), indent=4, default=str)})"
@@ -1,7 +1,210 @@
+"""
+Логи идут через очередь: QueueHandler только кладет запись в очередь, а форматирование
+и запись в stdout делает QueueListener в отдельном потоке. Сообщение собирается из шаблона
+и аргументов уже там, поэтому логгеры нужно вызывать в %-стиле, а не с готовой f-строкой.
+
+К каждой записи добавляются request_id и trace_id текущего запроса (см. RequestContextMiddleware).
+
+Импорт модуля ничего не запускает: очередь и поток вывода поднимает setup_logging(), ее вызывают
+lifespan приложения, раннер и main() каждой CLI. Записи до этого идут в стандартный lastResort
+(stderr, от WARNING).
+"""
+import atexit
 import logging
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
 
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO
+from src.config import configuration
+from src.utils.Metrics import Metrics
+
+log_records_dropped = Metrics.counter(
+    "log_records_dropped_total",
+    "Записи лога, отброшенные потому, что очередь к потоку вывода переполнена"
 )
 
-mail_logger = logging.getLogger("mail_logger")
\ No newline at end of file
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+trace_id_var: ContextVar[str | None] = ContextVar("trace_id", default=None)
+
+# Атрибуты, которые есть у любой LogRecord, все остальное пришло через extra=
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "request_id", "trace_id", "suppressed",
+}
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Запоминает request_id и trace_id в записи. Стоит на QueueHandler, то есть срабатывает
+    еще в потоке и контексте запроса, до передачи записи в поток вывода
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает только долю записей ниже WARNING для указанных логгеров, предупреждения и ошибки не трогает
+    """
+
+    def __init__(self, rates: dict[str, float], rand=random.random) -> None:
+        super().__init__()
+        self._rates = rates
+        self._rand = rand
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self._rates.get(record.name)
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        return self._rand() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Не больше limit записей в секунду с одним шаблоном сообщения для указанных логгеров.
+    Первая запись следующей секунды несет в поле suppressed число отброшенных
+    """
+
+    def __init__(self, limits: dict[str, int], clock=time.monotonic) -> None:
+        super().__init__()
+        self._limits = limits
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (логгер, шаблон) -> [начало окна, записей в окне, отброшено]
+        self._windows: dict[tuple[str, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        limit = self._limits.get(record.name)
+        if limit is None:
+            return True
+
+        key = (record.name, str(record.msg))
+        now = self._clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= 1.0:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+
+            if window[1] < limit:
+                window[1] += 1
+                return True
+
+            window[2] += 1
+            return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Стандартный QueueHandler форматирует запись до постановки в очередь, то есть в event loop.
+    Здесь запись уходит как есть, шаблон с аргументами собирается форматтером в потоке вывода
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Лучше потерять запись, чем остановить обработку запросов
+            self.dropped += 1
+            log_records_dropped.inc()
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for attr in ("request_id", "trace_id", "suppressed"):
+            value = getattr(record, attr, None)
+            if value is not None:
+                entry[attr] = value
+
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=repr).decode()
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, "request_id", None) or "-"
+        return super().format(record)
+
+
+_listener: QueueListener | None = None
+
+
+def setup_logging() -> QueueListener:
+    """
+    Вешает на корневой логгер DeferredQueueHandler и запускает поток вывода.
+    Повторный вызов ничего не делает, после stop_logging() настраивает все заново
+    """
+    global _listener
+
+    if _listener is not None:
+        return _listener
+
+    params = configuration.logging
+    log_queue: queue.Queue = queue.Queue(maxsize=params.queue_size)
+
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(params.sampling))
+    queue_handler.addFilter(RateLimitFilter(params.rate_limit_per_s))
+    queue_handler.addFilter(RequestContextFilter())
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter() if params.format == "json" else TextFormatter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(params.level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    # unregister: при повторной настройке после stop_logging обработчик не должен копиться
+    atexit.unregister(stop_logging)
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging() -> None:
+    """
+    Дописывает все, что осталось в очереди, и останавливает поток вывода.
+    Записи после остановки пишутся в stdout напрямую, чтобы не потеряться в очереди без читателя
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger().handlers = list(_listener.handlers)
+        _listener = None
+
+
+mail_logger = logging.getLogger("mail_logger")
+app_logger = logging.getLogger("app_logger")
@@ -0,0 +1,8 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class UserExportFilter(BaseModel):
+    is_active: bool | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
@@ -1,3 +1,4 @@
 from .Login import *
 from .Registration import *
-from .Recovery import *
\ No newline at end of file
+from .Recovery import *
+from .Export import *
@@ -1,12 +1,92 @@
+from functools import lru_cache
 from pydantic import BaseModel, field_validator
-from email_validator import validate_email
+from src.config import configuration
+from src.utils.Metrics import Metrics
+
+
+# Больше этого email_validator все равно не пропустит
+_MAX_EMAIL_LENGTH = 254
+
+
+def _find_obvious_defect(email: str) -> str | None:
+    """
+    Дешевая проверка до полного валидатора: находит дефекты, с которыми email_validator
+    гарантированно не пропустит строку, чтобы не гонять по ней IDNA и unicode нормализацию
+    """
+    if len(email) > _MAX_EMAIL_LENGTH:
+        return "The email address is too long."
+
+    local_part, at, domain = email.rpartition("@")
+    if not at or not local_part or not domain:
+        return "The email address is not valid. It must have an @-sign."
+
+    if "." not in domain or domain[0] == "." or domain[-1] == ".":
+        return "The part after the @-sign is not valid."
+
+    if any(char.isspace() for char in email):
+        return "The email address contains invalid whitespace."
+
+    return None
+
+
+@lru_cache(maxsize=configuration.email_validation.cache_size)
+def _normalize_valid_email(email: str) -> str:
+    # Исключения lru_cache не кэширует, поэтому в кэш попадают только валидные адреса
+    from email_validator import validate_email
+
+    return validate_email(
+            email,
+            check_deliverability=False,
+            allow_smtputf8=False,
+    ).normalized
+
+
+def normalize_email(email: str) -> str:
+    email = email.strip()
+
+    defect = _find_obvious_defect(email)
+    if defect is not None:
+        from email_validator import EmailSyntaxError
+
+        raise EmailSyntaxError(defect)
+
+    return _normalize_valid_email(email)
+
+
+def email_cache_info() -> dict[str, float]:
+    """
+    Статистика кэша нормализации: попадания, промахи, размер и доля попаданий
+    """
+    info = _normalize_valid_email.cache_info()
+    total = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": info.hits / total if total else 0.0,
+    }
+
+
+_EMAIL_CACHE_GAUGES = {
+    stat: Metrics.gauge(f"email_normalization_cache_{stat}", description)
+    for stat, description in (
+        ("hits", "Попадания в кэш нормализации email с запуска процесса"),
+        ("misses", "Промахи кэша нормализации email с запуска процесса"),
+        ("size", "Адресов в кэше нормализации email"),
+        ("hit_rate", "Доля попаданий в кэш нормализации email"),
+    )
+}
+
+
+@Metrics.collector
+def _collect_email_cache() -> None:
+    info = email_cache_info()
+    for stat, gauge in _EMAIL_CACHE_GAUGES.items():
+        gauge.set(info[stat])
 
 
 class EmailNormalizer(BaseModel):
     @field_validator("email", check_fields=False)
     def check_is_email_valid(cls, email: str) -> str:
-        return validate_email(
-                email.strip(),
-                check_deliverability=False,
-                allow_smtputf8=False,
-        ).normalized
+        return normalize_email(email)
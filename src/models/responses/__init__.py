@@ -1,3 +1,6 @@
 from .login import *
 from .registration import *
-from .recovery import *
\ No newline at end of file
+from .recovery import *
+from .cdr import *
+from .balance import *
+from .history import *
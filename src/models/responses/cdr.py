@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class CDRImportReport(BaseModel):
+    rows: int = 0
+    inserted: int = 0
+    # uniqueid уже был в базе или повторился в самом файле
+    duplicates: int = 0
+    # caller_id не нашелся ни среди внутренних номеров, ни среди телефонов пользователей
+    unknown_caller: int = 0
+    # строка не разобралась: нет поля, неверная дата или число
+    rejected: int = 0
+    elapsed_s: float = 0.0
+    rows_per_s: float = 0.0
@@ -0,0 +1,52 @@
+from datetime import date, datetime
+from uuid import UUID
+from pydantic import BaseModel
+
+
+class DialogItem(BaseModel):
+    id: UUID
+    name: str
+    created_at: datetime
+    type: str
+    count_messages: int
+    status: str
+    price: float
+    chat_id: UUID
+
+
+class CallItem(BaseModel):
+    id: UUID
+    telephone_number: str
+    status: str
+    call_time: datetime
+    duration: float
+    price: float
+    result: str
+    # income или outcome: по какой линии пользователя прошел звонок
+    direction: str
+
+
+class TaskItem(BaseModel):
+    id: UUID
+    task_name: str
+    progress: float
+    status: str
+    created_at: date
+    connection_type: str
+    task_type: str
+
+
+# next_cursor передается в следующий запрос, None - страниц больше нет
+class DialogPage(BaseModel):
+    items: list[DialogItem]
+    next_cursor: str | None = None
+
+
+class CallPage(BaseModel):
+    items: list[CallItem]
+    next_cursor: str | None = None
+
+
+class TaskPage(BaseModel):
+    items: list[TaskItem]
+    next_cursor: str | None = None
@@ -1,5 +1,7 @@
-from pydantic import BaseModel, field_validator
+from typing import Literal
+from pydantic import BaseModel, Field, field_validator
 from starlette import status
+from src.config import configuration
 from .EmailNormaliztion import EmailNormalizer
 
 
@@ -33,3 +35,18 @@ class UserData(EmailNormalizer):
 class BadTokenResp(BaseModel):
     status_code: int = status.HTTP_403_FORBIDDEN
     detail: str = "The token is invalid"
+
+
+class BatchRegistrationData(BaseModel):
+    users: list[UserData] = Field(min_length=1, max_length=configuration.batch_registration.max_users)
+
+
+class BatchRegistrationItem(BaseModel):
+    email: str
+    # created - создан, exists - уже был в базе, duplicate - повтор email внутри этого же запроса
+    status: Literal["created", "exists", "duplicate"]
+    user_id: str | None = None
+
+
+class BatchRegistrationResponse(BaseModel):
+    results: list[BatchRegistrationItem]
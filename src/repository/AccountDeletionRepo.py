@@ -0,0 +1,120 @@
+from typing import Any, Callable
+from uuid import UUID
+from src.database import get_raw_connection
+from src.database.bulk import affected_rows
+
+
+_USER_CHATS = "SELECT id FROM asclavia_schema.chat WHERE user_id = $1"
+_USER_CALLS = (
+    "SELECT id FROM asclavia_schema.calls WHERE "
+    "income_call IN (SELECT id FROM asclavia_schema.telephone_income WHERE user_id = $1) "
+    "OR outcome_call IN (SELECT id FROM asclavia_schema.telephone_outcome WHERE user_id = $1)"
+)
+
+# (таблица, условие на строки пользователя) в порядке удаления: сначала строки, на которые никто
+# не ссылается, потом те, на кого ссылались они, так каскады из следующих шагов находят уже пустые таблицы
+# и каждая пачка остается короткой.
+# Описания диалогов и звонков - родители, а не потомки: dialogs и calls ссылаются на них с ON DELETE CASCADE,
+# и одно описание бывает общим у диалогов разных пользователей. Поэтому описания отдельным шагом
+# не удаляются: пачка диалогов или звонков удаляет вместе с собой только описания, которые после нее
+# ни на что больше не ссылаются (_delete_with_descriptions).
+# user_balance - одна строка на пользователя, ее удаляет каскад вместе с самим пользователем,
+# а до того каждая пачка журнала balance вычитается из нее в той же транзакции (_BALANCE_BATCH)
+DELETION_STEPS: tuple[tuple[str, str], ...] = (
+    ("dialogs", f"chat_id IN ({_USER_CHATS})"),
+    ("calls", f"id IN ({_USER_CALLS})"),
+    ("tasks", "user_id = $1"),
+    ("templates", "user_id = $1"),
+    ("cdr", "user_id = $1"),
+    ("pjsip_endpoints", "user_id = $1"),
+    ("balance", "user_id = $1"),
+    ("bills", "user_id = $1"),
+    ("scenarios", "user_id = $1"),
+    ("crm", "user_id = $1"),
+    ("chat", "user_id = $1"),
+    ("telephone_income", "user_id = $1"),
+    ("telephone_outcome", "user_id = $1"),
+)
+
+# Пачка журнала balance вместе с ее суммой из user_balance: после каждой транзакции
+# user_balance по-прежнему равен сумме журнала, и сверка балансов не видит удаление как расхождение
+_BALANCE_BATCH = (
+    "WITH deleted AS ("
+    "DELETE FROM asclavia_schema.balance WHERE id IN "
+    "(SELECT id FROM asclavia_schema.balance WHERE user_id = $1 LIMIT $2) RETURNING value), "
+    "adjusted AS ("
+    "UPDATE asclavia_schema.user_balance SET updated_at = now(), "
+    "value = value - (SELECT coalesce(sum(value), 0) FROM deleted) WHERE user_id = $1) "
+    "SELECT count(*) FROM deleted"
+)
+
+# таблица -> таблица описаний, на которые она ссылается через description_id
+_DESCRIPTIONS = {
+    "dialogs": "dialog_description",
+    "calls": "call_description",
+}
+
+
+def _delete_with_descriptions(table: str, condition: str) -> str:
+    """
+    Пачка table и осиротевшие после нее описания в одной транзакции. Все части WITH видят снимок
+    до удаления, поэтому удаляемые в этой же пачке строки из проверки на ссылки исключаются явно
+    """
+    return (
+        f"WITH deleted AS ("
+        f"DELETE FROM asclavia_schema.{table} WHERE id IN "
+        f"(SELECT id FROM asclavia_schema.{table} WHERE {condition} LIMIT $2) RETURNING id, description_id), "
+        f"orphans AS ("
+        f"DELETE FROM asclavia_schema.{_DESCRIPTIONS[table]} AS description "
+        f"WHERE description.id IN (SELECT description_id FROM deleted) AND NOT EXISTS ("
+        f"SELECT 1 FROM asclavia_schema.{table} AS other WHERE other.description_id = description.id "
+        f"AND other.id NOT IN (SELECT id FROM deleted))) "
+        f"SELECT count(*) FROM deleted"
+    )
+
+
+class AccountDeletionRepo:
+    """
+    Удаление пользователя и всех его данных пачками. Каждая пачка - отдельная короткая транзакция
+    с lock_timeout: строки блокируются только на время своей пачки, а чужая долгая блокировка
+    приводит к ошибке, а не к очереди из ждущих за нами запросов
+    """
+
+    __slots__ = ('_connection_getter', '_lock_timeout_ms',)
+
+    def __init__(self,
+                 connection_getter: Callable[[], Any] = get_raw_connection,
+                 lock_timeout_ms: int = 2000) -> None:
+        self._connection_getter = connection_getter
+        self._lock_timeout_ms = lock_timeout_ms
+
+    async def delete_batch(self, table: str, condition: str, user_id: UUID, limit: int) -> int:
+        """
+        Удаляет до limit строк table, подходящих под condition. Возвращает число удаленных строк
+        """
+        if table == "balance":
+            return await self._execute(_BALANCE_BATCH, user_id, limit, fetch=True)
+        if table in _DESCRIPTIONS:
+            return await self._execute(_delete_with_descriptions(table, condition), user_id, limit, fetch=True)
+
+        statement = (
+            f"DELETE FROM asclavia_schema.{table} WHERE id IN "
+            f"(SELECT id FROM asclavia_schema.{table} WHERE {condition} LIMIT $2)"
+        )
+        return await self._execute(statement, user_id, limit)
+
+    async def delete_user(self, user_id: UUID) -> bool:
+        return await self._execute("DELETE FROM asclavia_schema.users WHERE id = $1", user_id) > 0
+
+    async def _execute(self, statement: str, *args: Any, fetch: bool = False) -> int:
+        """
+        :fetch statement сам возвращает число строк, иначе оно берется из статуса команды
+        """
+        async with self._connection_getter() as (conn, _):
+            async with conn.transaction():
+                # SET LOCAL действует до конца транзакции и не остается на соединении пула
+                await conn.execute(f"SET LOCAL lock_timeout = {int(self._lock_timeout_ms)}")
+                if fetch:
+                    return await conn.fetchval(statement, *args)
+                status = await conn.execute(statement, *args)
+        return affected_rows(status)
@@ -0,0 +1,103 @@
+from typing import Any, AsyncGenerator, Callable
+from uuid import UUID, uuid4
+from src.database import get_raw_connection
+
+
+# Запись в журнал balance и изменение user_balance - один оператор, то есть одна транзакция:
+# текущий баланс не может разойтись с журналом даже при обрыве соединения между ними
+_CREDIT = (
+    "WITH entry AS ("
+    "  INSERT INTO asclavia_schema.balance (id, value, user_id, created_at) VALUES ($1, $2, $3, now()) "
+    "  RETURNING user_id, value"
+    ") "
+    "INSERT INTO asclavia_schema.user_balance AS current (user_id, value, updated_at) "
+    "SELECT user_id, value, now() FROM entry "
+    "ON CONFLICT (user_id) DO UPDATE SET value = current.value + EXCLUDED.value, updated_at = EXCLUDED.updated_at "
+    "RETURNING value"
+)
+
+# Проверка и списание атомарны: UPDATE берет блокировку строки, и второй параллельный запрос
+# проверяет value >= $2 уже после первого. Запись в журнал появляется, только если списание прошло
+_DEBIT = (
+    "WITH debited AS ("
+    "  UPDATE asclavia_schema.user_balance SET value = value - $2, updated_at = now() "
+    "  WHERE user_id = $1 AND value >= $2 RETURNING user_id, value"
+    "), entry AS ("
+    "  INSERT INTO asclavia_schema.balance (id, value, user_id, created_at) "
+    "  SELECT $3, -$2::int, user_id, now() FROM debited"
+    ") "
+    "SELECT value FROM debited"
+)
+
+# В одном снимке, иначе запись, вставленная между чтением журнала и user_balance, выглядит как расхождение
+_MISMATCHES = (
+    "SELECT coalesce(ledger.user_id, current.user_id) AS user_id, "
+    "coalesce(current.value, 0) AS materialized, coalesce(ledger.total, 0) AS ledger "
+    "FROM (SELECT user_id, sum(value) AS total FROM asclavia_schema.balance GROUP BY user_id) AS ledger "
+    "FULL JOIN asclavia_schema.user_balance AS current ON current.user_id = ledger.user_id "
+    "WHERE coalesce(current.value, 0) <> coalesce(ledger.total, 0)"
+)
+
+
+class BalanceRepo:
+    """
+    Текущий баланс пользователя в user_balance и журнал изменений в balance
+    """
+
+    __slots__ = ('_connection_getter',)
+
+    def __init__(self, connection_getter: Callable[[], Any] = get_raw_connection) -> None:
+        self._connection_getter = connection_getter
+
+    async def get_balance(self, user_id: UUID) -> int:
+        async with self._connection_getter() as (conn, _):
+            value = await conn.fetchval(
+                "SELECT value FROM asclavia_schema.user_balance WHERE user_id = $1", user_id
+            )
+        return value or 0
+
+    async def credit(self, user_id: UUID, value: int) -> int:
+        """
+        Пишет изменение баланса (value может быть отрицательным) и возвращает новый баланс
+        """
+        async with self._connection_getter() as (conn, _):
+            return await conn.fetchval(_CREDIT, uuid4(), value, user_id)
+
+    async def debit(self, user_id: UUID, amount: int) -> int | None:
+        """
+        Списывает amount, только если на балансе не меньше amount. Возвращает новый баланс
+        или None, если денег не хватило
+        """
+        async with self._connection_getter() as (conn, _):
+            return await conn.fetchval(_DEBIT, user_id, amount, uuid4())
+
+    async def find_mismatches(self) -> AsyncGenerator[tuple[UUID, int, int], None]:
+        """
+        (user_id, значение в user_balance, сумма журнала) для всех расходящихся пользователей
+        """
+        async with self._connection_getter() as (conn, _):
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                async for row in conn.cursor(_MISMATCHES):
+                    yield row["user_id"], row["materialized"], row["ledger"]
+
+    async def repair(self, user_id: UUID) -> int:
+        """
+        Пересчитывает user_balance из журнала. Строка блокируется до пересчета, поэтому
+        параллельное изменение баланса либо уже в сумме, либо подождет и ляжет поверх
+        """
+        async with self._connection_getter() as (conn, _):
+            async with conn.transaction():
+                await conn.execute(
+                    "INSERT INTO asclavia_schema.user_balance (user_id, value, updated_at) "
+                    "VALUES ($1, 0, now()) ON CONFLICT (user_id) DO NOTHING",
+                    user_id
+                )
+                await conn.execute(
+                    "SELECT 1 FROM asclavia_schema.user_balance WHERE user_id = $1 FOR UPDATE", user_id
+                )
+                return await conn.fetchval(
+                    "UPDATE asclavia_schema.user_balance SET updated_at = now(), value = "
+                    "(SELECT coalesce(sum(value), 0) FROM asclavia_schema.balance WHERE user_id = $1) "
+                    "WHERE user_id = $1 RETURNING value",
+                    user_id
+                )
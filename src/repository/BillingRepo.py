@@ -0,0 +1,112 @@
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from typing import Any, AsyncGenerator, Callable
+from uuid import UUID, uuid4
+from src.database import get_raw_connection
+
+
+BILL_COLUMNS = [
+    "id", "amount", "period", "created_at", "user_id", "count_mins", "count_messages", "rates", "total",
+]
+
+# Пользователь получает номер 0..N-1, в выборках едет int вместо uuid, а номер сразу служит индексом массива
+_CREATE_USER_CODES = (
+    "CREATE TEMP TABLE billing_users ON COMMIT DROP AS "
+    "SELECT (row_number() OVER (ORDER BY id) - 1)::int AS code, id AS user_id FROM asclavia_schema.users"
+)
+
+_CALLS = (
+    "SELECT u.code, c.duration, c.price FROM asclavia_schema.calls c "
+    "JOIN asclavia_schema.telephone_income line ON line.id = c.income_call "
+    "JOIN billing_users u ON u.user_id = line.user_id "
+    "WHERE c.call_time >= $1 AND c.call_time < $2 "
+    "UNION ALL "
+    "SELECT u.code, c.duration, c.price FROM asclavia_schema.calls c "
+    "JOIN asclavia_schema.telephone_outcome line ON line.id = c.outcome_call "
+    "JOIN billing_users u ON u.user_id = line.user_id "
+    "WHERE c.call_time >= $1 AND c.call_time < $2"
+)
+
+_DIALOGS = (
+    "SELECT u.code, d.count_messages, d.price FROM asclavia_schema.dialogs d "
+    "JOIN asclavia_schema.chat ch ON ch.id = d.chat_id "
+    "JOIN billing_users u ON u.user_id = ch.user_id "
+    "WHERE d.created_at >= $1 AND d.created_at < $2"
+)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+class BillingSnapshot:
+    """
+    Выборки за период внутри одной REPEATABLE READ транзакции: звонки и диалоги читаются
+    из одного и того же снимка базы, даже если их пишут прямо во время расчета
+    """
+
+    def __init__(self, conn: Any, user_ids: list[UUID], start: date, end: date) -> None:
+        self._conn = conn
+        self.user_ids = user_ids
+        self._range = (_day_start(start), _day_start(end))
+
+    async def stream_calls(self, chunk_rows: int) -> AsyncGenerator[list, None]:
+        """
+        Пачки (номер пользователя, duration, price) звонков периода
+        """
+        async for chunk in self._stream(_CALLS, chunk_rows):
+            yield chunk
+
+    async def stream_dialogs(self, chunk_rows: int) -> AsyncGenerator[list, None]:
+        """
+        Пачки (номер пользователя, count_messages, price) диалогов периода
+        """
+        async for chunk in self._stream(_DIALOGS, chunk_rows):
+            yield chunk
+
+    async def _stream(self, query: str, chunk_rows: int) -> AsyncGenerator[list, None]:
+        # Серверный курсор: в памяти не больше chunk_rows строк за раз
+        cursor = await self._conn.cursor(query, *self._range)
+        while rows := await cursor.fetch(chunk_rows):
+            yield rows
+
+
+class BillingRepo:
+    __slots__ = ('_connection_getter',)
+
+    def __init__(self, connection_getter: Callable[[], Any] = get_raw_connection) -> None:
+        self._connection_getter = connection_getter
+
+    @asynccontextmanager
+    async def snapshot(self, start: date, end: date) -> AsyncGenerator[BillingSnapshot, None]:
+        """
+        Снимок для расчета периода [start, end). user_ids[code] - пользователь с номером code
+        """
+        async with self._connection_getter() as (conn, _):
+            async with conn.transaction(isolation="repeatable_read"):
+                await conn.execute(_CREATE_USER_CODES)
+                await conn.execute("ANALYZE billing_users")
+                rows = await conn.fetch("SELECT user_id FROM billing_users ORDER BY code")
+                yield BillingSnapshot(conn, [row["user_id"] for row in rows], start, end)
+
+    async def replace_bills(self, start: date, end: date, bills: list[tuple]) -> int:
+        """
+        Заменяет счета периода [start, end) одним COPY, повторный расчет периода не плодит дублей.
+        :bills (user_id, amount, count_mins, count_messages, rates, total)
+        """
+        from asyncpg import Range
+
+        period = Range(start, end)
+        created_at = datetime.now(timezone.utc)
+        records = [
+            (uuid4(), amount, period, created_at, user_id, count_mins, count_messages, rates, total)
+            for user_id, amount, count_mins, count_messages, rates, total in bills
+        ]
+
+        async with self._connection_getter() as (conn, _):
+            async with conn.transaction():
+                await conn.execute("DELETE FROM asclavia_schema.bills WHERE period = $1", period)
+                await conn.copy_records_to_table(
+                    "bills", schema_name="asclavia_schema", columns=BILL_COLUMNS, records=records
+                )
+        return len(records)
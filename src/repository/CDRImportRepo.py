@@ -0,0 +1,62 @@
+from typing import Any, Callable
+from uuid import UUID
+from src.database import get_raw_connection
+from src.database.bulk import copy_into_staging, affected_rows
+
+
+CDR_IMPORT_COLUMNS = [
+    "id", "uniqueid", "caller_id", "start_time", "end_time",
+    "disposition", "duration", "recording_path", "user_id",
+]
+
+
+class CDRImportRepo:
+    """
+    Загрузка CDR с АТС: COPY во временную таблицу и перенос в cdr одним INSERT ... SELECT,
+    повторно присланные звонки (тот же uniqueid и start_time) пропускаются
+    """
+
+    __slots__ = ('_connection_getter',)
+
+    def __init__(self, connection_getter: Callable[[], Any] = get_raw_connection) -> None:
+        self._connection_getter = connection_getter
+
+    async def find_users_by_caller_ids(self, caller_ids: list[str]) -> dict[str, UUID]:
+        """
+        caller_id -> владелец. Сначала внутренний номер из pjsip_endpoints, если такого нет -
+        телефон пользователя. Номера без владельца в ответ не попадают
+        """
+        async with self._connection_getter() as (conn, _):
+            rows = await conn.fetch(
+                "SELECT DISTINCT ON (caller_id) caller_id, user_id FROM ("
+                "  SELECT extension AS caller_id, user_id::uuid AS user_id, 0 AS priority "
+                "  FROM asclavia_schema.pjsip_endpoints WHERE extension = ANY($1::varchar[]) "
+                "  UNION ALL "
+                "  SELECT phone_number, id, 1 FROM asclavia_schema.users WHERE phone_number = ANY($1::varchar[])"
+                ") AS owners ORDER BY caller_id, priority",
+                caller_ids
+            )
+        return {row["caller_id"]: row["user_id"] for row in rows}
+
+    async def load_cdrs(self, records: list[tuple]) -> int:
+        """
+        Записи в порядке CDR_IMPORT_COLUMNS. Возвращает число реально вставленных строк
+        """
+        columns = ", ".join(CDR_IMPORT_COLUMNS)
+
+        async with self._connection_getter() as (conn, _):
+            async with conn.transaction():
+                await copy_into_staging(
+                    conn,
+                    source_table="asclavia_schema.cdr",
+                    staging_table="cdr_import",
+                    columns=CDR_IMPORT_COLUMNS,
+                    records=records
+                )
+                status = await conn.execute(
+                    f"INSERT INTO asclavia_schema.cdr ({columns}) "
+                    f"SELECT DISTINCT ON (uniqueid) {columns} FROM cdr_import ORDER BY uniqueid "
+                    f"ON CONFLICT (uniqueid, start_time) DO NOTHING"
+                )
+
+        return affected_rows(status)
@@ -0,0 +1,34 @@
+from typing import AsyncGenerator
+from sqlalchemy import select
+from src.database import User
+from src.models import UserExportFilter
+from .interface import TablesRepositoryInterface
+
+
+# Хэш пароля наружу не отдаем
+USER_EXPORT_COLUMNS = (User.id, User.username, User.email, User.phone_number, User.is_active, User.created_at)
+
+
+class UserExportRepo(TablesRepositoryInterface):
+    async def stream_users(self,
+                           filters: UserExportFilter,
+                           chunk_size: int = 5000
+                           ) -> AsyncGenerator[list[tuple], None]:
+        """
+        Отдает пользователей пачками по chunk_size строк через серверный курсор,
+        так что в памяти одновременно лежит не больше одной пачки
+        """
+        query = select(*USER_EXPORT_COLUMNS)
+
+        if filters.is_active is not None:
+            query = query.where(User.is_active == filters.is_active)
+        if filters.created_from is not None:
+            query = query.where(User.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            query = query.where(User.created_at < filters.created_to)
+
+        async with self._session_getter() as session:
+            result = await session.stream(query.execution_options(yield_per=chunk_size))
+
+            async for partition in result.partitions():
+                yield [tuple(row) for row in partition]
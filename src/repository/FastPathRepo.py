@@ -0,0 +1,59 @@
+from .PreparedTools import PreparedStatementsTools
+from .CommonTools import CommonTools
+import uuid
+
+
+class FastLoginRepo(PreparedStatementsTools, CommonTools):
+    pass
+
+
+class FastRegistrationRepo(PreparedStatementsTools, CommonTools):
+    async def add_user(self,
+                       email: str,
+                       phone_num: str,
+                       password_hash: str
+                       ) -> str | None:
+        """
+        Возвращает id созданного пользователя или None, если email уже занят
+        """
+        async with self._statement("auth_insert_user") as stmt:
+            return await stmt.fetchval(uuid.uuid4(), email, password_hash, phone_num)
+
+    async def add_users(self,
+                        users: list[tuple[str, str, str]]
+                        ) -> dict[str, str]:
+        """
+        Вставляет пользователей (email, телефон, хэш пароля) одним запросом.
+        Уже существующие email пропускаются, возвращает {email: id} только для созданных
+        """
+        emails, phones, hashes = zip(*users)
+
+        async with self._statement("auth_insert_users") as stmt:
+            rows = await stmt.fetch(
+                [uuid.uuid4() for _ in users], list(emails), list(hashes), list(phones)
+            )
+        return {row["email"]: row["id"] for row in rows}
+
+    async def make_users_email_verified(self,
+                                        email: str
+                                        ) -> None:
+        async with self._statement("auth_activate_user") as stmt:
+            await stmt.fetch(email)
+
+    async def is_user_exists(self,
+                             email: str
+                             ) -> bool:
+        """
+        True если этот пользователь уже существует, False иначе
+        """
+        async with self._statement("auth_is_user_exists") as stmt:
+            return await stmt.fetchval(email)
+
+
+class FastRecoveryRepo(PreparedStatementsTools, CommonTools):
+    async def update_password(self,
+                              user_id: str,
+                              new_password_hash: str
+                              ) -> None:
+        async with self._statement("auth_update_password") as stmt:
+            await stmt.fetch(uuid.UUID(user_id), new_password_hash)
@@ -0,0 +1,82 @@
+from datetime import date, datetime
+from typing import Any, Callable
+from uuid import UUID
+from src.database import get_raw_connection
+
+
+# Только поля списка, без описаний и внешних ключей
+DIALOG_COLUMNS = "id, name, created_at, type, count_messages, status, price, chat_id"
+CALL_COLUMNS = "id, telephone_number, status, call_time, duration, price, result"
+TASK_COLUMNS = "id, task_name, progress, status, created_at, connection_type, task_type"
+
+# Страница = LIMIT строк после курсора по индексу (владелец, время, id). На каждый чат и линию
+# берется не больше LIMIT строк, поэтому цена страницы не зависит от того, насколько она далеко
+_AFTER = " AND ({key}, id) < (${at}, ${row_id})"
+
+
+def _dialogs_query(after: bool) -> str:
+    keyset = _AFTER.format(key="created_at", at=3, row_id=4) if after else ""
+    return (
+        f"SELECT d.* FROM asclavia_schema.chat ch CROSS JOIN LATERAL ("
+        f"  SELECT {DIALOG_COLUMNS} FROM asclavia_schema.dialogs "
+        f"  WHERE chat_id = ch.id{keyset} ORDER BY created_at DESC, id DESC LIMIT $2"
+        f") AS d WHERE ch.user_id = $1 "
+        f"ORDER BY d.created_at DESC, d.id DESC LIMIT $2"
+    )
+
+
+def _calls_query(after: bool) -> str:
+    keyset = _AFTER.format(key="call_time", at=3, row_id=4) if after else ""
+    lines = [
+        f"SELECT c.*, '{direction}' AS direction FROM asclavia_schema.telephone_{direction} line "
+        f"CROSS JOIN LATERAL ("
+        f"  SELECT {CALL_COLUMNS} FROM asclavia_schema.calls "
+        f"  WHERE {direction}_call = line.id{keyset} ORDER BY call_time DESC, id DESC LIMIT $2"
+        f") AS c WHERE line.user_id = $1"
+        for direction in ("income", "outcome")
+    ]
+    return f"{lines[0]} UNION ALL {lines[1]} ORDER BY call_time DESC, id DESC LIMIT $2"
+
+
+def _tasks_query(after: bool) -> str:
+    keyset = _AFTER.format(key="created_at", at=3, row_id=4) if after else ""
+    return (
+        f"SELECT {TASK_COLUMNS} FROM asclavia_schema.tasks "
+        f"WHERE user_id = $1{keyset} ORDER BY created_at DESC, id DESC LIMIT $2"
+    )
+
+
+class HistoryRepo:
+    """
+    Списки диалогов, звонков и задач пользователя от новых к старым, keyset пагинацией
+    """
+
+    __slots__ = ('_connection_getter',)
+
+    _QUERIES = {
+        "dialogs": (_dialogs_query(False), _dialogs_query(True)),
+        "calls": (_calls_query(False), _calls_query(True)),
+        "tasks": (_tasks_query(False), _tasks_query(True)),
+    }
+
+    def __init__(self, connection_getter: Callable[[], Any] = get_raw_connection) -> None:
+        self._connection_getter = connection_getter
+
+    async def list_dialogs(self, user_id: UUID, limit: int, after: tuple[datetime, UUID] | None = None) -> list:
+        return await self._fetch("dialogs", user_id, limit, after)
+
+    async def list_calls(self, user_id: UUID, limit: int, after: tuple[datetime, UUID] | None = None) -> list:
+        """
+        Звонки по входящим и исходящим линиям пользователя, по call_time - ключу секционирования calls
+        """
+        return await self._fetch("calls", user_id, limit, after)
+
+    async def list_tasks(self, user_id: UUID, limit: int, after: tuple[date, UUID] | None = None) -> list:
+        return await self._fetch("tasks", user_id, limit, after)
+
+    async def _fetch(self, name: str, user_id: UUID, limit: int, after: tuple | None) -> list:
+        first_page, next_page = self._QUERIES[name]
+        async with self._connection_getter() as (conn, _):
+            if after is None:
+                return await conn.fetch(first_page, user_id, limit)
+            return await conn.fetch(next_page, user_id, limit, *after)
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from src.database import IdempotencyKey
+from .interface import TablesRepositoryInterface
+
+
+class IdempotencyRepo(TablesRepositoryInterface):
+    """
+    Ключи идемпотентности в таблице, чтобы повтор, попавший в другой воркер,
+    тоже получил сохраненный ответ
+    """
+
+    async def claim(self,
+                    key: str,
+                    fingerprint: str,
+                    claimed_at: datetime,
+                    ttl_s: float,
+                    lease_s: float
+                    ) -> IdempotencyKey | None:
+        """
+        Занимает ключ под текущий запрос. None если ключ наш, иначе уже существующая запись
+        (status_code у нее пустой, пока первый запрос не закончился).
+        Незаконченную запись, занятую раньше чем lease_s назад, забираем себе: ее воркер, скорее всего,
+        упал между claim и complete. claimed_at - метка нашего захвата для complete и release
+        """
+        expires_at = claimed_at + timedelta(seconds=ttl_s)
+
+        async with self._session_getter() as session:
+            await session.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.key == key, IdempotencyKey.expires_at <= claimed_at)
+            )
+            claimed = await session.execute(
+                pg_insert(IdempotencyKey)
+                .values(key=key, fingerprint=fingerprint, claimed_at=claimed_at, expires_at=expires_at)
+                .on_conflict_do_nothing(index_elements=[IdempotencyKey.key])
+                .returning(IdempotencyKey.key)
+            )
+            if claimed.scalar_one_or_none() is not None:
+                return None
+
+            taken_over = await session.execute(
+                update(IdempotencyKey)
+                .where(
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.status_code.is_(None),
+                    IdempotencyKey.claimed_at <= claimed_at - timedelta(seconds=lease_s)
+                )
+                .values(fingerprint=fingerprint, claimed_at=claimed_at, expires_at=expires_at)
+                .returning(IdempotencyKey.key)
+            )
+            if taken_over.scalar_one_or_none() is not None:
+                return None
+
+            result = await session.execute(
+                select(IdempotencyKey).where(IdempotencyKey.key == key)
+            )
+            return result.scalar_one_or_none()
+
+    async def get(self, key: str) -> IdempotencyKey | None:
+        async with self._session_getter() as session:
+            result = await session.execute(
+                select(IdempotencyKey).where(IdempotencyKey.key == key)
+            )
+            return result.scalar_one_or_none()
+
+    async def complete(self,
+                       key: str,
+                       claimed_at: datetime,
+                       status_code: int,
+                       body: bytes,
+                       media_type: str | None
+                       ) -> None:
+        """
+        Сохраняет ответ, если ключ все еще наш: после захвата другим запросом пишет он
+        """
+        async with self._session_getter() as session:
+            await session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key, IdempotencyKey.claimed_at == claimed_at)
+                .values(status_code=status_code, body=body, media_type=media_type)
+            )
+
+    async def release(self, key: str, claimed_at: datetime) -> None:
+        """
+        Освобождает ключ, если запрос упал и ответ сохранять нельзя
+        """
+        async with self._session_getter() as session:
+            await session.execute(
+                delete(IdempotencyKey)
+                .where(
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.claimed_at == claimed_at,
+                    IdempotencyKey.status_code.is_(None)
+                )
+            )
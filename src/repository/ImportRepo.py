@@ -0,0 +1,41 @@
+from typing import Any, Callable
+from src.database import get_raw_connection
+from src.database.bulk import copy_into_staging, affected_rows
+
+
+USER_IMPORT_COLUMNS = ["id", "username", "email", "password_hash", "phone_number", "is_active", "created_at"]
+
+
+class UserImportRepo:
+    """
+    Массовая загрузка пользователей: COPY во временную таблицу и перенос в users
+    одним INSERT ... SELECT с пропуском уже существующих email
+    """
+
+    __slots__ = ('_connection_getter',)
+
+    def __init__(self, connection_getter: Callable[[], Any] = get_raw_connection) -> None:
+        self._connection_getter = connection_getter
+
+    async def load_users(self, records: list[tuple]) -> int:
+        """
+        Записи в порядке USER_IMPORT_COLUMNS. Возвращает число реально вставленных строк
+        """
+        columns = ", ".join(USER_IMPORT_COLUMNS)
+
+        async with self._connection_getter() as (conn, _):
+            async with conn.transaction():
+                await copy_into_staging(
+                    conn,
+                    source_table="asclavia_schema.users",
+                    staging_table="users_import",
+                    columns=USER_IMPORT_COLUMNS,
+                    records=records
+                )
+                status = await conn.execute(
+                    f"INSERT INTO asclavia_schema.users ({columns}) "
+                    f"SELECT DISTINCT ON (email) {columns} FROM users_import ORDER BY email "
+                    f"ON CONFLICT (email) DO NOTHING"
+                )
+
+        return affected_rows(status)
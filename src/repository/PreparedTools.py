@@ -0,0 +1,73 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Callable
+from src.database import get_raw_connection, User
+
+
+# Все запросы горячего пути авторизации. Имя выражения == имя подготовленного выражения в Postgres
+STATEMENTS: dict[str, str] = {
+    "auth_find_user_by_email": (
+        "SELECT id, username, password_hash, email, created_at, is_active, phone_number "
+        "FROM asclavia_schema.users WHERE email = $1 LIMIT 1"
+    ),
+    "auth_is_user_exists": (
+        "SELECT EXISTS (SELECT 1 FROM asclavia_schema.users WHERE email = $1)"
+    ),
+    "auth_insert_user": (
+        "INSERT INTO asclavia_schema.users "
+        "(id, username, email, password_hash, phone_number, is_active, created_at) "
+        "VALUES ($1, $2, $2, $3, $4, false, now()) "
+        "ON CONFLICT (email) DO NOTHING RETURNING id"
+    ),
+    "auth_insert_users": (
+        "INSERT INTO asclavia_schema.users "
+        "(id, username, email, password_hash, phone_number, is_active, created_at) "
+        "SELECT id, email, email, password_hash, phone_number, false, now() "
+        "FROM unnest($1::uuid[], $2::varchar[], $3::varchar[], $4::varchar[]) "
+        "AS batch (id, email, password_hash, phone_number) "
+        "ON CONFLICT (email) DO NOTHING RETURNING id, email"
+    ),
+    "auth_activate_user": (
+        "UPDATE asclavia_schema.users SET is_active = true WHERE email = $1"
+    ),
+    "auth_update_password": (
+        "UPDATE asclavia_schema.users SET password_hash = $2 WHERE id = $1"
+    ),
+}
+
+
+class PreparedStatementsTools:
+    """
+    База для репозиториев, которые ходят в asyncpg напрямую через общий пул движка,
+    минуя компиляцию выражений ORM и обработку результата.
+    Выражения готовятся один раз на соединение и кэшируются в его info.
+    """
+
+    __slots__ = ('_connection_getter',)
+
+    _info_key = "auth_prepared_statements"
+
+    def __init__(self, connection_getter: Callable[[], Any] = get_raw_connection) -> None:
+        """
+        :connection_getter Нужно передать контекстный менеджер, отдающий (asyncpg соединение, info)
+        """
+        self._connection_getter = connection_getter
+
+    @asynccontextmanager
+    async def _statement(self, name: str) -> AsyncGenerator[Any, None]:
+        async with self._connection_getter() as (conn, info):
+            prepared: dict[str, Any] = info.setdefault(self._info_key, {})
+
+            if name not in prepared:
+                prepared[name] = await conn.prepare(STATEMENTS[name], name=name)
+
+            yield prepared[name]
+
+    async def find_user_by_email(self, email: str) -> User | None:
+        async with self._statement("auth_find_user_by_email") as stmt:
+            row = await stmt.fetchrow(email)
+
+        if row is None:
+            return None
+
+        # Отдаем несвязанный с сессией объект, чтобы сервисы не замечали разницы с ORM путем
+        return User(**dict(row))
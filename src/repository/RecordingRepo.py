@@ -0,0 +1,58 @@
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import select, update, func
+from src.database import CDR
+from .interface import TablesRepositoryInterface
+
+
+class RecordingRepo(TablesRepositoryInterface):
+    async def find_recording(self,
+                             cdr_id: UUID,
+                             user_id: str
+                             ) -> tuple[str, int | None] | None:
+        """
+        recording_path и размер записи в колонке record (None, если колонка пустая).
+        Сама запись не читается. None если такого звонка у пользователя нет
+        """
+        async with self._session_getter() as session:
+            result = await session.execute(
+                select(CDR.recording_path, func.octet_length(CDR.record))
+                .where(CDR.id == cdr_id, CDR.user_id == user_id)
+            )
+            row = result.one_or_none()
+        return None if row is None else (row[0], row[1])
+
+    async def read_record(self, cdr_id: UUID, start: int, length: int) -> bytes:
+        """
+        Кусок записи из колонки record, вырезается на стороне базы
+        """
+        async with self._session_getter() as session:
+            result = await session.execute(
+                select(func.substring(CDR.record, start + 1, length)).where(CDR.id == cdr_id)
+            )
+            return result.scalar_one()
+
+    async def records_to_move(self, limit: int) -> list[tuple[UUID, datetime, bytes]]:
+        """
+        Следующие limit записей, которые еще лежат в колонке record: (id, start_time, record)
+        """
+        async with self._session_getter() as session:
+            result = await session.execute(
+                select(CDR.id, CDR.start_time, CDR.record).where(CDR.record.is_not(None)).limit(limit)
+            )
+            return [tuple(row) for row in result]
+
+    async def mark_moved(self, moved: dict[tuple[UUID, datetime], str]) -> None:
+        """
+        :moved первичный ключ звонка (id, start_time) -> recording_path в файловом хранилище.
+        Колонка record очищается
+        """
+        async with self._session_getter() as session:
+            # Обновление по первичному ключу списком параметров уходит одним executemany
+            await session.execute(
+                update(CDR),
+                [
+                    {"id": cdr_id, "start_time": start_time, "recording_path": recording_path, "record": None}
+                    for (cdr_id, start_time), recording_path in moved.items()
+                ]
+            )
@@ -1,7 +1,9 @@
 from .interface import TablesRepositoryInterface
 from .CommonTools import CommonTools
 from src.database import User
-from sqlalchemy import insert, update, select, exists
+from sqlalchemy import update, select, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+import uuid
 from datetime import datetime, timezone
 
 
@@ -10,19 +12,52 @@ class RegistrationRepo(TablesRepositoryInterface, CommonTools):
                        email: str,
                        phone_num: str,
                        password_hash: str
-                       ) -> str:
+                       ) -> str | None:
+        """
+        Возвращает id созданного пользователя или None, если email уже занят
+        """
         async with self._session_getter() as session:
             result = await session.execute(
-                insert(User).values(
+                pg_insert(User).values(
                     username=email,
                     email=email,
                     password_hash=password_hash,
                     phone_number=phone_num,
                     is_active=False,
                     created_at=datetime.now(timezone.utc)
-                ).returning(User.id)
+                )
+                .on_conflict_do_nothing(index_elements=[User.email])
+                .returning(User.id)
+            )
+            return result.scalar_one_or_none()
+
+    async def add_users(self,
+                        users: list[tuple[str, str, str]]
+                        ) -> dict[str, str]:
+        """
+        Вставляет пользователей (email, телефон, хэш пароля) одним запросом.
+        Уже существующие email пропускаются, возвращает {email: id} только для созданных
+        """
+        created_at = datetime.now(timezone.utc)
+
+        async with self._session_getter() as session:
+            result = await session.execute(
+                pg_insert(User).values([
+                    {
+                        "id": uuid.uuid4(),
+                        "username": email,
+                        "email": email,
+                        "password_hash": password_hash,
+                        "phone_number": phone_num,
+                        "is_active": False,
+                        "created_at": created_at
+                    }
+                    for email, phone_num, password_hash in users
+                ])
+                .on_conflict_do_nothing(index_elements=[User.email])
+                .returning(User.id, User.email)
             )
-            return result.scalar_one()
+            return {email: user_id for user_id, email in result.all()}
 
     async def make_users_email_verified(self,
                                         email: str
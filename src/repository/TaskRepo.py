@@ -0,0 +1,22 @@
+from uuid import UUID
+from sqlalchemy import select
+from src.database import Task
+from src.database.loading import loading_profile
+from .interface import TablesRepositoryInterface
+
+
+class TaskRepo(TablesRepositoryInterface):
+    async def list_tasks(self, user_id: UUID, profile: str = "list", limit: int = 100) -> list[Task]:
+        """
+        Задачи пользователя от новых к старым. Связи грузятся по профилю из src/database/loading.py,
+        на все задачи уходит фиксированное число запросов
+        """
+        async with self._session_getter() as session:
+            result = await session.execute(
+                select(Task)
+                .options(*loading_profile(Task, profile))
+                .where(Task.user_id == user_id)
+                .order_by(Task.created_at.desc(), Task.id.desc())
+                .limit(limit)
+            )
+            return list(result.scalars().unique())
@@ -0,0 +1,18 @@
+from uuid import UUID
+from sqlalchemy import select
+from src.database import Template
+from src.database.loading import loading_profile
+from .interface import TablesRepositoryInterface
+
+
+class TemplateRepo(TablesRepositoryInterface):
+    async def list_templates(self, user_id: UUID, profile: str = "list", limit: int = 100) -> list[Template]:
+        async with self._session_getter() as session:
+            result = await session.execute(
+                select(Template)
+                .options(*loading_profile(Template, profile))
+                .where(Template.user_id == user_id)
+                .order_by(Template.created_at.desc(), Template.id.desc())
+                .limit(limit)
+            )
+            return list(result.scalars().unique())
@@ -1,3 +1,15 @@
 from .LoginRepo import LoginRepo
 from .RegistrationRepo import RegistrationRepo
 from .RecoveryRepo import RecoveryRepo
+from .FastPathRepo import FastLoginRepo, FastRegistrationRepo, FastRecoveryRepo
+from .ImportRepo import UserImportRepo
+from .ExportRepo import UserExportRepo
+from .IdempotencyRepo import IdempotencyRepo
+from .AccountDeletionRepo import AccountDeletionRepo, DELETION_STEPS
+from .RecordingRepo import RecordingRepo
+from .CDRImportRepo import CDRImportRepo, CDR_IMPORT_COLUMNS
+from .BillingRepo import BillingRepo, BillingSnapshot
+from .BalanceRepo import BalanceRepo
+from .HistoryRepo import HistoryRepo
+from .TaskRepo import TaskRepo
+from .TemplateRepo import TemplateRepo
@@ -0,0 +1,94 @@
+"""
+Боевой запуск: несколько процессов uvicorn (pre-fork, один слушающий сокет на всех),
+uvloop и httptools.
+
+    python -m src.runner
+
+Число воркеров берется из WEB_WORKERS (0 - по числу ядер). Пул соединений базы делится между
+воркерами так, чтобы в сумме не выйти за max_connections Postgres, ядра - между потоками bcrypt
+и процессами хэширования пакетов всех воркеров, лимиты аккаунтов SMTP - так, чтобы в сумме
+не выйти за лимит аккаунта.
+"""
+import os
+from dataclasses import dataclass
+
+from src.config import configuration
+from src.logger import app_logger, setup_logging
+
+
+@dataclass(frozen=True)
+class WorkerPlan:
+    workers: int
+    db_pool_size: int
+    db_max_overflow: int
+    hash_workers: int
+    batch_hash_processes: int
+
+
+def plan_workers(workers: int,
+                 db_max_connections: int,
+                 db_reserved_connections: int,
+                 cpu_count: int,
+                 batch_hash_processes: int = 2) -> WorkerPlan:
+    per_worker = (db_max_connections - db_reserved_connections) // workers
+    if per_worker < 1:
+        raise ValueError(
+            f"{workers} воркеров не помещаются в {db_max_connections} соединений Postgres "
+            f"(из них {db_reserved_connections} в резерве)"
+        )
+
+    # Половину бюджета держим в пуле постоянно, остальное отдаем на всплески
+    pool_size = max(1, per_worker // 2)
+
+    # Процессы пакетного хэширования занимают ядра из доли воркера наравне с потоками bcrypt,
+    # но не больше половины доли: логин и одиночная регистрация важнее
+    cpu_share = max(1, cpu_count // workers)
+    batch_processes = max(1, min(batch_hash_processes, cpu_share // 2))
+
+    return WorkerPlan(
+        workers=workers,
+        db_pool_size=pool_size,
+        db_max_overflow=per_worker - pool_size,
+        hash_workers=max(1, cpu_share - batch_processes),
+        batch_hash_processes=batch_processes
+    )
+
+
+def run() -> None:
+    setup_logging()
+    import uvicorn
+
+    server = configuration.server
+    plan = plan_workers(
+        workers=server.workers,
+        db_max_connections=server.db_max_connections,
+        db_reserved_connections=server.db_reserved_connections,
+        cpu_count=os.cpu_count() or 1,
+        batch_hash_processes=configuration.batch_registration.hash_processes
+    )
+
+    # Воркеры стартуют отдельными процессами и читают эти значения из окружения
+    os.environ["DB_POOL_SIZE"] = str(plan.db_pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(plan.db_max_overflow)
+    os.environ["HASH_WORKERS"] = str(plan.hash_workers)
+    os.environ["BATCH_HASH_PROCESSES"] = str(plan.batch_hash_processes)
+    # Фактическое число воркеров: по нему делятся лимиты отправки почты (SMTPParams.rate_shares)
+    os.environ["WEB_WORKERS"] = str(plan.workers)
+
+    app_logger.info("Запуск: %s", plan)
+
+    uvicorn.run(
+        "main:main",
+        factory=True,
+        host=server.host,
+        port=server.port,
+        workers=plan.workers,
+        loop=server.loop,
+        http=server.http,
+        timeout_graceful_shutdown=server.graceful_shutdown_s,
+        access_log=False
+    )
+
+
+if __name__ == "__main__":
+    run()
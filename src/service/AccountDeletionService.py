@@ -0,0 +1,76 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from src.config import configuration
+from src.container import container
+from src.logger import app_logger
+from src.repository import AccountDeletionRepo, DELETION_STEPS
+
+# SQLSTATE lock_not_available: пачка не дождалась блокировки за lock_timeout
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def get_account_deletion_service() -> "AccountDeletionService":
+    return container.resolve("account_deletion_service")
+
+
+@dataclass
+class DeletionReport:
+    user_id: UUID
+    deleted: dict[str, int] = field(default_factory=dict)
+    user_deleted: bool = False
+    elapsed_s: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(self.deleted.values()) + int(self.user_deleted)
+
+
+class AccountDeletionService:
+    def __init__(self, repo: AccountDeletionRepo) -> None:
+        self._repo = repo
+        self._params = configuration.account_deletion
+
+    async def delete_account(self, user_id: UUID) -> DeletionReport:
+        """
+        Удаляет все данные пользователя по таблицам из DELETION_STEPS пачками, затем самого пользователя.
+        Прерванное удаление можно просто запустить снова: уже удаленное повторно не ищется
+        """
+        report = DeletionReport(user_id=user_id)
+        started = time.perf_counter()
+
+        for table, condition in DELETION_STEPS:
+            table_started = time.perf_counter()
+            deleted = 0
+            while True:
+                batch = await self._with_lock_retries(
+                    table, lambda: self._repo.delete_batch(table, condition, user_id, self._params.batch_size)
+                )
+                deleted += batch
+                if batch < self._params.batch_size:
+                    break
+                app_logger.info("Пользователь %s: %s удалено %d строк...", user_id, table, deleted)
+                await asyncio.sleep(self._params.pause_s)
+
+            report.deleted[table] = deleted
+            if deleted:
+                app_logger.info(
+                    "Пользователь %s: %s удалено %d строк за %.2f с",
+                    user_id, table, deleted, time.perf_counter() - table_started
+                )
+
+        report.user_deleted = await self._with_lock_retries("users", lambda: self._repo.delete_user(user_id))
+        report.elapsed_s = time.perf_counter() - started
+        return report
+
+    async def _with_lock_retries(self, table: str, call):
+        for attempt in range(self._params.lock_retries + 1):
+            try:
+                return await call()
+            except Exception as exc:
+                if getattr(exc, "sqlstate", None) != LOCK_NOT_AVAILABLE or attempt == self._params.lock_retries:
+                    raise
+                app_logger.warning("%s: строки заняты другой транзакцией, повтор %d", table, attempt + 1)
+                await asyncio.sleep(self._params.pause_s * 2 ** attempt)
@@ -0,0 +1,73 @@
+from uuid import UUID
+
+from src.config import configuration
+from src.container import container
+from src.logger import app_logger
+from src.models import BalanceResponse
+from src.repository import BalanceRepo
+from src.utils.TTLCache import TTLCache
+
+
+def get_balance_service() -> "BalanceService":
+    return container.resolve("balance_service")
+
+
+class BalanceService:
+    def __init__(self, repo: BalanceRepo, cache: TTLCache | None = None) -> None:
+        self._repo = repo
+        params = configuration.balance
+        # user_id -> баланс. Значения кладутся из ответов базы после каждого изменения,
+        # время жизни ограничивает отставание от изменений в других процессах
+        self._cache = cache or TTLCache(params.cache_size, params.cache_ttl_s)
+
+    async def get_balance(self, user_id: UUID) -> int:
+        value = self._cache.get(user_id)
+        if value is None:
+            value = await self._repo.get_balance(user_id)
+            self._cache.set(user_id, value)
+        return value
+
+    async def get_balance_response(self, user_id: str) -> BalanceResponse:
+        return BalanceResponse.model_construct(value=await self.get_balance(UUID(user_id)))
+
+    async def credit(self, user_id: UUID, value: int) -> int:
+        """
+        Пополняет баланс на value > 0. Списания идут только через try_debit, с проверкой остатка
+        """
+        if value <= 0:
+            raise ValueError(f"Сумма пополнения должна быть положительной, получено {value}")
+
+        balance = await self._repo.credit(user_id, value)
+        self._cache.set(user_id, balance)
+        return balance
+
+    async def try_debit(self, user_id: UUID, amount: int) -> bool:
+        """
+        Проверка перед звонком: списывает amount, если хватает денег. Решает база, а не кэш,
+        так два параллельных звонка не потратят одни и те же деньги.
+        Отрицательная сумма прошла бы проверку остатка и пополнила бы баланс, поэтому только amount > 0
+        """
+        if amount <= 0:
+            raise ValueError(f"Сумма списания должна быть положительной, получено {amount}")
+
+        balance = await self._repo.debit(user_id, amount)
+        if balance is None:
+            # Денег меньше amount, но сколько именно - не знаем
+            self._cache.invalidate(user_id)
+            return False
+
+        self._cache.set(user_id, balance)
+        return True
+
+    async def reconcile(self, repair: bool = False) -> tuple[int, int]:
+        """
+        Сверяет user_balance с суммой журнала balance. Возвращает (расхождений, исправлено)
+        """
+        mismatches = [mismatch async for mismatch in self._repo.find_mismatches()]
+        repaired = 0
+        for user_id, materialized, ledger in mismatches:
+            app_logger.warning("Баланс %s: в user_balance %d, по журналу %d", user_id, materialized, ledger)
+            if repair:
+                self._cache.set(user_id, await self._repo.repair(user_id))
+                repaired += 1
+        return len(mismatches), repaired
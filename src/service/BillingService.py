@@ -0,0 +1,112 @@
+import time
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from src.config import configuration
+from src.container import container
+from src.logger import app_logger
+from src.repository import BillingRepo
+
+
+def get_billing_service() -> "BillingService":
+    return container.resolve("billing_service")
+
+
+class UsageAggregator:
+    """
+    Суммы по пользователям в массивах длины n_users: пачка строк складывается через np.bincount
+    по номеру пользователя, без цикла по строкам в Python. Память не зависит от числа строк
+    """
+
+    def __init__(self, n_users: int) -> None:
+        self.n_users = n_users
+        self.minutes = np.zeros(n_users, dtype=np.float64)
+        self.messages = np.zeros(n_users, dtype=np.float64)
+        self.amount = np.zeros(n_users, dtype=np.float64)
+        self.calls = 0
+        self.dialogs = 0
+
+    def add_calls(self, codes: np.ndarray, durations: np.ndarray, prices: np.ndarray) -> None:
+        """
+        :durations в секундах, каждый звонок тарифицируется целыми минутами с округлением вверх
+        """
+        self.minutes += np.bincount(codes, weights=np.ceil(durations / 60.0), minlength=self.n_users)
+        self.amount += np.bincount(codes, weights=prices, minlength=self.n_users)
+        self.calls += len(codes)
+
+    def add_dialogs(self, codes: np.ndarray, messages: np.ndarray, prices: np.ndarray) -> None:
+        self.messages += np.bincount(codes, weights=messages, minlength=self.n_users)
+        self.amount += np.bincount(codes, weights=prices, minlength=self.n_users)
+        self.dialogs += len(codes)
+
+    def active_users(self) -> np.ndarray:
+        return np.flatnonzero((self.minutes > 0) | (self.messages > 0) | (self.amount != 0))
+
+
+def _columns(rows: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    count = len(rows)
+    return (
+        np.fromiter((row[0] for row in rows), dtype=np.intp, count=count),
+        np.fromiter((row[1] for row in rows), dtype=np.float64, count=count),
+        np.fromiter((row[2] for row in rows), dtype=np.float64, count=count),
+    )
+
+
+@dataclass
+class BillingReport:
+    period: tuple[date, date]
+    calls: int = 0
+    dialogs: int = 0
+    bills: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def rows_per_s(self) -> float:
+        return (self.calls + self.dialogs) / self.elapsed_s if self.elapsed_s else 0.0
+
+
+class BillingService:
+    def __init__(self, repo: BillingRepo) -> None:
+        self._repo = repo
+        self._params = configuration.billing
+
+    async def generate_bills(self, start: date, end: date) -> BillingReport:
+        """
+        Считает счета за период [start, end) по звонкам и диалогам и заменяет ими счета этого периода.
+        amount - сумма price звонков и диалогов, total = amount * rates
+        """
+        report = BillingReport(period=(start, end))
+        started = time.perf_counter()
+
+        async with self._repo.snapshot(start, end) as snapshot:
+            usage = UsageAggregator(len(snapshot.user_ids))
+
+            async for rows in snapshot.stream_calls(self._params.chunk_rows):
+                usage.add_calls(*_columns(rows))
+                app_logger.info("Биллинг %s..%s: звонков %d", start, end, usage.calls)
+
+            async for rows in snapshot.stream_dialogs(self._params.chunk_rows):
+                usage.add_dialogs(*_columns(rows))
+                app_logger.info("Биллинг %s..%s: диалогов %d", start, end, usage.dialogs)
+
+            user_ids = snapshot.user_ids
+
+        rate = self._params.rate
+        active = usage.active_users()
+        bills = [
+            (user_ids[code], amount, int(minutes), int(messages), rate, amount * rate)
+            for code, amount, minutes, messages in zip(
+                active.tolist(),
+                usage.amount[active].tolist(),
+                usage.minutes[active].tolist(),
+                usage.messages[active].tolist()
+            )
+        ]
+        report.bills = await self._repo.replace_bills(start, end, bills)
+
+        report.calls = usage.calls
+        report.dialogs = usage.dialogs
+        report.elapsed_s = time.perf_counter() - started
+        return report
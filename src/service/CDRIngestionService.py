@@ -0,0 +1,232 @@
+import asyncio
+import csv
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable
+from uuid import UUID
+
+import orjson
+
+from src.config import configuration
+from src.container import container
+from src.logger import app_logger
+from src.models import CDRImportReport
+from src.repository import CDRImportRepo
+from src.utils.TTLCache import TTLCache
+
+
+def get_cdr_ingestion_service() -> "CDRIngestionService":
+    return container.resolve("cdr_ingestion_service")
+
+
+def normalize_caller_id(value: str) -> str:
+    """
+    '"Иван" <+79001234567>' -> '79001234567': номер из угловых скобок без плюса,
+    в таком виде хранятся телефоны пользователей
+    """
+    value = value.strip()
+    if value.endswith(">") and "<" in value:
+        value = value[value.rindex("<") + 1:-1]
+    return value.strip().lstrip("+")
+
+
+# Границы колонок cdr: строка за ними уронила бы COPY всей пачки, а не только себя
+_MAX_VARCHAR = 255
+_MAX_INT4 = 2 ** 31 - 1
+
+
+def _varchar(value: str, name: str) -> str:
+    if len(value) > _MAX_VARCHAR:
+        raise ValueError(f"{name}: длиннее {_MAX_VARCHAR} символов")
+    return value
+
+
+def _duration(value: str) -> int:
+    duration = int(float(value))
+    if not 0 <= duration <= _MAX_INT4:
+        raise ValueError(f"duration вне диапазона: {duration}")
+    return duration
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.strip())
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _field(row: dict, *names: str) -> str:
+    for name in names:
+        value = row.get(name)
+        if value not in (None, ""):
+            return str(value)
+    raise KeyError(names[0])
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Режет поток байт (тело запроса) на строки, не собирая его целиком
+    """
+    tail = b""
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.decode("utf-8")
+    if tail:
+        yield tail.decode("utf-8")
+
+
+async def parse_rows(lines: AsyncIterable[str], fmt: str) -> AsyncIterator[dict | str]:
+    """
+    CSV с заголовком в словари, JSONL - строками как есть: их разбирает _prepare_batch,
+    чтобы битая строка отбрасывалась одна, а не обрывала загрузку. Пустые строки пропускаются
+    """
+    header = None
+    async for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        if fmt == "jsonl":
+            yield line
+        elif header is None:
+            header = next(csv.reader([line]))
+        else:
+            yield dict(zip(header, next(csv.reader([line]))))
+
+
+_MISSING = object()
+
+
+class CallerIdCache:
+    """
+    caller_id -> user_id с ограничением по размеру и времени жизни. Помнит и номера без владельца,
+    чтобы каждый звонок с неизвестного номера не ходил в базу
+    """
+
+    def __init__(self,
+                 max_size: int,
+                 ttl_s: float,
+                 clock: Callable[[], float] = time.monotonic
+                 ) -> None:
+        self._entries = TTLCache(max_size, ttl_s, clock)
+
+    async def resolve(self,
+                      caller_ids: set[str],
+                      load: Callable[[list[str]], Awaitable[dict[str, UUID]]]
+                      ) -> dict[str, UUID | None]:
+        """
+        Владельцы всех caller_ids. Тех, кого нет в кэше, load находит одним запросом
+        """
+        resolved = {}
+        missing = []
+        for caller_id in caller_ids:
+            # None в кэше - номер без владельца, поэтому промах отличаем отдельным маркером
+            user_id = self._entries.get(caller_id, _MISSING)
+            if user_id is _MISSING:
+                missing.append(caller_id)
+            else:
+                resolved[caller_id] = user_id
+
+        if missing:
+            found = await load(missing)
+            for caller_id in missing:
+                resolved[caller_id] = found.get(caller_id)
+                self._entries.set(caller_id, resolved[caller_id])
+
+        return resolved
+
+
+class CDRIngestionService:
+    def __init__(self,
+                 repo: CDRImportRepo,
+                 callers: CallerIdCache | None = None
+                 ) -> None:
+        self._repo = repo
+        self._params = configuration.cdr_ingestion
+        self._callers = callers or CallerIdCache(
+            max_size=self._params.caller_cache_size,
+            ttl_s=self._params.caller_cache_ttl_s
+        )
+
+    async def ingest(self,
+                     rows: AsyncIterable[dict | str],
+                     batch_size: int | None = None
+                     ) -> CDRImportReport:
+        """
+        Грузит CDR пачками. Пока одна пачка идет через COPY, следующая уже читается и разбирается.
+        Звонки с неизвестного номера и неразобранные строки пропускаются и считаются в отчете
+        """
+        batch_size = batch_size or self._params.batch_size
+        report = CDRImportReport()
+        started = time.perf_counter()
+        loading: asyncio.Task | None = None
+        batch = []
+
+        try:
+            async for row in rows:
+                batch.append(row)
+                if len(batch) < batch_size:
+                    continue
+
+                records = await self._prepare_batch(batch, report)
+                if loading is not None:
+                    await loading
+                loading = asyncio.create_task(self._load(records, report, started))
+                batch = []
+
+            records = await self._prepare_batch(batch, report) if batch else []
+            if loading is not None:
+                await loading
+            if records:
+                await self._load(records, report, started)
+        finally:
+            if loading is not None and not loading.done():
+                loading.cancel()
+
+        report.elapsed_s = time.perf_counter() - started
+        report.rows_per_s = report.rows / report.elapsed_s if report.elapsed_s else 0.0
+        return report
+
+    async def _prepare_batch(self, rows: list[dict | str], report: CDRImportReport) -> list[tuple]:
+        parsed = []
+        for row in rows:
+            try:
+                if isinstance(row, str):
+                    row = orjson.loads(row)
+                if not isinstance(row, dict):
+                    raise TypeError(f"строка не объект: {type(row).__name__}")
+                parsed.append((
+                    _varchar(_field(row, "uniqueid"), "uniqueid"),
+                    _varchar(normalize_caller_id(_field(row, "caller_id", "src", "clid")), "caller_id"),
+                    _parse_time(_field(row, "start_time", "start")),
+                    _parse_time(_field(row, "end_time", "end")),
+                    _varchar(_field(row, "disposition"), "disposition"),
+                    _duration(_field(row, "duration", "billsec")),
+                    str(row.get("recording_path") or ""),
+                ))
+            except (KeyError, ValueError, TypeError, OverflowError) as exc:
+                report.rejected += 1
+                app_logger.warning("Строка CDR пропущена: %r", exc)
+        report.rows += len(rows)
+
+        owners = await self._callers.resolve({record[1] for record in parsed}, self._repo.find_users_by_caller_ids)
+
+        records = []
+        for record in parsed:
+            user_id = owners[record[1]]
+            if user_id is None:
+                report.unknown_caller += 1
+                continue
+            # id генерируем сами: у колонки default один и тот же uuid на весь процесс
+            records.append((uuid.uuid4(), *record, user_id))
+        return records
+
+    async def _load(self, records: list[tuple], report: CDRImportReport, started: float) -> None:
+        inserted = await self._repo.load_cdrs(records)
+        report.inserted += inserted
+        report.duplicates += len(records) - inserted
+        app_logger.info(
+            "CDR: прочитано %d строк (вставлено %d, дублей %d, неизвестных номеров %d, невалидных %d), %.0f строк/с",
+            report.rows, report.inserted, report.duplicates, report.unknown_caller, report.rejected,
+            report.rows / (time.perf_counter() - started)
+        )
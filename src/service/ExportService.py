@@ -0,0 +1,52 @@
+import csv
+import io
+from typing import AsyncGenerator
+
+import orjson
+
+from src.models import UserExportFilter
+from src.repository import UserExportRepo
+from src.container import container
+
+EXPORT_FIELDS = ("id", "username", "email", "phone_number", "is_active", "created_at")
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def get_export_service() -> "ExportService":
+    return container.resolve("export_service")
+
+
+class ExportService:
+    def __init__(self, repo: UserExportRepo) -> None:
+        self._repo = repo
+
+    async def export_users(self,
+                           filters: UserExportFilter,
+                           fmt: str = "ndjson",
+                           chunk_size: int = 5000
+                           ) -> AsyncGenerator[bytes, None]:
+        """
+        Выгружает пользователей в NDJSON или CSV. Каждая пачка из базы сразу
+        превращается в байты и отдается наружу, поэтому память не растет с размером таблицы
+        """
+        if fmt == "csv":
+            yield self._encode_csv([EXPORT_FIELDS])
+
+        async for rows in self._repo.stream_users(filters, chunk_size=chunk_size):
+            if fmt == "csv":
+                yield self._encode_csv(rows)
+            else:
+                yield b"".join(orjson.dumps(dict(zip(EXPORT_FIELDS, row))) + b"\n" for row in rows)
+
+    @staticmethod
+    def _encode_csv(rows: list[tuple]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(
+            [value.isoformat() if hasattr(value, "isoformat") else value for value in row]
+            for row in rows
+        )
+        return buffer.getvalue().encode()
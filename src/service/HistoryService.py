@@ -0,0 +1,69 @@
+from datetime import date, datetime
+from typing import Any, Callable
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from src.container import container
+from src.models import DialogItem, DialogPage, CallItem, CallPage, TaskItem, TaskPage
+from src.repository import HistoryRepo
+from src.utils.KeysetCursor import InvalidCursor, decode_cursor, encode_cursor
+
+
+def get_history_service() -> "HistoryService":
+    return container.resolve("history_service")
+
+
+class HistoryService:
+    def __init__(self, repo: HistoryRepo) -> None:
+        self._repo = repo
+
+    async def list_dialogs(self, user_id: str, cursor: str | None, limit: int) -> DialogPage:
+        return await self._page(
+            self._repo.list_dialogs, user_id, cursor, limit,
+            parse_key=datetime.fromisoformat, sort_key="created_at", item=DialogItem, page=DialogPage
+        )
+
+    async def list_calls(self, user_id: str, cursor: str | None, limit: int) -> CallPage:
+        return await self._page(
+            self._repo.list_calls, user_id, cursor, limit,
+            parse_key=datetime.fromisoformat, sort_key="call_time", item=CallItem, page=CallPage
+        )
+
+    async def list_tasks(self, user_id: str, cursor: str | None, limit: int) -> TaskPage:
+        return await self._page(
+            self._repo.list_tasks, user_id, cursor, limit,
+            parse_key=date.fromisoformat, sort_key="created_at", item=TaskItem, page=TaskPage
+        )
+
+    @staticmethod
+    async def _page(fetch: Callable[..., Any],
+                    user_id: str,
+                    cursor: str | None,
+                    limit: int,
+                    parse_key: Callable[[str], Any],
+                    sort_key: str,
+                    item: type[BaseModel],
+                    page: type[BaseModel]
+                    ) -> Any:
+        try:
+            after = decode_cursor(cursor, parse_key) if cursor else None
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor is invalid"
+            )
+
+        # Лишняя строка только показывает, есть ли следующая страница
+        rows = await fetch(UUID(user_id), limit + 1, after)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][sort_key], rows[-1]["id"])
+
+        # Строки пришли из базы с типами колонок, валидация ничего не добавит
+        return page.model_construct(
+            items=[item.model_construct(**dict(row)) for row in rows],
+            next_cursor=next_cursor
+        )
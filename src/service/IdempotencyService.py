@@ -0,0 +1,174 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+import orjson
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from starlette.responses import Response
+
+from src.config import configuration
+from src.container import container
+from src.repository import IdempotencyRepo
+from src.utils.Idempotency import IdempotencyCache, StoredResponse, open_body, request_fingerprint, seal_body
+
+
+def get_idempotency_service() -> "IdempotencyService":
+    return container.resolve("idempotency_service")
+
+
+class IdempotencyService:
+    def __init__(self,
+                 cache: IdempotencyCache,
+                 repo: IdempotencyRepo | None = None
+                 ) -> None:
+        self._cache = cache
+        self._repo = repo
+        self._params = configuration.idempotency
+
+    async def execute(self,
+                      key: str | None,
+                      scope: str,
+                      payload: BaseModel,
+                      call: Callable[[], Awaitable[Response]]
+                      ) -> Response:
+        """
+        Выполняет call один раз на ключ. Повтор с тем же ключом и телом получает сохраненный ответ,
+        с тем же ключом и другим телом - 422. Повтор, пришедший пока первый запрос еще в работе, ждет его.
+        Ответы 5xx и упавшие запросы не сохраняются, их можно повторить
+        """
+        if key is None:
+            return await call()
+
+        if not key or len(key) > self._params.max_key_length:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Idempotency-Key is invalid"
+            )
+
+        cache_key = f"{scope}:{key}"
+        fingerprint = request_fingerprint(payload.model_dump(mode="json"))
+
+        while True:
+            stored = self._cache.get(cache_key)
+            if stored is not None:
+                return self._replay(stored, fingerprint)
+
+            pending = self._cache.in_flight(cache_key)
+            if pending is None:
+                break
+
+            done, _ = await asyncio.wait([pending], timeout=self._params.wait_timeout_s)
+            if not done:
+                self._raise_in_progress()
+
+        self._cache.begin(cache_key)
+        try:
+            claimed_at = None
+            if self._repo is not None:
+                claimed_at, stored = await self._claim(cache_key, fingerprint)
+                if stored is not None:
+                    self._cache.put(cache_key, stored)
+                    return self._replay(stored, fingerprint)
+
+            return await self._run_and_store(cache_key, claimed_at, fingerprint, call)
+        finally:
+            self._cache.finish(cache_key)
+
+    async def _run_and_store(self,
+                             cache_key: str,
+                             claimed_at: datetime | None,
+                             fingerprint: str,
+                             call: Callable[[], Awaitable[Response]]
+                             ) -> Response:
+        try:
+            response = await call()
+        except HTTPException as exc:
+            if exc.status_code >= 500:
+                await self._release(cache_key, claimed_at)
+                raise
+            # Тело такое же, как у стандартного обработчика HTTPException в FastAPI
+            await self._store(cache_key, claimed_at, StoredResponse(
+                fingerprint=fingerprint,
+                status_code=exc.status_code,
+                body=orjson.dumps({"detail": exc.detail}),
+                media_type="application/json"
+            ))
+            raise
+        except BaseException:
+            await self._release(cache_key, claimed_at)
+            raise
+
+        if response.status_code >= 500:
+            await self._release(cache_key, claimed_at)
+        else:
+            await self._store(cache_key, claimed_at, StoredResponse(
+                fingerprint=fingerprint,
+                status_code=response.status_code,
+                body=bytes(response.body),
+                media_type=response.media_type
+            ))
+        return response
+
+    async def _claim(self, cache_key: str, fingerprint: str) -> tuple[datetime, StoredResponse | None]:
+        """
+        Занимает ключ в таблице и возвращает метку захвата. Если ключ занял другой воркер, ждет его ответ.
+        Пока ждем, ключ могут освободить (первый запрос упал) или бросить (воркер умер) - тогда
+        его занимаем мы, а не выполняем запрос без захвата, иначе его выполнят два воркера
+        """
+        waited = 0.0
+        while True:
+            claimed_at = datetime.now(timezone.utc)
+            row = await self._repo.claim(
+                cache_key, fingerprint, claimed_at,
+                ttl_s=self._params.ttl_s,
+                lease_s=self._params.wait_timeout_s
+            )
+            if row is None:
+                return claimed_at, None
+
+            if row.status_code is not None:
+                return claimed_at, StoredResponse(
+                    fingerprint=row.fingerprint,
+                    status_code=row.status_code,
+                    body=open_body(row.body),
+                    media_type=row.media_type
+                )
+
+            if waited >= self._params.wait_timeout_s:
+                self._raise_in_progress()
+            await asyncio.sleep(self._params.poll_interval_s)
+            waited += self._params.poll_interval_s
+
+    async def _store(self, cache_key: str, claimed_at: datetime | None, stored: StoredResponse) -> None:
+        self._cache.put(cache_key, stored)
+        if self._repo is not None:
+            await self._repo.complete(
+                cache_key, claimed_at, stored.status_code, seal_body(stored.body), stored.media_type
+            )
+
+    async def _release(self, cache_key: str, claimed_at: datetime | None) -> None:
+        if self._repo is not None:
+            await self._repo.release(cache_key, claimed_at)
+
+    @staticmethod
+    def _replay(stored: StoredResponse, fingerprint: str) -> Response:
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail="Idempotency-Key was already used with a different request"
+            )
+
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type=stored.media_type,
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    @staticmethod
+    def _raise_in_progress() -> None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress"
+        )
@@ -1,11 +1,12 @@
 from src.repository import LoginRepo
+from src.container import container
 from src.models import LoginData, LoginResponse
 from src.utils import PasswordManager, JWTManager
 from fastapi import HTTPException, status
 
 
 def get_login_service() -> "LoginService":
-    return LoginService(repository=LoginRepo())
+    return container.resolve("login_service")
 
 
 class LoginService:
@@ -22,7 +23,7 @@ class LoginService:
                 detail="No such user"
             )
 
-        password_check_result = PasswordManager.verify_password(
+        password_check_result = await PasswordManager.verify_password_async(
             login_data.password, user_data.password_hash
         )
 
@@ -31,7 +32,8 @@ class LoginService:
                 user_index=str(user_data.id),
                 email=user_data.email
             )
-            return LoginResponse(
+            # Токены мы только что сгенерировали сами, валидировать их незачем
+            return LoginResponse.model_construct(
                 access_token=tokens["access"],
                 refresh_token=tokens["refresh"]
             )
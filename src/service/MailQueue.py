@@ -0,0 +1,93 @@
+import asyncio
+import contextvars
+from functools import cache
+from src.config import configuration
+from src.container import container
+from src.logger import mail_logger, request_id_var
+from .MailService import MailService
+
+
+class MailQueue:
+    """
+    Фоновая отправка писем: запрос только ставит письмо в очередь,
+    а воркеры отправляют его через MailService с повторами.
+    Воркеры стартуют при первой постановке в очередь в текущем event loop.
+    """
+
+    def __init__(self,
+                 mail_service: MailService | None = None,
+                 workers: int = 4,
+                 maxsize: int = 10000) -> None:
+        self._mail_service = mail_service or MailService()
+        self._workers = workers
+        self._maxsize = maxsize
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._maxsize)
+            # Воркер, созданный внутри запроса, иначе унаследует его контекст (request_id и scope контейнера)
+            self._tasks = [
+                asyncio.create_task(self._worker(), context=contextvars.Context())
+                for _ in range(self._workers)
+            ]
+        return self._queue
+
+    async def enqueue_confirm_mails(self, recipients: list[tuple[str, str]]) -> None:
+        """
+        :recipients пары (email, user_id)
+        """
+        queue = self._ensure_started()
+        request_id = request_id_var.get()
+        for email, user_id in recipients:
+            await queue.put(("confirm", email, user_id, request_id))
+
+    async def enqueue_reset_mail(self, email: str, user_id: str) -> None:
+        await self._ensure_started().put(("reset", email, user_id, request_id_var.get()))
+
+    @property
+    def pending(self) -> int:
+        return 0 if self._queue is None else self._queue.qsize()
+
+    async def _worker(self) -> None:
+        while True:
+            kind, email, user_id, request_id = await self._queue.get()
+            # Логи отправки относятся к запросу, который поставил письмо
+            request_id_var.set(request_id)
+            try:
+                if kind == "confirm":
+                    await self._mail_service.send_user_confirm_mail(email=email, user_id=user_id)
+                else:
+                    await self._mail_service.send_reset_mail(email=email, user_id=user_id)
+            except Exception:
+                mail_logger.exception("Письмо %s для %s не отправлено", kind, email)
+            finally:
+                self._queue.task_done()
+
+    async def drain(self, timeout: float) -> None:
+        """
+        Дожидается отправки уже поставленных писем (не дольше timeout) и останавливает воркеров
+        """
+        if self._queue is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            mail_logger.error("При остановке не отправлено писем: %d", self._queue.qsize())
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._queue = None
+        self._tasks = []
+
+
+@cache
+def get_mail_queue() -> MailQueue:
+    return MailQueue(
+        mail_service=container.resolve("mail_service"),
+        workers=configuration.mail_queue.workers,
+        maxsize=configuration.mail_queue.maxsize
+    )
@@ -0,0 +1,161 @@
+import asyncio
+import itertools
+from functools import cache
+from typing import TYPE_CHECKING
+
+from src.config import configuration, SMTPSender
+from src.logger import mail_logger
+from src.utils import Metrics
+from src.utils.CircuitBreaker import CircuitBreaker
+from src.utils.TokenBucket import TokenBucket
+
+if TYPE_CHECKING:
+    from fastapi_mail import FastMail, MessageSchema
+
+sender_sends = Metrics.counter(
+    "mail_sender_sends_total",
+    "Попытки отправки через каждый аккаунт: sent или error"
+)
+sender_throttled = Metrics.counter(
+    "mail_sender_throttled_total",
+    "Сколько раз письмо ждало, потому что у всех доступных аккаунтов кончились токены"
+)
+senders_rejected = Metrics.counter(
+    "mail_senders_rejected_total",
+    "Письма, сразу отклоненные потому, что предохранители всех аккаунтов открыты"
+)
+
+
+class SendersUnavailable(Exception):
+    """
+    Все аккаунты отключены предохранителями, отправлять сейчас некуда
+    """
+
+
+def is_recipient_refused(exc: Exception) -> bool:
+    from aiosmtplib import SMTPRecipientRefused, SMTPRecipientsRefused
+
+    # Сервер отказался принять адрес получателя: аккаунт исправен, повтор не поможет
+    return isinstance(exc, (SMTPRecipientRefused, SMTPRecipientsRefused))
+
+
+def build_fast_mail(sender: SMTPSender) -> "FastMail":
+    from fastapi_mail import FastMail, ConnectionConfig
+
+    return FastMail(ConnectionConfig(
+        MAIL_USERNAME=sender.user,
+        MAIL_PASSWORD=sender.password,
+        MAIL_FROM=sender.user,
+        MAIL_PORT=sender.port,
+        MAIL_SERVER=sender.host,
+        MAIL_SSL_TLS=sender.ssl_tls,
+        MAIL_STARTTLS=sender.starttls,
+        USE_CREDENTIALS=sender.use_credentials,
+        VALIDATE_CERTS=sender.validate_certs,
+    ))
+
+
+class MailSender:
+    __slots__ = ("name", "params", "mail_app", "bucket", "breaker")
+
+    def __init__(self, params: SMTPSender, mail_app: "FastMail") -> None:
+        self.name = params.name
+        self.params = params
+        self.mail_app = mail_app
+        # Лимит аккаунта общий на все воркеры, процесс берет свою долю. burst делится с округлением
+        # вниз, но не меньше одного письма: при воркерах больше burst всплеск может его превысить
+        shares = configuration.smtp_params.rate_shares
+        self.bucket = TokenBucket(rate_per_s=params.rate_per_s / shares, burst=max(1, params.burst // shares))
+        self.breaker = CircuitBreaker(
+            name=f"smtp:{params.name}",
+            failure_threshold=configuration.smtp_params.breaker_failure_threshold,
+            reset_timeout_s=configuration.smtp_params.breaker_reset_timeout_s,
+            half_open_probes=configuration.smtp_params.breaker_half_open_probes
+        )
+
+
+class SenderPool:
+    """
+    Раскидывает письма по аккаунтам по кругу с учетом лимита каждого.
+    У каждого аккаунта свой предохранитель: после серии ошибок аккаунт отключается,
+    письма уходят через остальные, а когда отключены все - отправка сразу отклоняется
+    """
+
+    def __init__(self, senders: list[MailSender]) -> None:
+        if not senders:
+            raise ValueError("Нужен хотя бы один аккаунт SMTP")
+        self.senders = senders
+        self._order = itertools.cycle(range(len(senders)))
+
+    def _candidates(self, attempted: set[str]) -> list[MailSender]:
+        start = next(self._order)
+        rotated = self.senders[start:] + self.senders[:start]
+        return [
+            sender for sender in rotated
+            if sender.name not in attempted and sender.breaker.available()
+        ]
+
+    async def _acquire(self, attempted: set[str]) -> MailSender | None:
+        while True:
+            candidates = self._candidates(attempted)
+            if not candidates:
+                return None
+
+            for sender in candidates:
+                if sender.bucket.try_acquire():
+                    sender.breaker.begin()
+                    return sender
+
+            sender_throttled.inc()
+            await asyncio.sleep(min(sender.bucket.wait_time() for sender in candidates))
+
+    async def send(self, message: "MessageSchema") -> str:
+        """
+        Отправляет письмо через первый доступный аккаунт, при ошибке через следующий.
+        Возвращает имя аккаунта. Если не смог ни один - пробрасывает последнюю ошибку,
+        если пробовать было некого - SendersUnavailable
+        """
+        from fastapi_mail.errors import ConnectionErrors
+        from aiosmtplib import SMTPException
+
+        attempted = set()
+        last_error = None
+
+        while (sender := await self._acquire(attempted)) is not None:
+            try:
+                await sender.mail_app.send_message(message)
+            except (ConnectionErrors, SMTPException) as exc:
+                if is_recipient_refused(exc):
+                    sender.breaker.record_success()
+                    raise
+
+                sender_sends.inc(sender=sender.name, outcome="error")
+                sender.breaker.record_failure()
+                attempted.add(sender.name)
+                last_error = exc
+                mail_logger.warning("Аккаунт %s не отправил письмо, пробуем следующий: %r", sender.name, exc)
+                continue
+            except BaseException:
+                # Отмена запроса ничего не говорит о здоровье аккаунта, только освобождаем пробу
+                sender.breaker.release()
+                raise
+
+            sender.breaker.record_success()
+            sender_sends.inc(sender=sender.name, outcome="sent")
+            return sender.name
+
+        if last_error is None:
+            senders_rejected.inc()
+            raise SendersUnavailable()
+        raise last_error
+
+
+@cache
+def get_sender_pool() -> SenderPool:
+    """
+    Собирается при первой отправке: fastapi_mail тянет за собой jinja2 и dnspython,
+    а пароли от почты читаются из окружения только здесь
+    """
+    return SenderPool(
+        senders=[MailSender(params, build_fast_mail(params)) for params in configuration.smtp_params.senders]
+    )
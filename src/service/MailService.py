@@ -1,91 +1,119 @@
 import asyncio
-from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
+from typing import TYPE_CHECKING
 from src.config import configuration
-from src.utils import ResetPassManager, ConfirmUrlManager
+from src.container import container
+from src.utils import ResetPassManager, ConfirmUrlManager, MailDedupe, MailTemplates
+from src.utils.CircuitBreaker import backoff_delay
 from src.logger import mail_logger
-from fastapi_mail.errors import ConnectionErrors
+from .MailSenders import SenderPool, SendersUnavailable, is_recipient_refused
 
-connection_config = ConnectionConfig(
-    MAIL_USERNAME=configuration.smtp_params.user,
-    MAIL_PASSWORD=configuration.smtp_params.password,
-    MAIL_FROM=configuration.smtp_params.user,
-    MAIL_PORT=configuration.smtp_params.port,
-    MAIL_SERVER=configuration.smtp_params.host,
-    MAIL_SSL_TLS=configuration.smtp_params.port == 465,
-    MAIL_STARTTLS=configuration.smtp_params.port == 587,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-)
-
-fast_mail = FastMail(connection_config)
+if TYPE_CHECKING:
+    from fastapi_mail import MessageSchema
 
 
 """
-url_to_go --- ссылка по которой должен перейти юзер в данном письме, чтобы перевести  
-содержимое письма на HTML вставляйте его в body и также измените 
-subtype на MessageType.HTML 
+url_to_go --- ссылка по которой должен перейти юзер в данном письме. Тексты писем лежат
+в src/templates/mail: <name>.html и текстовая альтернатива <name>.txt, ссылка подставляется
+вместо {{ url }}
 """
 
 
 class MailService:
-    def __init__(self, mail_app: FastMail = fast_mail) -> None:
-        self._mail_app = mail_app
-
-    async def _send_message_with_retry_and_log(self,
-                                               message: MessageSchema,
-                                               retry: int = 5,
-                                               delay: float = 1) -> None:
-        num_bad = 0
-        while num_bad <= retry:
-            try:
-                await self._mail_app.send_message(message)
-                mail_logger.info(
-                    f"Пользователю {message.recipients[0]} отправлено сообщение"
-                )
-                return None
-            except ConnectionErrors:
-                num_bad += 1
-                if num_bad == 1:
-                    mail_logger.warning(
-                        f"Ошибка соединения при отправке письма {message.recipients[0]}"
-                    )
-                await asyncio.sleep(delay)
-
-        mail_logger.error(
-            f"Не удалось отправить сообщение пользователю {message.recipients[0]} из-за ошибки соединения"
+    def __init__(self, senders: SenderPool | None = None) -> None:
+        self.__senders = senders
+
+    @property
+    def _senders(self) -> SenderPool:
+        # Сервис живет весь процесс, поэтому пул не запоминаем: подмена в container.scope
+        # должна действовать только внутри своего контекста
+        return self.__senders or container.resolve("sender_pool")
+
+    @staticmethod
+    def _build_message(template: str, email: str, url_to_go: str) -> "MessageSchema":
+        from fastapi_mail import MessageSchema, MessageType, MultipartSubtypeEnum
+
+        rendered = MailTemplates.render(template, url=url_to_go)
+        return MessageSchema(
+            subject=rendered.subject,
+            recipients=[email],
+            # В multipart/alternative клиент выбирает последнюю часть, поэтому HTML идет вторым
+            body=rendered.text,
+            alternative_body=rendered.html,
+            subtype=MessageType.plain,
+            multipart_subtype=MultipartSubtypeEnum.alternative
         )
 
+    async def _send_message_with_retry_and_log(self, message: "MessageSchema") -> bool:
+        """
+        Повторяет отправку с экспоненциальной паузой и джиттером, пока аккаунты отвечают ошибками.
+        Если все аккаунты отключены предохранителями, сразу сдается и не занимает запрос ожиданием
+        """
+        from fastapi_mail.errors import ConnectionErrors
+        from aiosmtplib import SMTPException
+
+        smtp = configuration.smtp_params
+        recipient = message.recipients[0]
+
+        for attempt in range(smtp.retry_attempts + 1):
+            if attempt:
+                await asyncio.sleep(backoff_delay(attempt, smtp.retry_base_delay_s, smtp.retry_max_delay_s))
+
+            try:
+                sender = await self._senders.send(message)
+                mail_logger.info("Пользователю %s отправлено сообщение через %s", recipient, sender)
+                return True
+            except SendersUnavailable:
+                mail_logger.error("Письмо %s не отправлено: все аккаунты SMTP отключены предохранителем", recipient)
+                return False
+            except (ConnectionErrors, SMTPException) as exc:
+                if is_recipient_refused(exc):
+                    mail_logger.error("Сервер отказался принять адрес %s: %r", recipient, exc)
+                    return False
+                if attempt == 0:
+                    mail_logger.warning("Ни один аккаунт не отправил письмо %s, повторим", recipient)
+
+        mail_logger.error("Не удалось отправить сообщение пользователю %s из-за ошибки соединения", recipient)
+        return False
+
     async def send_user_confirm_mail(
             self,
             email: str,
             user_id: str
-    ):
+    ) -> str:
+        """
+        Повторы в окне дедупликации не отправляются, возвращает исход отправки
+        """
+        return await MailDedupe.send(
+            purpose="confirm",
+            recipient=email,
+            send=lambda: self._send_confirm_mail(email=email, user_id=user_id)
+        )
+
+    async def _send_confirm_mail(self, email: str, user_id: str) -> bool:
         url_to_go = ConfirmUrlManager.generate_confirm_email_link(
             email=email,
             user_id=user_id
         )
-        message = MessageSchema(
-            subject="Email confirmation",
-            recipients=[email],
-            body=url_to_go,
-            subtype=MessageType.plain
-        )
+        message = self._build_message("confirm_email", email, url_to_go)
 
-        await self._send_message_with_retry_and_log(message)
+        return await self._send_message_with_retry_and_log(message)
 
     async def send_reset_mail(self,
                               email: str,
-                              user_id: str) -> None:
+                              user_id: str) -> str:
+        return await MailDedupe.send(
+            purpose="reset",
+            recipient=email,
+            send=lambda: self._send_reset_mail(email=email, user_id=user_id)
+        )
+
+    async def _send_reset_mail(self, email: str, user_id: str) -> bool:
         url_to_go = ResetPassManager.generate_reset_link(
             email=email,
             user_id=user_id
         )
-        message = MessageSchema(
-            subject="Reset password",
-            recipients=[email],
-            body=url_to_go,
-            subtype=MessageType.plain
-        )
-        await self._send_message_with_retry_and_log(message)
+        message = self._build_message("reset_password", email, url_to_go)
+
+        return await self._send_message_with_retry_and_log(message)
 
 
@@ -0,0 +1,107 @@
+import asyncio
+from typing import AsyncIterator
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from starlette.responses import Response, StreamingResponse
+
+from src.config import configuration
+from src.container import container
+from src.logger import app_logger
+from src.repository import RecordingRepo
+from src.utils.RecordingStore import ContentAddressedStore, RangeNotSatisfiable, parse_range
+
+
+def get_recording_service() -> "RecordingService":
+    return container.resolve("recording_service")
+
+
+class RecordingService:
+    def __init__(self,
+                 repo: RecordingRepo,
+                 store: ContentAddressedStore | None = None
+                 ) -> None:
+        self._repo = repo
+        self._store = store
+        self._params = configuration.recordings
+
+    async def stream_recording(self,
+                               cdr_id: UUID,
+                               user_id: str,
+                               range_header: str | None
+                               ) -> Response:
+        """
+        Отдает запись звонка пользователя целиком (200) или диапазоном из заголовка Range (206).
+        Запись из файлового хранилища читается через mmap, из колонки record - кусками на стороне базы
+        """
+        found = await self._repo.find_recording(cdr_id, user_id)
+        if found is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No such call")
+
+        recording_path, stored_size = found
+        path = self._store.path_for(recording_path) if self._store is not None else None
+
+        if path is not None:
+            try:
+                size = await asyncio.to_thread(self._store.size, path)
+            except FileNotFoundError:
+                # Строка ссылается на файл, которого в хранилище нет: потерян при переносе или удален руками
+                app_logger.error("Запись звонка %s не найдена в хранилище: %s", cdr_id, path)
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No recording for this call")
+        elif stored_size is not None:
+            size = stored_size
+        else:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No recording for this call")
+
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{size}"}
+            )
+
+        start, end = byte_range or (0, size - 1)
+        headers = {"Accept-Ranges": "bytes", "Content-Length": str(end - start + 1)}
+        if byte_range is not None:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        if path is not None:
+            body = self._store.iter_range(path, start, end)
+        else:
+            body = self._iter_record(cdr_id, start, end)
+
+        return StreamingResponse(
+            body,
+            status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range is not None else status.HTTP_200_OK,
+            media_type=self._params.media_type,
+            headers=headers
+        )
+
+    async def _iter_record(self, cdr_id: UUID, start: int, end: int) -> AsyncIterator[bytes]:
+        position = start
+        while position <= end:
+            length = min(self._params.chunk_size, end + 1 - position)
+            yield await self._repo.read_record(cdr_id, position, length)
+            position += length
+
+    async def move_records_to_store(self, batch_size: int) -> tuple[int, int]:
+        """
+        Переносит следующую пачку записей из колонки record в файловое хранилище.
+        Возвращает (записей, байт) в пачке, (0, 0) - переносить больше нечего
+        """
+        if self._store is None:
+            raise RuntimeError("Recording file store is not configured, set RECORDING_STORE=file")
+
+        records = await self._repo.records_to_move(batch_size)
+        moved = {}
+        moved_bytes = 0
+        for cdr_id, start_time, record in records:
+            # Сначала файл, потом строка: при обрыве между ними повтор найдет тот же файл по хэшу
+            moved[(cdr_id, start_time)] = await asyncio.to_thread(self._store.put, record)
+            moved_bytes += len(record)
+
+        if moved:
+            await self._repo.mark_moved(moved)
+            app_logger.debug("Перенесено записей: %d, %d байт", len(moved), moved_bytes)
+        return len(moved), moved_bytes
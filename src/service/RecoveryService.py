@@ -2,12 +2,13 @@ from fastapi import HTTPException, status
 from src.models import (DataForSendingEmail,
                         DataForReset)
 from src.repository import RecoveryRepo
+from src.container import container
 from .MailService import MailService
 from src.utils import PasswordManager
 
 
 def get_recovery_service() -> "RecoveryService":
-    return RecoveryService(repo=RecoveryRepo())
+    return container.resolve("recovery_service")
 
 
 class RecoveryService(MailService):
@@ -39,7 +40,7 @@ class RecoveryService(MailService):
                 detail="A link for recover was expired"
             )
 
-        password_hashed = PasswordManager.hash_password(
+        password_hashed = await PasswordManager.hash_password_async(
             data_for_recover.new_password
         )
 
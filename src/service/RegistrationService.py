@@ -1,13 +1,20 @@
 from fastapi import HTTPException, status
 from src.repository import RegistrationRepo
-from src.models import RegistrationResponse, RegistrationData, ConfirmationData
-from src.utils import JWTManager, PasswordManager
+from src.container import container
+from src.models import (RegistrationResponse,
+                        RegistrationData,
+                        ConfirmationData,
+                        BatchRegistrationData,
+                        BatchRegistrationItem,
+                        BatchRegistrationResponse)
+from src.utils import JWTManager, PasswordManager, BatchHasher, HashBudgetExceeded
 from .MailService import MailService
+from .MailQueue import get_mail_queue
 from starlette.responses import RedirectResponse
 
 
 def get_registration_service() -> "RegistrationService":
-    return RegistrationService(repo=RegistrationRepo())
+    return container.resolve("registration_service")
 
 
 class RegistrationService(MailService):
@@ -18,6 +25,8 @@ class RegistrationService(MailService):
     async def registrate_user(self,
                               registr_data: RegistrationData
                               ) -> RegistrationResponse:
+        # Дешевый отказ до bcrypt. Окончательно решает вставка: email уникален,
+        # и параллельная регистрация с тем же адресом получит None, а не ошибку базы
         user_exists = await self._repo.is_user_exists(
             registr_data.email
         )
@@ -27,7 +36,7 @@ class RegistrationService(MailService):
                 detail="Such user already exists"
             )
 
-        hash_password = PasswordManager.hash_password(
+        hash_password = await PasswordManager.hash_password_async(
             registr_data.password
         )
 
@@ -36,6 +45,11 @@ class RegistrationService(MailService):
             phone_num=str(registr_data.phone),
             password_hash=hash_password
         )
+        if user_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Such user already exists"
+            )
 
         tokens = JWTManager.generate_tokens(
             user_index=str(user_id),
@@ -47,11 +61,62 @@ class RegistrationService(MailService):
             user_id=str(user_id)
         )
 
-        return RegistrationResponse(
+        # Токены мы только что сгенерировали сами, валидировать их незачем
+        return RegistrationResponse.model_construct(
             access_token=tokens["access"],
             refresh_token=tokens["refresh"]
         )
 
+    async def registrate_users(self,
+                               batch: BatchRegistrationData
+                               ) -> BatchRegistrationResponse:
+        """
+        Пакетная регистрация для партнеров: пароли хэшируются в отдельном пуле процессов, пользователи
+        вставляются одним запросом, письма подтверждения уходят в фоновую очередь.
+        Результат по каждому элементу в порядке запроса
+        """
+        # Повтор email внутри пакета не вставляем, выигрывает первое вхождение
+        unique_users = {}
+        for user in batch.users:
+            unique_users.setdefault(user.email, user)
+
+        try:
+            hashes = await BatchHasher.hash_passwords([user.password for user in unique_users.values()])
+        except HashBudgetExceeded as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many batches are being registered, retry later",
+                headers={"Retry-After": str(int(exc.expected_s))}
+            )
+
+        created = await self._repo.add_users([
+            (email, user.phone, password_hash)
+            for (email, user), password_hash in zip(unique_users.items(), hashes)
+        ])
+
+        await get_mail_queue().enqueue_confirm_mails([
+            (email, str(user_id)) for email, user_id in created.items()
+        ])
+
+        results = []
+        seen = set()
+        for user in batch.users:
+            if user.email in seen:
+                item_status, user_id = "duplicate", None
+            elif user.email in created:
+                item_status, user_id = "created", str(created[user.email])
+            else:
+                item_status, user_id = "exists", None
+            seen.add(user.email)
+
+            results.append(BatchRegistrationItem.model_construct(
+                email=user.email,
+                status=item_status,
+                user_id=user_id
+            ))
+
+        return BatchRegistrationResponse.model_construct(results=results)
+
     async def confirm_email(self,
                             conf_data: ConfirmationData) -> RedirectResponse:
         """
@@ -1,3 +1,10 @@
 from .LoginService import get_login_service
 from .RegistrationService import get_registration_service
-from .RecoveryService import get_recovery_service
\ No newline at end of file
+from .RecoveryService import get_recovery_service
+from .ExportService import get_export_service, EXPORT_MEDIA_TYPES
+from .IdempotencyService import get_idempotency_service
+from .AccountDeletionService import get_account_deletion_service
+from .RecordingService import get_recording_service
+from .CDRIngestionService import get_cdr_ingestion_service
+from .BalanceService import get_balance_service
+from .HistoryService import get_history_service
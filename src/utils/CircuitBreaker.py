@@ -0,0 +1,96 @@
+import random
+import time
+from typing import Callable
+
+from .Metrics import Metrics
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Значения для метрики, чтобы на графике было видно переходы
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_state = Metrics.gauge(
+    "circuit_breaker_state",
+    "Состояние предохранителя: 0 - closed, 1 - half_open, 2 - open"
+)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель вокруг внешнего сервиса.
+    closed: вызовы идут, после failure_threshold ошибок подряд переходим в open.
+    open: вызовы сразу отклоняются, через reset_timeout_s переходим в half_open.
+    half_open: пропускаем half_open_probes пробных вызовов, успех закрывает предохранитель, ошибка снова открывает
+    """
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: int,
+                 reset_timeout_s: float,
+                 half_open_probes: int = 1,
+                 clock: Callable[[], float] = time.monotonic
+                 ) -> None:
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout_s = reset_timeout_s
+        self._half_open_probes = half_open_probes
+        self._clock = clock
+
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._set_state(CLOSED)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        circuit_state.set(_STATE_VALUES[state], breaker=self.name)
+
+    def available(self) -> bool:
+        """
+        Можно ли сейчас сделать вызов. Сам вызов нужно отметить через begin()
+        """
+        if self.state == OPEN and self._clock() - self._opened_at >= self._reset_timeout_s:
+            self._probes_in_flight = 0
+            self._set_state(HALF_OPEN)
+
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN:
+            return self._probes_in_flight < self._half_open_probes
+        return False
+
+    def begin(self) -> None:
+        if self.state == HALF_OPEN:
+            self._probes_in_flight += 1
+
+    def release(self) -> None:
+        """
+        Вызов не состоялся (например, отменен), проба half_open освобождается без вывода о здоровье сервиса
+        """
+        if self.state == HALF_OPEN and self._probes_in_flight:
+            self._probes_in_flight -= 1
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self._failure_threshold:
+            self._opened_at = self._clock()
+            self._set_state(OPEN)
+
+
+def backoff_delay(attempt: int,
+                  base_s: float,
+                  max_s: float,
+                  rand: Callable[[], float] = random.random
+                  ) -> float:
+    """
+    Экспоненциальная пауза с полным джиттером: случайное время от 0 до min(max_s, base_s * 2^attempt),
+    чтобы повторы от многих запросов не били в сервис одновременно
+    """
+    return rand() * min(max_s, base_s * 2 ** attempt)
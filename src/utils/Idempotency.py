@@ -0,0 +1,101 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import time
+from dataclasses import dataclass
+from functools import cache
+from typing import Callable
+
+import orjson
+
+from src.config import configuration
+from .TTLCache import TTLCache
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    body: bytes
+    media_type: str | None
+
+
+class IdempotencyCache:
+    """
+    Кэш ответов по ключу идемпотентности: ограничен по размеру (вытесняются самые старые)
+    и по времени жизни. Кроме готовых ответов хранит future запросов, которые еще выполняются,
+    чтобы параллельный повтор дождался первого запроса, а не делал работу второй раз
+    """
+
+    def __init__(self,
+                 max_keys: int,
+                 ttl_s: float,
+                 clock: Callable[[], float] = time.monotonic
+                 ) -> None:
+        self._responses = TTLCache(max_keys, ttl_s, clock)
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    def get(self, key: str) -> StoredResponse | None:
+        return self._responses.get(key)
+
+    def put(self, key: str, response: StoredResponse) -> None:
+        self._responses.set(key, response)
+
+    def in_flight(self, key: str) -> asyncio.Future | None:
+        return self._in_flight.get(key)
+
+    def begin(self, key: str) -> None:
+        self._in_flight[key] = asyncio.get_running_loop().create_future()
+
+    def finish(self, key: str) -> None:
+        """
+        Будит всех, кто ждет этот ключ. Результат они берут уже из кэша, а если первый запрос
+        упал и ничего не сохранил, то один из них выполнит запрос сам
+        """
+        future = self._in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+
+def request_fingerprint(payload: dict) -> str:
+    """
+    Отпечаток тела запроса. В теле бывает пароль, поэтому отпечаток с ключом, а не голый sha256
+    """
+    return hmac.new(
+        key=configuration.jwt_param.secret_key.encode(),
+        msg=orjson.dumps(payload, option=orjson.OPT_SORT_KEYS),
+        digestmod=hashlib.sha256
+    ).hexdigest()
+
+
+@cache
+def _body_cipher():
+    from cryptography.fernet import Fernet
+
+    key = hmac.new(
+        key=configuration.jwt_param.secret_key.encode(),
+        msg=b"idempotency-body",
+        digestmod=hashlib.sha256
+    ).digest()
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def seal_body(body: bytes) -> bytes:
+    """
+    Шифрует тело ответа перед записью в idempotency_keys: в ответе регистрации лежат токены
+    """
+    return _body_cipher().encrypt(body)
+
+
+def open_body(sealed: bytes) -> bytes:
+    return _body_cipher().decrypt(sealed)
+
+
+IdempotencyStore = IdempotencyCache(
+    max_keys=configuration.idempotency.max_keys,
+    ttl_s=configuration.idempotency.ttl_s
+)
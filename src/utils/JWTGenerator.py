@@ -41,6 +41,16 @@ class JWTGenerator:
 
         return {"access": access_jwt, "refresh": refresh_jwt}
 
+    def decode_access(self, token: str) -> dict:
+        """
+        Проверяет подпись и срок access токена и возвращает его payload.
+        Бросает jwt.InvalidTokenError, в том числе если передан refresh токен
+        """
+        payload = jwt.decode(token, key=self.__secret_key, algorithms=["HS256"])
+        if payload.get("type") != "Access":
+            raise jwt.InvalidTokenError("Not an access token")
+        return payload
+
 
 JWTManager = JWTGenerator(
     access_lifespan=configuration.jwt_param.access_lifespan,
@@ -0,0 +1,30 @@
+"""
+Непрозрачный курсор страницы для keyset пагинации: ключ сортировки последней строки и ее id
+в base64. Клиент только передает его обратно, следующая страница начинается сразу после этой строки
+"""
+import base64
+from typing import Any, Callable
+from uuid import UUID
+
+import orjson
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_key: Any, row_id: UUID) -> str:
+    payload = orjson.dumps([sort_key.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, parse_key: Callable[[str], Any]) -> tuple[Any, UUID]:
+    """
+    :parse_key разбирает ключ сортировки из isoformat: datetime.fromisoformat, date.fromisoformat
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_key, row_id = orjson.loads(payload)
+        return parse_key(sort_key), UUID(row_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from src.config import configuration
+from .Metrics import Metrics
+from .TTLCache import TTLCache
+
+mail_sends = Metrics.counter(
+    "mail_sends_total",
+    "Запросы на отправку письма по назначению и исходу: sent, failed, coalesced, suppressed"
+)
+
+
+class MailDeduplicator:
+    """
+    Окна дедупликации писем по паре (назначение, получатель).
+    Пока письмо получателю в отправке, повторные запросы ждут его и второе не отправляют (coalesced).
+    После успешной отправки повторы в течение окна не отправляются совсем (suppressed):
+    ссылка из уже отправленного письма еще жива
+    """
+
+    def __init__(self,
+                 windows_s: dict[str, float],
+                 max_recipients: int,
+                 clock: Callable[[], float] = time.monotonic
+                 ) -> None:
+        self._windows_s = windows_s
+        # Ключ живет ровно окно своего назначения
+        self._sent = TTLCache(max_recipients, 0, clock)
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+
+    def _sent_recently(self, key: tuple[str, str]) -> bool:
+        return self._sent.get(key, False)
+
+    def _remember(self, key: tuple[str, str]) -> None:
+        window_s = self._windows_s.get(key[0], 0)
+        if window_s > 0:
+            self._sent.set(key, True, ttl_s=window_s)
+
+    async def send(self,
+                   purpose: str,
+                   recipient: str,
+                   send: Callable[[], Awaitable[bool]]
+                   ) -> str:
+        """
+        :send отправляет письмо и возвращает True, если оно ушло
+        Возвращает исход: sent, failed, coalesced или suppressed.
+        Присоединившиеся к неудачной отправке получают failed, а окно не начинается:
+        следующий запрос отправит письмо заново
+        """
+        key = (purpose, recipient.lower())
+
+        if self._sent_recently(key):
+            outcome = "suppressed"
+
+        elif key in self._in_flight:
+            sent = await asyncio.shield(self._in_flight[key])
+            outcome = "coalesced" if sent else "failed"
+
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            sent = False
+            try:
+                sent = await send()
+            finally:
+                # Время отправки запоминается до того, как ждущие узнают результат
+                if sent:
+                    self._remember(key)
+                del self._in_flight[key]
+                future.set_result(sent)
+
+            outcome = "sent" if sent else "failed"
+
+        mail_sends.inc(purpose=purpose, outcome=outcome)
+        return outcome
+
+
+MailDedupe = MailDeduplicator(
+    windows_s=configuration.mail_dedupe.windows_s,
+    max_recipients=configuration.mail_dedupe.max_recipients
+)
@@ -0,0 +1,79 @@
+import html
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.config import configuration
+
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class CompiledTemplate:
+    """
+    Шаблон, разобранный один раз на статические куски и имена подстановок.
+    Рендер только склеивает куски с подставленными значениями, без разбора и без движка шаблонов
+    """
+
+    __slots__ = ("_fragments", "_fields", "_escape")
+
+    def __init__(self, source: str, escape: bool) -> None:
+        parts = _PLACEHOLDER.split(source)
+        # После split статические куски стоят на четных местах, имена подстановок на нечетных
+        self._fragments = parts[::2]
+        self._fields = parts[1::2]
+        self._escape = escape
+
+    def render(self, **values: str) -> str:
+        if self._escape:
+            values = {name: html.escape(value, quote=True) for name, value in values.items()}
+
+        rendered = [self._fragments[0]]
+        for field, fragment in zip(self._fields, self._fragments[1:]):
+            rendered.append(values[field])
+            rendered.append(fragment)
+        return "".join(rendered)
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedMail:
+    subject: str
+    html: str
+    text: str
+
+
+class MailTemplateRenderer:
+    """
+    Шаблоны писем из templates_dir: для каждого письма <name>.html и <name>.txt (текстовая альтернатива).
+    Компилируются один раз, при прогреве или при первом письме
+    """
+
+    def __init__(self, templates_dir: Path, subjects: dict[str, str]) -> None:
+        self._templates_dir = templates_dir
+        self._subjects = subjects
+        self._compiled: dict[str, tuple[CompiledTemplate, CompiledTemplate]] | None = None
+
+    def compile_all(self) -> None:
+        compiled = {}
+        for name in self._subjects:
+            compiled[name] = (
+                CompiledTemplate((self._templates_dir / f"{name}.html").read_text(encoding="utf-8"), escape=True),
+                CompiledTemplate((self._templates_dir / f"{name}.txt").read_text(encoding="utf-8"), escape=False),
+            )
+        self._compiled = compiled
+
+    def render(self, name: str, **values: str) -> RenderedMail:
+        if self._compiled is None:
+            self.compile_all()
+
+        html_template, text_template = self._compiled[name]
+        return RenderedMail(
+            subject=self._subjects[name],
+            html=html_template.render(**values),
+            text=text_template.render(**values)
+        )
+
+
+MailTemplates = MailTemplateRenderer(
+    templates_dir=configuration.mail_templates.templates_dir,
+    subjects=configuration.mail_templates.subjects
+)
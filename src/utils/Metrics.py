@@ -0,0 +1,72 @@
+from collections import defaultdict
+from typing import Callable
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self._values: defaultdict[tuple, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        self._values[tuple(sorted(labels.items()))] += amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self) -> list[tuple[tuple, float]]:
+        return list(self._values.items())
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[tuple(sorted(labels.items()))] = value
+
+
+class MetricsRegistry:
+    """
+    Метрики процесса в текстовом формате Prometheus. Каждый воркер считает свои,
+    сборщик различает их по адресу, с которого снимает /metrics
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def counter(self, name: str, description: str) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, description)
+        return self._metrics[name]
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        if name not in self._metrics:
+            self._metrics[name] = Gauge(name, description)
+        return self._metrics[name]
+
+    def collector(self, collect: Callable[[], None]) -> Callable[[], None]:
+        """
+        Регистрирует функцию, которая выставляет gauge перед каждым render.
+        Для значений, которые дешевле прочитать при сборе, чем обновлять на каждом событии
+        """
+        self._collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in metric.samples():
+                rendered_labels = ",".join(f'{key}="{val}"' for key, val in labels)
+                lines.append(f"{metric.name}{{{rendered_labels}}} {value:g}" if labels else f"{metric.name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+Metrics = MetricsRegistry()
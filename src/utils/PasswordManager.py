@@ -1,19 +1,70 @@
-from passlib.context import CryptContext
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
 from src.config import configuration
 
 
 class PasswordHasher:
     """ Класс-обёртка для работы с Passlib (bcrypt). """
 
-    def __init__(self, rounds: int = 12):
+    def __init__(self, rounds: int = 12, workers: int | None = 1):
         """
         :param rounds: число «раундов» (cost) для bcrypt.
+        :param workers: число потоков для асинхронного хэширования (bcrypt отпускает GIL).
+            None - взять из настроек при первом хэшировании, а не при импорте.
         """
-        self._pwd_context = CryptContext(
-            schemes=["bcrypt"],
-            default="bcrypt",
-            bcrypt__rounds=rounds
-        )
+        self._rounds = rounds
+        self._workers = workers
+        self._context: Any = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def _pwd_context(self) -> Any:
+        """
+        CryptContext собирается при первом хэшировании, вместе с импортом passlib
+        """
+        if self._context is None:
+            from passlib.context import CryptContext
+
+            self._context = CryptContext(
+                # argon2 нужен только для проверки хэшей, перенесенных из старой системы
+                schemes=["bcrypt", "argon2"],
+                default="bcrypt",
+                bcrypt__rounds=self._rounds
+            )
+        return self._context
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers or configuration.password_hash_param.workers,
+                thread_name_prefix="password-hasher"
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        """
+        Дожидается уже начатых хэширований и освобождает потоки
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def hash_password_async(self, password: str) -> str:
+        """
+        То же, что hash_password, но не блокирует event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.hash_password, password)
+
+    async def verify_password_async(self, password: str, hashed: str) -> bool:
+        """
+        То же, что verify_password, но не блокирует event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.verify_password, password, hashed)
 
     def hash_password(self, password: str) -> str:
         """
@@ -34,6 +85,102 @@ class PasswordHasher:
         return self._pwd_context.needs_update(hashed)
 
 
+_process_hasher: PasswordHasher | None = None
+
+
+def _init_process_hasher(rounds: int) -> None:
+    global _process_hasher
+    _process_hasher = PasswordHasher(rounds=rounds)
+
+
+def _hash_in_process(passwords: list[str]) -> tuple[list[str], float]:
+    started = time.perf_counter()
+    hashes = [_process_hasher.hash_password(password) for password in passwords]
+    return hashes, time.perf_counter() - started
+
+
+class HashBudgetExceeded(Exception):
+    """
+    Пакет не успеет захэшироваться за max_wait_s из-за пакетов, которые уже в очереди.
+    Запрос можно повторить через expected_s
+    """
+
+    def __init__(self, expected_s: float) -> None:
+        super().__init__(f"Хэширование пакета займет около {expected_s:.0f} с")
+        self.expected_s = expected_s
+
+
+class BatchPasswordHasher:
+    """
+    Хэширование пакетов паролей в отдельном ограниченном пуле процессов. Потоки PasswordManager
+    остаются логину и одиночной регистрации, сколько бы пакетов ни пришло.
+    Пакет принимается, только если вместе с уже ждущими успеет за max_wait_s: время на хэш
+    оценивается по последним пакетам. Размер одного пакета ограничен заранее
+    (BatchRegistrationParams.max_users), поэтому пакет при пустой очереди принимается всегда
+    """
+
+    def __init__(self, rounds: int, processes: int, max_wait_s: float, hash_cost_s: float) -> None:
+        self._rounds = rounds
+        self._processes = processes
+        self._max_wait_s = max_wait_s
+        self._cost_s = hash_cost_s
+        self._pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, а не fork: процесс воркера многопоточный, fork копирует чужие блокировки
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_hasher,
+                initargs=(self._rounds,)
+            )
+        return self._executor
+
+    def expected_s(self, count: int) -> float:
+        return (self._pending + count) * self._cost_s / self._processes
+
+    async def hash_passwords(self, passwords: list[str]) -> list[str]:
+        count = len(passwords)
+        if not count:
+            return []
+
+        expected = self.expected_s(count)
+        if self._pending and expected > self._max_wait_s:
+            raise HashBudgetExceeded(expected)
+
+        self._pending += count
+        try:
+            loop = asyncio.get_running_loop()
+            chunk = -(-count // self._processes)
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self._get_executor(), _hash_in_process, passwords[i:i + chunk])
+                for i in range(0, count, chunk)
+            ))
+        finally:
+            self._pending -= count
+
+        # Время считается внутри процессов, ожидание в очереди пула в оценку не попадает
+        observed = sum(elapsed for _, elapsed in results) / count
+        self._cost_s = 0.8 * self._cost_s + 0.2 * observed
+        return [password_hash for hashes, _ in results for password_hash in hashes]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# HASH_WORKERS читается из окружения, поэтому число потоков берется при первом хэшировании
 PasswordManager = PasswordHasher(
-    rounds=configuration.password_hash_param.rounds
-)
\ No newline at end of file
+    rounds=configuration.password_hash_param.rounds,
+    workers=None
+)
+
+BatchHasher = BatchPasswordHasher(
+    rounds=configuration.password_hash_param.rounds,
+    processes=configuration.batch_registration.hash_processes,
+    max_wait_s=configuration.batch_registration.max_hash_wait_s,
+    hash_cost_s=configuration.batch_registration.hash_cost_s
+)
@@ -0,0 +1,105 @@
+import hashlib
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator
+
+# recording_path записи, которая лежит в хранилище: "sha256:<hex>"
+STORE_PREFIX = "sha256:"
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Разбирает заголовок Range в (start, end) включительно. None - отдать файл целиком:
+    заголовка нет, он не в байтах или просит несколько диапазонов (так тоже можно по RFC 9110)
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # bytes=-N - последние N байт
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end or start < 0:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+
+class ContentAddressedStore:
+    """
+    Записи разговоров на диске под именем sha256 содержимого: root/ab/cd/abcd....
+    Одинаковые файлы хранятся один раз, а записанный файл больше не меняется,
+    поэтому его можно отдавать через mmap без блокировок
+    """
+
+    def __init__(self, root: Path, chunk_size: int = 256 * 1024) -> None:
+        self._root = root
+        self._chunk_size = chunk_size
+
+    def _path(self, digest: str) -> Path:
+        return self._root / digest[:2] / digest[2:4] / digest
+
+    def path_for(self, recording_path: str) -> Path | None:
+        if not recording_path.startswith(STORE_PREFIX):
+            return None
+        digest = recording_path[len(STORE_PREFIX):]
+        if len(digest) != 64 or not all(char in "0123456789abcdef" for char in digest):
+            return None
+        return self._path(digest)
+
+    def put(self, data: bytes) -> str:
+        """
+        Сохраняет запись и возвращает значение для recording_path. Блокирующий, из event loop
+        вызывать через asyncio.to_thread
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            return STORE_PREFIX + digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Через временный файл и rename: читатель никогда не увидит недописанную запись
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return STORE_PREFIX + digest
+
+    @staticmethod
+    def size(path: Path) -> int:
+        return path.stat().st_size
+
+    def iter_range(self, path: Path, start: int, end: int) -> Iterator[bytes]:
+        """
+        Отдает байты [start, end] кусками через mmap: чтение идет прямо из page cache без read()
+        на каждый кусок. Итератор синхронный, StreamingResponse крутит его в пуле потоков,
+        так что подкачка страниц с диска не останавливает event loop
+        """
+        with open(path, "rb") as file:
+            if end < start:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                position = start
+                while position <= end:
+                    chunk_end = min(position + self._chunk_size, end + 1)
+                    yield mapped[position:chunk_end]
+                    position = chunk_end
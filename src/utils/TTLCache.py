@@ -0,0 +1,54 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """
+    Словарь с ограничением по размеру и времени жизни записей. При переполнении вытесняются
+    самые давно записанные ключи, просроченные удаляются при чтении и по ходу записи.
+    Работает в одном event loop, блокировок нет
+    """
+
+    __slots__ = ("_max_size", "_ttl_s", "_clock", "_entries")
+
+    def __init__(self,
+                 max_size: int,
+                 ttl_s: float,
+                 clock: Callable[[], float] = time.monotonic
+                 ) -> None:
+        self._max_size = max_size
+        self._ttl_s = ttl_s
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_s: float | None = None) -> None:
+        """
+        :ttl_s время жизни этой записи, по умолчанию общее для кэша
+        """
+        now = self._clock()
+        self._entries[key] = (now + (self._ttl_s if ttl_s is None else ttl_s), value)
+        self._entries.move_to_end(key)
+
+        while self._entries:
+            oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+            if len(self._entries) <= self._max_size and expires_at > now:
+                break
+            del self._entries[oldest_key]
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
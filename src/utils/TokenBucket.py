@@ -0,0 +1,43 @@
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """
+    Ограничение частоты: в среднем rate_per_s событий в секунду и не больше burst подряд.
+    Работает в одном event loop, между проверкой и списанием токена нет await
+    """
+
+    __slots__ = ("_rate_per_s", "_burst", "_tokens", "_updated_at", "_clock")
+
+    def __init__(self,
+                 rate_per_s: float,
+                 burst: int,
+                 clock: Callable[[], float] = time.monotonic
+                 ) -> None:
+        if rate_per_s <= 0 or burst < 1:
+            raise ValueError("Нужны rate_per_s > 0 и burst >= 1")
+        self._rate_per_s = rate_per_s
+        self._burst = burst
+        self._tokens = float(burst)
+        self._clock = clock
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate_per_s)
+        self._updated_at = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """
+        Через сколько секунд появится следующий токен
+        """
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self._rate_per_s)
@@ -1,4 +1,8 @@
-from .PasswordManager import PasswordManager
+from .PasswordManager import PasswordManager, BatchHasher, HashBudgetExceeded
 from .JWTGenerator import JWTManager
 from .ResetPasswordManager import ResetPassManager
 from .ConfirmUrlGenerator import ConfirmUrlManager
+from .Idempotency import IdempotencyStore
+from .Metrics import Metrics
+from .MailDedupe import MailDedupe
+from .MailTemplates import MailTemplates